@@ -1,232 +1,564 @@
+import os
 from os import environ
+from typing import Optional
 
 import aws_cdk as cdk
+from aws_cdk import aws_applicationautoscaling as appscaling
 from aws_cdk import aws_ec2 as ec2
+from aws_cdk import aws_ecs as ecs
 
+from src.dashboard_stack import DashboardStack
+from src.data_load_props import DataLoadProps
+from src.data_load_stack import DataLoadStack
 from src.ecs_stack import EcsStack
+from src.helpers.capacity_plan import CapacityPlan
 from src.helpers.get_package_version import get_alternate_tag_for_edge_package_version
+from src.load_balancer_props import AccessLogs, LoadBalancerProps
 from src.load_balancer_stack import LoadBalancerStack
+from src.load_test_props import LoadTestProps, LoadTestScenario
+from src.load_test_stack import LoadTestStack
 from src.network_stack import NetworkStack
-from src.service_props import ServiceProps, ServiceSecret
-from src.service_stack import LoadBalancedServiceStack, ServiceStack
+from src.service_props import (
+    ContainerLogging,
+    ContainerRuntime,
+    ContainerTracing,
+    DeploymentAlarms,
+    PredictiveScaling,
+    RuntimeTuning,
+    ScalingMetric,
+    ServiceContainer,
+    ServiceProps,
+    ServiceSecret,
+)
+from src.service_stack import (
+    ListenerRuleServiceStack,
+    LoadBalancedServiceStack,
+    ServiceStack,
+)
 from src.docdb_props import DocdbProps
+from src.docdb_index_props import DocdbIndexProps, load_index_spec
+from src.docdb_index_stack import DocdbIndexStack
 from src.docdb_stack import DocdbStack
 from src.bastion_props import BastionProps
 from src.bastion_stack import BastionStack
 
-# get the environment and set environment specific variables
 VALID_ENVIRONMENTS = ["dev", "stage", "prod"]
-environment = environ.get("ENV")
-match environment:
-    case "prod":
-        environment_variables = {
-            "VPC_CIDR": "10.253.174.0/24",
-            "FQDN": "prod.modeladexplorer.org",
-            "CERTIFICATE_ID": "dac041fd-e947-4684-a910-fa343adeac33",
-            "TAGS": {"CostCenter": "Model AD-UCI / 123300", "Environment": "prod"},
-            "AUTO_SCALE_CAPACITY": {"min": 2, "max": 4},
-            "GHCR_PACKAGE_VERSION": "edge",
-        }
-    case "stage":
-        environment_variables = {
-            "VPC_CIDR": "10.253.173.0/24",
-            "FQDN": "stage.modeladexplorer.org",
-            "CERTIFICATE_ID": "dac041fd-e947-4684-a910-fa343adeac33",
-            "TAGS": {"CostCenter": "Model AD-IU / 123200", "Environment": "stage"},
-            "AUTO_SCALE_CAPACITY": {"min": 2, "max": 4},
-            "GHCR_PACKAGE_VERSION": "edge",
-        }
-    case "dev":
-        environment_variables = {
-            "VPC_CIDR": "10.253.172.0/24",
-            "FQDN": "dev.modeladexplorer.org",
-            "CERTIFICATE_ID": "b2e46121-3f53-4aba-af2e-bd724549c494",
-            "TAGS": {"CostCenter": "Model AD-IU / 123200", "Environment": "dev"},
-            "AUTO_SCALE_CAPACITY": {"min": 1, "max": 2},
-            "GHCR_PACKAGE_VERSION": "edge",
+IMAGE_NAMES = ["model-ad-app", "model-ad-api", "model-ad-apex"]
+# the DocumentDB indexes of every environment
+DOCDB_INDEX_SPEC = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "docdb-indexes.json"
+)
+# the same benchmark runs against every environment
+LOAD_TEST_SCENARIOS = [
+    LoadTestScenario(name="home", routes=["/"], virtual_users=20, p95_threshold=2000),
+    LoadTestScenario(
+        name="health", routes=["/health"], virtual_users=5, p95_threshold=500
+    ),
+]
+
+# the namespace of the EMF metrics emitted by the Node.js services
+NODE_METRICS_NAMESPACE = "ModelAD/Node"
+
+
+def get_node_scaling_metrics(in_flight_requests: int) -> list:
+    """
+    Scale a Node.js service on its saturation rather than its CPU: step out on the p99 event loop
+    lag in milliseconds and track the average number of in-flight requests per task.
+    """
+    return [
+        ScalingMetric(
+            metric_name="EventLoopLag",
+            namespace=NODE_METRICS_NAMESPACE,
+            statistic="p99",
+            scaling_steps=[
+                appscaling.ScalingInterval(upper=20, change=-1),
+                appscaling.ScalingInterval(lower=100, change=+1),
+                appscaling.ScalingInterval(lower=250, change=+2),
+            ],
+        ),
+        ScalingMetric(
+            metric_name="InFlightRequests",
+            namespace=NODE_METRICS_NAMESPACE,
+            target_value=in_flight_requests,
+        ),
+    ]
+
+
+def get_environment_variables(environment: str) -> dict:
+    """Get the environment specific variables"""
+    match environment:
+        case "prod":
+            environment_variables = {
+                "VPC_CIDR": "10.253.174.0/24",
+                "FQDN": "prod.modeladexplorer.org",
+                "CERTIFICATE_ID": "dac041fd-e947-4684-a910-fa343adeac33",
+                "TAGS": {"CostCenter": "Model AD-UCI / 123300", "Environment": "prod"},
+                "AUTO_SCALE_CAPACITY": {"min": 2, "max": 4},
+                "GHCR_PACKAGE_VERSION": "edge",
+                "CONTAINER_INSIGHTS": ecs.ContainerInsights.ENHANCED,
+                "ALB_ACCESS_LOGS": True,
+                "WAF_BLOCK": True,
+                "TRACING": False,
+                "COLOCATE_APEX_APP": False,
+                "API_PATH_ROUTING": False,
+                "METRIC_SCALING": False,
+                "PREDICTIVE_SCALING": {
+                    "mode": "ForecastAndScale",
+                    "scheduling_buffer_time": 600,
+                },
+                "DATA_LOAD_S3_PREFIX": None,
+                "LOAD_TEST": False,
+                "RUNTIME_TUNING": {"node_env": "production"},
+            }
+        case "stage":
+            environment_variables = {
+                "VPC_CIDR": "10.253.173.0/24",
+                "FQDN": "stage.modeladexplorer.org",
+                "CERTIFICATE_ID": "dac041fd-e947-4684-a910-fa343adeac33",
+                "TAGS": {"CostCenter": "Model AD-IU / 123200", "Environment": "stage"},
+                "AUTO_SCALE_CAPACITY": {"min": 2, "max": 4},
+                "GHCR_PACKAGE_VERSION": "edge",
+                "CONTAINER_INSIGHTS": ecs.ContainerInsights.ENHANCED,
+                "ALB_ACCESS_LOGS": True,
+                "WAF_BLOCK": True,
+                "TRACING": True,
+                "COLOCATE_APEX_APP": False,
+                "API_PATH_ROUTING": False,
+                "METRIC_SCALING": False,
+                "PREDICTIVE_SCALING": {"mode": "ForecastOnly"},
+                "DATA_LOAD_S3_PREFIX": None,
+                "LOAD_TEST": False,
+                "RUNTIME_TUNING": {"node_env": "production"},
+            }
+        case "dev":
+            environment_variables = {
+                "VPC_CIDR": "10.253.172.0/24",
+                "FQDN": "dev.modeladexplorer.org",
+                "CERTIFICATE_ID": "b2e46121-3f53-4aba-af2e-bd724549c494",
+                "TAGS": {"CostCenter": "Model AD-IU / 123200", "Environment": "dev"},
+                "AUTO_SCALE_CAPACITY": {"min": 1, "max": 2},
+                "GHCR_PACKAGE_VERSION": "edge",
+                "CONTAINER_INSIGHTS": ecs.ContainerInsights.ENABLED,
+                "ALB_ACCESS_LOGS": False,
+                "WAF_BLOCK": False,
+                "TRACING": True,
+                "COLOCATE_APEX_APP": False,
+                "API_PATH_ROUTING": False,
+                "METRIC_SCALING": True,
+                "PREDICTIVE_SCALING": None,
+                "DATA_LOAD_S3_PREFIX": None,
+                "LOAD_TEST": True,
+                "RUNTIME_TUNING": {},
+            }
+        case _:
+            valid_envs_str = ",".join(VALID_ENVIRONMENTS)
+            raise SystemExit(
+                f"Must set environment variable `ENV` to one of {valid_envs_str}. Currently set to {environment}."
+            )
+    return environment_variables
+
+
+def get_image_versions(ghcr_package_version: str) -> dict:
+    """Get the image tag of each service, `edge` is resolved to its alternate tag with the GitHub API"""
+    if ghcr_package_version == "edge":
+        return {
+            image_name: get_alternate_tag_for_edge_package_version(
+                "Sage-Bionetworks", image_name
+            )
+            for image_name in IMAGE_NAMES
         }
-    case _:
-        valid_envs_str = ",".join(VALID_ENVIRONMENTS)
-        raise SystemExit(
-            f"Must set environment variable `ENV` to one of {valid_envs_str}. Currently set to {environment}."
-        )
+    return {image_name: ghcr_package_version for image_name in IMAGE_NAMES}
 
-stack_name_prefix = f"model-ad-{environment}"
-fully_qualified_domain_name = environment_variables["FQDN"]
-environment_tags = environment_variables["TAGS"]
-ghcr_package_version = environment_variables["GHCR_PACKAGE_VERSION"]
-docdb_master_username = "master"
-mongodb_port = 27017
-vpn_cidr = "10.1.0.0/16"
 
-# Get image versions
-if ghcr_package_version == "edge":
-    app_version = get_alternate_tag_for_edge_package_version(
-        "Sage-Bionetworks", "model-ad-app"
-    )
-    api_version = get_alternate_tag_for_edge_package_version(
-        "Sage-Bionetworks", "model-ad-api"
-    )
-    apex_version = get_alternate_tag_for_edge_package_version(
-        "Sage-Bionetworks", "model-ad-apex"
-    )
-else:
-    app_version = api_version = apex_version = ghcr_package_version
+def build_app(
+    environment: str,
+    image_versions: dict,
+    outdir: Optional[str] = None,
+    context: Optional[dict] = None,
+) -> cdk.App:
+    """Define the stacks of an environment, `image_versions` maps each image name to its tag"""
+    environment_variables = get_environment_variables(environment)
+    stack_name_prefix = f"model-ad-{environment}"
+    fully_qualified_domain_name = environment_variables["FQDN"]
+    environment_tags = environment_variables["TAGS"]
+    docdb_master_username = "master"
+    mongodb_port = 27017
+    vpn_cidr = "10.1.0.0/16"
+    app_version = image_versions["model-ad-app"]
+    api_version = image_versions["model-ad-api"]
+    apex_version = image_versions["model-ad-apex"]
+    container_tracing = ContainerTracing() if environment_variables["TRACING"] else None
 
-print(
-    f"Using images: model-ad-app:{app_version}, model-ad-api:{api_version}, model-ad-apex:{apex_version}"
-)
+    # Define stacks
+    cdk_app = cdk.App(outdir=outdir, context=context)
 
-# Define stacks
-cdk_app = cdk.App()
+    # recursively apply tags to all stack resources
+    if environment_tags:
+        for key, value in environment_tags.items():
+            cdk.Tags.of(cdk_app).add(key, value)
 
-# recursively apply tags to all stack resources
-if environment_tags:
-    for key, value in environment_tags.items():
-        cdk.Tags.of(cdk_app).add(key, value)
+    network_stack = NetworkStack(
+        scope=cdk_app,
+        construct_id=f"{stack_name_prefix}-network",
+        vpc_cidr=environment_variables["VPC_CIDR"],
+    )
 
-network_stack = NetworkStack(
-    scope=cdk_app,
-    construct_id=f"{stack_name_prefix}-network",
-    vpc_cidr=environment_variables["VPC_CIDR"],
-)
+    docdb_props = DocdbProps(
+        instance_type=ec2.InstanceType.of(
+            ec2.InstanceClass.MEMORY5, ec2.InstanceSize.LARGE
+        ),
+        master_username=docdb_master_username,
+        port=mongodb_port,
+    )
+    # fail the synth when the services over-commit their tasks or the DocumentDB connections,
+    # the plan is written to capacity-plan.md in the output directory
+    capacity_plan = CapacityPlan(environment, cdk_app.outdir, docdb_props)
+    cdk_app.node.add_validation(capacity_plan)
+    docdb_stack = DocdbStack(
+        scope=cdk_app,
+        construct_id=f"{stack_name_prefix}-docdb",
+        vpc=network_stack.vpc,
+        props=docdb_props,
+    )
+    docdb_stack.cluster.connections.allow_from(
+        ec2.Peer.ipv4(vpn_cidr), ec2.Port.all_traffic(), "Allow all VPN traffic"
+    )
 
-docdb_props = DocdbProps(
-    instance_type=ec2.InstanceType.of(
-        ec2.InstanceClass.MEMORY5, ec2.InstanceSize.LARGE
-    ),
-    master_username=docdb_master_username,
-    port=mongodb_port,
-)
-docdb_stack = DocdbStack(
-    scope=cdk_app,
-    construct_id=f"{stack_name_prefix}-docdb",
-    vpc=network_stack.vpc,
-    props=docdb_props,
-)
-docdb_stack.cluster.connections.allow_from(
-    ec2.Peer.ipv4(vpn_cidr), ec2.Port.all_traffic(), "Allow all VPN traffic"
-)
+    ecs_stack = EcsStack(
+        scope=cdk_app,
+        construct_id=f"{stack_name_prefix}-ecs",
+        vpc=network_stack.vpc,
+        namespace=fully_qualified_domain_name,
+        container_insights=environment_variables["CONTAINER_INSIGHTS"],
+    )
 
-ecs_stack = EcsStack(
-    scope=cdk_app,
-    construct_id=f"{stack_name_prefix}-ecs",
-    vpc=network_stack.vpc,
-    namespace=fully_qualified_domain_name,
-)
+    dashboard_stack = DashboardStack(
+        scope=cdk_app,
+        construct_id=f"{stack_name_prefix}-dashboard",
+    )
 
-# From AWS docs https://docs.aws.amazon.com/AmazonECS/latest/developerguide/service-connect-concepts-deploy.html
-# The public discovery and reachability should be created last by AWS CloudFormation, including the frontend
-# client service. The services need to be created in this order to prevent an time period when the frontend
-# client service is running and available the public, but a backend isn't.
-load_balancer_stack = LoadBalancerStack(
-    scope=cdk_app,
-    construct_id=f"{stack_name_prefix}-load-balancer",
-    vpc=network_stack.vpc,
-)
+    # From AWS docs https://docs.aws.amazon.com/AmazonECS/latest/developerguide/service-connect-concepts-deploy.html
+    # The public discovery and reachability should be created last by AWS CloudFormation, including the frontend
+    # client service. The services need to be created in this order to prevent an time period when the frontend
+    # client service is running and available the public, but a backend isn't.
+    # route `/api/*` from the load balancer straight to the API instead of through apex, the
+    # services then register listener rules on the HTTPS listener of the load balancer stack
+    api_path_routing = environment_variables["API_PATH_ROUTING"]
+    load_balancer_stack = LoadBalancerStack(
+        scope=cdk_app,
+        construct_id=f"{stack_name_prefix}-load-balancer",
+        vpc=network_stack.vpc,
+        props=LoadBalancerProps(
+            waf_block=environment_variables["WAF_BLOCK"],
+            access_logs=(
+                AccessLogs() if environment_variables["ALB_ACCESS_LOGS"] else None
+            ),
+            certificate_id=(
+                environment_variables["CERTIFICATE_ID"] if api_path_routing else None
+            ),
+        ),
+    )
 
-api_props = ServiceProps(
-    container_name="model-ad-api",
-    container_location=f"ghcr.io/sage-bionetworks/model-ad-api:{api_version}",
-    container_port=3333,
-    container_memory_reservation=2048,
-    container_env_vars={
-        "NODE_ENV": "development",
+    mongodb_env_vars = {
         "MONGODB_PORT": f"{mongodb_port}",
         "MONGODB_NAME": "model-ad",
         "MONGODB_USER": docdb_master_username,
         "MONGODB_HOST": docdb_stack.cluster.cluster_endpoint.hostname,
-    },
-    container_secrets=[
+    }
+    mongodb_secrets = [
         ServiceSecret(
             secret_name=docdb_stack.master_password_secret.secret_name,
             environment_key="MONGODB_PASS",
         )
-    ],
-    auto_scale_min_capacity=environment_variables["AUTO_SCALE_CAPACITY"]["min"],
-    auto_scale_max_capacity=environment_variables["AUTO_SCALE_CAPACITY"]["max"],
-)
-api_stack = ServiceStack(
-    scope=cdk_app,
-    construct_id=f"{stack_name_prefix}-api",
-    vpc=network_stack.vpc,
-    cluster=ecs_stack.cluster,
-    props=api_props,
-)
-api_stack.add_dependency(docdb_stack)
-api_stack.service.connections.allow_to_default_port(
-    docdb_stack.cluster,
-    "Allow API container to connect to DocumentDB cluster",
-)
+    ]
 
-app_props = ServiceProps(
-    container_name="model-ad-app",
-    container_location=f"ghcr.io/sage-bionetworks/model-ad-app:{app_version}",
-    container_port=4200,
-    container_memory_reservation=1024,
-    container_env_vars={
+    # scale the Node.js services on the event loop lag and in-flight requests they emit
+    metric_scaling = environment_variables["METRIC_SCALING"]
+    # CloudWatch extracts the metrics from the EMF logs shipped by FireLens
+    node_logging = ContainerLogging(firelens=metric_scaling)
+    # launch tasks ahead of the weekly traffic pattern
+    predictive_scaling = (
+        PredictiveScaling(**environment_variables["PREDICTIVE_SCALING"])
+        if environment_variables["PREDICTIVE_SCALING"] is not None
+        else None
+    )
+
+    api_props = ServiceProps(
+        container_name="model-ad-api",
+        container_location=f"ghcr.io/sage-bionetworks/model-ad-api:{api_version}",
+        container_port=3333,
+        container_memory_reservation=2048,
+        container_env_vars=mongodb_env_vars,
+        container_secrets=mongodb_secrets,
+        container_tracing=container_tracing,
+        # the API runs in development mode unless the environment tunes it
+        runtime_tuning=RuntimeTuning(
+            mongodb_max_connections=docdb_props.max_connections,
+            **{"node_env": "development", **environment_variables["RUNTIME_TUNING"]},
+        ),
+        # the API has a target group only when the load balancer routes `/api/*` to it
+        deployment_alarms=DeploymentAlarms(
+            service_connect_p99_latency=1000,
+            target_p99_latency=1000 if api_path_routing else None,
+            target_5xx_rate=5 if api_path_routing else None,
+        ),
+        auto_scale_min_capacity=environment_variables["AUTO_SCALE_CAPACITY"]["min"],
+        auto_scale_max_capacity=environment_variables["AUTO_SCALE_CAPACITY"]["max"],
+        predictive_scaling=predictive_scaling,
+        container_logging=node_logging,
+        scaling_metrics=(
+            get_node_scaling_metrics(in_flight_requests=100) if metric_scaling else None
+        ),
+    )
+    capacity_plan.add_service(api_props, docdb_client=True)
+    if api_path_routing:
+        # any response of the API process (i.e. a 404 on the prefix) means it is up
+        api_stack = ListenerRuleServiceStack(
+            scope=cdk_app,
+            construct_id=f"{stack_name_prefix}-api",
+            vpc=network_stack.vpc,
+            cluster=ecs_stack.cluster,
+            props=api_props,
+            listener=load_balancer_stack.https_listener,
+            priority=10,
+            path_patterns=["/api/*"],
+            health_check_path="/api/v1",
+            health_check_healthy_codes="200-499",
+        )
+    else:
+        api_stack = ServiceStack(
+            scope=cdk_app,
+            construct_id=f"{stack_name_prefix}-api",
+            vpc=network_stack.vpc,
+            cluster=ecs_stack.cluster,
+            props=api_props,
+        )
+    api_stack.add_dependency(docdb_stack)
+    dashboard_stack.add_service(api_stack, api_props)
+    api_stack.service.connections.allow_to_default_port(
+        docdb_stack.cluster,
+        "Allow API container to connect to DocumentDB cluster",
+    )
+
+    app_container_env_vars = {
         "APP_VERSION": f"{app_version}",
         "CSR_API_URL": f"https://{fully_qualified_domain_name}/api/v1",
         "SSR_API_URL": "http://model-ad-api:3333/api/v1",
         "TAG_NAME": f"model-ad/v{app_version}",
         "GOOGLE_TAG_MANAGER_ID": "GTM-K5BLKJH5",
-    },
-    auto_scale_min_capacity=environment_variables["AUTO_SCALE_CAPACITY"]["min"],
-    auto_scale_max_capacity=environment_variables["AUTO_SCALE_CAPACITY"]["max"],
-)
-app_stack = ServiceStack(
-    scope=cdk_app,
-    construct_id=f"{stack_name_prefix}-app",
-    vpc=network_stack.vpc,
-    cluster=ecs_stack.cluster,
-    props=app_props,
-)
-app_stack.add_dependency(api_stack)
-
-apex_props = ServiceProps(
-    container_name="model-ad-apex",
-    container_location=f"ghcr.io/sage-bionetworks/model-ad-apex:{apex_version}",
-    container_port=80,
-    container_memory_reservation=200,
-    container_env_vars={
-        "API_HOST": "model-ad-api",
-        "API_PORT": "3333",
-        "APP_HOST": "model-ad-app",
-        "APP_PORT": "4200",
-    },
-    auto_scale_min_capacity=environment_variables["AUTO_SCALE_CAPACITY"]["min"],
-    auto_scale_max_capacity=environment_variables["AUTO_SCALE_CAPACITY"]["max"],
-)
-apex_stack = LoadBalancedServiceStack(
-    scope=cdk_app,
-    construct_id=f"{stack_name_prefix}-apex",
-    vpc=network_stack.vpc,
-    cluster=ecs_stack.cluster,
-    props=apex_props,
-    load_balancer=load_balancer_stack.alb,
-    certificate_id=environment_variables["CERTIFICATE_ID"],
-    health_check_path="/health",
-)
-apex_stack.add_dependency(app_stack)
-apex_stack.add_dependency(api_stack)
-
-bastion_props = BastionProps(
-    key_name="agora-access",
-    instance_type=ec2.InstanceType.of(ec2.InstanceClass.T3, ec2.InstanceSize.MICRO),
-    ami_id="ami-074a6fac5773fe883",
-    ami_region="us-east-1",
-)
-bastion_stack = BastionStack(
-    scope=cdk_app,
-    construct_id=f"{stack_name_prefix}-bastion",
-    vpc=network_stack.vpc,
-    props=bastion_props,
-)
-bastion_stack.instance.connections.allow_to(
-    docdb_stack.cluster,
-    ec2.Port.tcp_range(mongodb_port, 27030),
-    "Allow bastion host to connect to DocumentDB cluster",
-)
-bastion_stack.add_dependency(docdb_stack)
+    }
+    app_location = f"ghcr.io/sage-bionetworks/model-ad-app:{app_version}"
+
+    # run the app in the apex task, apex proxies to it over localhost instead of Service Connect
+    colocate_apex_app = environment_variables["COLOCATE_APEX_APP"]
+    if not colocate_apex_app:
+        app_props = ServiceProps(
+            container_name="model-ad-app",
+            container_location=app_location,
+            container_port=4200,
+            container_memory_reservation=1024,
+            container_env_vars=app_container_env_vars,
+            container_tracing=container_tracing,
+            runtime_tuning=RuntimeTuning(**environment_variables["RUNTIME_TUNING"]),
+            container_runtime=ContainerRuntime(init_process_enabled=True),
+            deployment_alarms=DeploymentAlarms(service_connect_p99_latency=2000),
+            auto_scale_min_capacity=environment_variables["AUTO_SCALE_CAPACITY"]["min"],
+            auto_scale_max_capacity=environment_variables["AUTO_SCALE_CAPACITY"]["max"],
+            predictive_scaling=predictive_scaling,
+            container_logging=node_logging,
+            scaling_metrics=(
+                get_node_scaling_metrics(in_flight_requests=20)
+                if metric_scaling
+                else None
+            ),
+        )
+        capacity_plan.add_service(app_props)
+        app_stack = ServiceStack(
+            scope=cdk_app,
+            construct_id=f"{stack_name_prefix}-app",
+            vpc=network_stack.vpc,
+            cluster=ecs_stack.cluster,
+            props=app_props,
+        )
+        app_stack.add_dependency(api_stack)
+        dashboard_stack.add_service(app_stack, app_props)
+
+    apex_props = ServiceProps(
+        container_name="model-ad-apex",
+        container_location=f"ghcr.io/sage-bionetworks/model-ad-apex:{apex_version}",
+        container_port=80,
+        container_memory_reservation=200,
+        container_env_vars={
+            "API_HOST": "model-ad-api",
+            "API_PORT": "3333",
+            "APP_HOST": "localhost" if colocate_apex_app else "model-ad-app",
+            "APP_PORT": "4200",
+        },
+        container_tracing=container_tracing,
+        # raise the open files limit that caps the nginx worker connections
+        container_runtime=ContainerRuntime(
+            ulimits=[
+                ecs.Ulimit(
+                    name=ecs.UlimitName.NOFILE, soft_limit=131072, hard_limit=131072
+                )
+            ],
+            init_process_enabled=True,
+        ),
+        deployment_alarms=DeploymentAlarms(target_p99_latency=3000, target_5xx_rate=5),
+        auto_scale_min_capacity=environment_variables["AUTO_SCALE_CAPACITY"]["min"],
+        auto_scale_max_capacity=environment_variables["AUTO_SCALE_CAPACITY"]["max"],
+        predictive_scaling=predictive_scaling,
+        container_depends_on=(
+            {"model-ad-app": ecs.ContainerDependencyCondition.START}
+            if colocate_apex_app
+            else None
+        ),
+        additional_containers=(
+            [
+                ServiceContainer(
+                    name="model-ad-app",
+                    location=app_location,
+                    port=4200,
+                    memory_reservation=1024,
+                    env_vars=app_container_env_vars,
+                )
+            ]
+            if colocate_apex_app
+            else None
+        ),
+    )
+    capacity_plan.add_service(apex_props)
+    if api_path_routing:
+        apex_stack = ListenerRuleServiceStack(
+            scope=cdk_app,
+            construct_id=f"{stack_name_prefix}-apex",
+            vpc=network_stack.vpc,
+            cluster=ecs_stack.cluster,
+            props=apex_props,
+            listener=load_balancer_stack.https_listener,
+            priority=1000,
+            path_patterns=["/*"],
+            health_check_path="/health",
+        )
+    else:
+        apex_stack = LoadBalancedServiceStack(
+            scope=cdk_app,
+            construct_id=f"{stack_name_prefix}-apex",
+            vpc=network_stack.vpc,
+            cluster=ecs_stack.cluster,
+            props=apex_props,
+            load_balancer=load_balancer_stack.alb,
+            certificate_id=environment_variables["CERTIFICATE_ID"],
+            health_check_path="/health",
+        )
+    if not colocate_apex_app:
+        apex_stack.add_dependency(app_stack)
+    apex_stack.add_dependency(api_stack)
+    dashboard_stack.add_service(apex_stack, apex_props)
+
+    if environment_variables["LOAD_TEST"]:
+        # the load test requests all come from the NAT gateway IP, far over the per-IP rate limits
+        if environment_variables["WAF_BLOCK"]:
+            raise ValueError(
+                f"{environment} blocks requests over the WAF rate limits, it cannot be load tested"
+            )
+        load_test_props = LoadTestProps(
+            base_url=f"https://{fully_qualified_domain_name}",
+            scenarios=LOAD_TEST_SCENARIOS,
+            environment=environment,
+            metrics_namespace="ModelAD/LoadTest",
+        )
+        capacity_plan.add_task(
+            "load-test", load_test_props.task_cpu, load_test_props.task_memory
+        )
+        load_test_stack = LoadTestStack(
+            scope=cdk_app,
+            construct_id=f"{stack_name_prefix}-load-test",
+            vpc=network_stack.vpc,
+            cluster=ecs_stack.cluster,
+            props=load_test_props,
+        )
+        load_test_stack.add_dependency(apex_stack)
+
+    # create the indexes of the spec on deploy, connects like the API
+    docdb_index_props = DocdbIndexProps(
+        indexes=load_index_spec(DOCDB_INDEX_SPEC),
+        container_env_vars=mongodb_env_vars,
+        container_secrets=mongodb_secrets,
+    )
+    capacity_plan.add_task(
+        "docdb-index",
+        docdb_index_props.task_cpu,
+        docdb_index_props.task_memory,
+        docdb_connections=1,
+    )
+    docdb_index_stack = DocdbIndexStack(
+        scope=cdk_app,
+        construct_id=f"{stack_name_prefix}-docdb-index",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        docdb_cluster=docdb_stack.cluster,
+        props=docdb_index_props,
+    )
+    docdb_index_stack.add_dependency(docdb_stack)
 
-cdk_app.synth()
+    # one-shot bulk load of the data into DocumentDB, connects like the API
+    if environment_variables["DATA_LOAD_S3_PREFIX"]:
+        data_load_props = DataLoadProps(
+            source_s3_prefix=environment_variables["DATA_LOAD_S3_PREFIX"],
+            container_env_vars=mongodb_env_vars,
+            container_secrets=mongodb_secrets,
+        )
+        # each parallel mongoimport or restored collection holds a connection
+        capacity_plan.add_task(
+            "data-load",
+            data_load_props.task_cpu,
+            data_load_props.task_memory,
+            data_load_props.task_ephemeral_storage,
+            docdb_connections=data_load_props.parallelism,
+        )
+        data_load_stack = DataLoadStack(
+            scope=cdk_app,
+            construct_id=f"{stack_name_prefix}-data-load",
+            vpc=network_stack.vpc,
+            cluster=ecs_stack.cluster,
+            props=data_load_props,
+        )
+        data_load_stack.add_dependency(docdb_stack)
+        data_load_stack.security_group.connections.allow_to_default_port(
+            docdb_stack.cluster,
+            "Allow data load task to connect to DocumentDB cluster",
+        )
+
+    bastion_props = BastionProps(
+        key_name="agora-access",
+        instance_type=ec2.InstanceType.of(ec2.InstanceClass.T3, ec2.InstanceSize.MICRO),
+        ami_id="ami-074a6fac5773fe883",
+        ami_region="us-east-1",
+    )
+    bastion_stack = BastionStack(
+        scope=cdk_app,
+        construct_id=f"{stack_name_prefix}-bastion",
+        vpc=network_stack.vpc,
+        props=bastion_props,
+    )
+    bastion_stack.instance.connections.allow_to(
+        docdb_stack.cluster,
+        ec2.Port.tcp_range(mongodb_port, 27030),
+        "Allow bastion host to connect to DocumentDB cluster",
+    )
+    bastion_stack.add_dependency(docdb_stack)
+
+    return cdk_app
+
+
+if __name__ == "__main__":
+    environment = environ.get("ENV")
+    image_versions = get_image_versions(
+        get_environment_variables(environment)["GHCR_PACKAGE_VERSION"]
+    )
+    print(
+        "Using images: "
+        + ", ".join(f"{name}:{version}" for name, version in image_versions.items())
+    )
+    build_app(environment, image_versions).synth()
@@ -0,0 +1,163 @@
+import aws_cdk as cdk
+
+from aws_cdk import Duration as duration
+from aws_cdk import aws_cloudwatch as cloudwatch
+
+from constructs import Construct
+
+from src.service_props import ServiceProps
+from src.service_stack import ServiceStack, _scaling_metric
+
+
+def _search(
+    schema: str, metric_name: str, statistic: str, search_terms: str
+) -> cloudwatch.MathExpression:
+    """Search the one minute metrics of a schema, labeled with their statistic"""
+    return cloudwatch.MathExpression(
+        expression=(
+            f"SEARCH('{{{schema}}} MetricName=\"{metric_name}\" {search_terms}', "
+            f"'{statistic}', 60)"
+        ),
+        using_metrics={},
+        label=f"{metric_name} {statistic}",
+        period=duration.minutes(1),
+    )
+
+
+class DashboardStack(cdk.Stack):
+    """
+    CloudWatch dashboard shared by the services of an environment
+
+    The widgets search the metrics by the names the service stacks are deployed with instead of
+    referencing the services, a reference would export the service and target group names from
+    the service stacks and block their replacement.
+    """
+
+    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        self.dashboard = cloudwatch.Dashboard(
+            self,
+            "Dashboard",
+            dashboard_name=construct_id,
+        )
+
+    def add_service(self, service_stack: ServiceStack, props: ServiceProps) -> None:
+        """Add the saturation, Service Connect and load balancer widgets of a service"""
+        name = props.container_name
+        # CloudFormation names the service after its stack, the search matches the stack name
+        # as a partial term of the generated name
+        service_terms = f"ServiceName={service_stack.stack_name}"
+        service_connect_terms = f'{service_terms} DiscoveryName="{name}"'
+
+        self.dashboard.add_widgets(
+            cloudwatch.TextWidget(markdown=f"## {name}", width=24, height=1)
+        )
+        self.dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title=f"{name} CPU and memory utilization",
+                left=[
+                    _search(
+                        "AWS/ECS,ClusterName,ServiceName",
+                        metric_name,
+                        "Average",
+                        service_terms,
+                    )
+                    for metric_name in ("CPUUtilization", "MemoryUtilization")
+                ],
+                left_y_axis=cloudwatch.YAxisProps(min=0, max=100),
+            ),
+            cloudwatch.GraphWidget(
+                title=f"{name} running and desired tasks",
+                left=[
+                    _search(
+                        "ECS/ContainerInsights,ClusterName,ServiceName",
+                        metric_name,
+                        "Average",
+                        service_terms,
+                    )
+                    for metric_name in ("RunningTaskCount", "DesiredTaskCount")
+                ],
+            ),
+            cloudwatch.GraphWidget(
+                title=f"{name} Service Connect latency",
+                left=[
+                    _search(
+                        "AWS/ECS,ClusterName,DiscoveryName,ServiceName",
+                        "TargetResponseTime",
+                        statistic,
+                        service_connect_terms,
+                    )
+                    for statistic in ("p50", "p99")
+                ],
+            ),
+            cloudwatch.GraphWidget(
+                title=f"{name} Service Connect errors",
+                left=[
+                    _search(
+                        "AWS/ECS,ClusterName,DiscoveryName,ServiceName",
+                        "HTTPCode_Target_5XX_Count",
+                        "Sum",
+                        service_connect_terms,
+                    )
+                ],
+                right=[
+                    _search(
+                        "AWS/ECS,ClusterName,DiscoveryName,ServiceName",
+                        "RequestCount",
+                        "Sum",
+                        service_connect_terms,
+                    )
+                ],
+            ),
+        )
+
+        if service_stack.target_group_name is not None:
+            # the target group dimension is `targetgroup/<name>/<id>`, its name is set explicitly
+            target_group_terms = f"TargetGroup={service_stack.target_group_name}"
+            self.dashboard.add_widgets(
+                cloudwatch.GraphWidget(
+                    title=f"{name} ALB target response time",
+                    left=[
+                        _search(
+                            "AWS/ApplicationELB,LoadBalancer,TargetGroup",
+                            "TargetResponseTime",
+                            statistic,
+                            target_group_terms,
+                        )
+                        for statistic in ("p50", "p95", "p99")
+                    ],
+                    width=12,
+                ),
+                cloudwatch.GraphWidget(
+                    title=f"{name} ALB 5xx responses",
+                    left=[
+                        _search(
+                            "AWS/ApplicationELB,LoadBalancer,TargetGroup",
+                            "HTTPCode_Target_5XX_Count",
+                            "Sum",
+                            target_group_terms,
+                        )
+                    ],
+                    right=[
+                        _search(
+                            "AWS/ApplicationELB,LoadBalancer,TargetGroup",
+                            "RequestCount",
+                            "Sum",
+                            target_group_terms,
+                        )
+                    ],
+                    width=12,
+                ),
+            )
+
+        if props.scaling_metrics:
+            self.dashboard.add_widgets(
+                *[
+                    cloudwatch.GraphWidget(
+                        title=f"{name} {scaling_metric.metric_name}",
+                        left=[_scaling_metric(scaling_metric, name)],
+                    )
+                    for scaling_metric in props.scaling_metrics
+                ]
+            )
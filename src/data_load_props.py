@@ -0,0 +1,70 @@
+from typing import List
+
+from src.service_props import ServiceSecret
+
+
+class DataLoadProps:
+    """
+    Bulk data load task properties
+
+    source_s3_prefix: the S3 prefix (i.e. s3://bucket/model-ad/v1/) of the data to load, `*.json` and `*.csv`
+      files are imported into the collection named after the file, a `dump` directory is restored
+    parallelism: the number of files imported, or collections restored, at the same time
+    batch_size: the number of documents sent to DocumentDB in each insert batch
+    drop: drop each collection before loading it
+    json_array: the `*.json` files hold a JSON array of documents, otherwise one document per line
+    container_env_vars: a json dictionary of environment variables to pass into the loader container,
+      the loader connects with `MONGODB_HOST`, `MONGODB_PORT`, `MONGODB_NAME`, `MONGODB_USER` and `MONGODB_PASS`
+    container_secrets: List of `ServiceSecret` resources to pull from AWS secrets manager
+    task_cpu: the number of cpu units used by the task, 1024 is one vCPU
+    task_memory: the amount of memory in MiB used by the task
+    task_ephemeral_storage: the size in GiB (21 to 200) of the task ephemeral storage the data is downloaded to
+    mongo_tools_image: the image with the `mongoimport` and `mongorestore` tools
+    aws_cli_image: the image with the AWS CLI used to download the data
+    """
+
+    def __init__(
+        self,
+        source_s3_prefix: str,
+        parallelism: int = 4,
+        batch_size: int = 1000,
+        drop: bool = True,
+        json_array: bool = True,
+        container_env_vars: dict = None,
+        container_secrets: List[ServiceSecret] = None,
+        task_cpu: int = 4096,
+        task_memory: int = 8192,
+        task_ephemeral_storage: int = 100,
+        mongo_tools_image: str = "public.ecr.aws/docker/library/mongo:7.0.14",
+        aws_cli_image: str = "public.ecr.aws/aws-cli/aws-cli:2.17.0",
+    ) -> None:
+        if not source_s3_prefix.startswith("s3://"):
+            raise ValueError(
+                f"source_s3_prefix must be an s3:// URI, got {source_s3_prefix}"
+            )
+        if parallelism < 1 or batch_size < 1:
+            raise ValueError("parallelism and batch_size must be at least 1")
+        self.source_s3_prefix = source_s3_prefix
+        self.source_bucket_name, _, self.source_key_prefix = (
+            source_s3_prefix.removeprefix("s3://").partition("/")
+        )
+        self.parallelism = parallelism
+        self.batch_size = batch_size
+        self.drop = drop
+        self.json_array = json_array
+
+        if container_env_vars is None:
+            self.container_env_vars = {}
+        else:
+            self.container_env_vars = container_env_vars
+
+        if container_secrets is None:
+            self.container_secrets = []
+        else:
+            self.container_secrets = container_secrets
+
+        self.task_cpu = task_cpu
+        self.task_memory = task_memory
+        self.task_ephemeral_storage = task_ephemeral_storage
+        self.mongo_tools_image = mongo_tools_image
+        self.aws_cli_image = aws_cli_image
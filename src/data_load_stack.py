@@ -0,0 +1,122 @@
+from aws_cdk import (
+    aws_ec2 as ec2,
+    aws_ecs as ecs,
+    aws_s3 as s3,
+)
+
+from constructs import Construct
+
+from src.data_load_props import DataLoadProps
+from src.one_off_task_stack import OneOffTaskStack
+from src.service_stack import _container_secrets
+
+DATA_PATH = "/data"
+
+# the number of concurrent S3 requests of the AWS CLI while downloading the data
+S3_MAX_CONCURRENT_REQUESTS = 32
+
+# a `dump` directory is restored with parallel collections, each `*.json` and `*.csv` file is
+# imported into the collection named after the file with `parallelism` imports at the same time
+DATA_LOAD_SCRIPT = r"""set -euo pipefail
+export MONGODB_URI="mongodb://${MONGODB_USER}:${MONGODB_PASS}@${MONGODB_HOST}:${MONGODB_PORT}/?retryWrites=false"
+cd "${DATA_PATH}"
+
+if [ -d dump ]; then
+  mongorestore --uri "${MONGODB_URI}" --nsInclude "${MONGODB_NAME}.*" \
+    --numParallelCollections "${LOAD_PARALLELISM}" --batchSize "${LOAD_BATCH_SIZE}" \
+    ${LOAD_DROP:+--drop} dump
+fi
+
+import_file() {
+  file="${1#./}"
+  case "${file}" in
+    *.csv) format="--type=csv --headerline" ;;
+    *) format="--type=json ${LOAD_JSON_ARRAY:+--jsonArray}" ;;
+  esac
+  echo "Importing ${file}"
+  mongoimport --uri "${MONGODB_URI}" --db "${MONGODB_NAME}" --collection "${file%.*}" \
+    --batchSize "${LOAD_BATCH_SIZE}" ${LOAD_DROP:+--drop} ${format} --file "${file}"
+}
+export -f import_file
+
+find . -maxdepth 1 -type f \( -name '*.json' -o -name '*.csv' \) -print0 \
+  | xargs -0 -r -P "${LOAD_PARALLELISM}" -I {} bash -c 'import_file "$1"' _ {}
+"""
+
+
+class DataLoadStack(OneOffTaskStack):
+    """
+    One-shot bulk data load task into DocumentDB, started with `aws ecs run-task`
+
+    The data is downloaded from S3 to the task ephemeral storage, then loaded with parallel
+    `mongorestore` / `mongoimport` runs. Allow `security_group` to connect to the cluster.
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        vpc: ec2.Vpc,
+        cluster: ecs.Cluster,
+        props: DataLoadProps,
+        **kwargs,
+    ) -> None:
+        super().__init__(
+            scope,
+            construct_id,
+            vpc,
+            cluster,
+            description="Data load task",
+            task_cpu=props.task_cpu,
+            task_memory=props.task_memory,
+            task_ephemeral_storage=props.task_ephemeral_storage,
+            **kwargs,
+        )
+
+        source_bucket = s3.Bucket.from_bucket_name(
+            self, "SourceBucket", props.source_bucket_name
+        )
+        source_bucket.grant_read(
+            self.task_definition.task_role, f"{props.source_key_prefix}*"
+        )
+
+        self.task_definition.add_volume(name="data")
+        data_mount_point = ecs.MountPoint(
+            container_path=DATA_PATH, source_volume="data", read_only=False
+        )
+
+        download_container = self.task_definition.add_container(
+            "download",
+            image=ecs.ContainerImage.from_registry(props.aws_cli_image),
+            entry_point=["sh", "-c"],
+            command=[
+                f"aws configure set default.s3.max_concurrent_requests {S3_MAX_CONCURRENT_REQUESTS} && "
+                f"aws s3 sync --only-show-errors {props.source_s3_prefix} {DATA_PATH}"
+            ],
+            essential=False,
+            logging=self.task_log_driver(),
+        )
+        download_container.add_mount_points(data_mount_point)
+
+        self.container = self.task_definition.add_container(
+            "data-load",
+            image=ecs.ContainerImage.from_registry(props.mongo_tools_image),
+            command=["bash", "-c", DATA_LOAD_SCRIPT],
+            environment={
+                **props.container_env_vars,
+                "DATA_PATH": DATA_PATH,
+                "LOAD_PARALLELISM": str(props.parallelism),
+                "LOAD_BATCH_SIZE": str(props.batch_size),
+                "LOAD_DROP": "true" if props.drop else "",
+                "LOAD_JSON_ARRAY": "true" if props.json_array else "",
+            },
+            secrets=_container_secrets(self, "sm-secrets-", props.container_secrets),
+            logging=self.task_log_driver(),
+        )
+        self.container.add_mount_points(data_mount_point)
+        self.container.add_container_dependencies(
+            ecs.ContainerDependency(
+                container=download_container,
+                condition=ecs.ContainerDependencyCondition.SUCCESS,
+            )
+        )
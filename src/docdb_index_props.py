@@ -0,0 +1,170 @@
+import json
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+from src.service_props import ServiceSecret
+
+# https://docs.aws.amazon.com/documentdb/latest/developerguide/limits.html
+DOCDB_MAX_INDEXES_PER_COLLECTION = 64
+DOCDB_MAX_COMPOUND_INDEX_KEYS = 32
+DOCDB_INDEX_KEY_TYPES = [1, -1, "2dsphere", "text"]
+COLLECTION_NAME_PATTERN = re.compile(r"^(?!system\.)[^$\x00]+$")
+
+
+@dataclass
+class DocdbIndex:
+    """
+    Holds onto an index of a DocumentDB collection.
+
+    Attributes:
+      collection: The name of the collection.
+      keys: The indexed fields in order, 1 or -1 for the sort order (i.e. {"name": 1, "tissue": -1}).
+      name: Optional name of the index, defaults to the MongoDB name derived from the keys (i.e. "name_1_tissue_-1").
+      unique: Reject documents with the same values of the keys.
+      sparse: Only index the documents with the keys.
+      expire_after_seconds: Rejected, the TTL monitor of the cluster is disabled so a TTL index would never
+        delete documents.
+    """
+
+    collection: str
+    """The name of the collection."""
+
+    keys: Dict[str, Union[int, str]]
+    """The indexed fields in order, 1 or -1 for the sort order (i.e. {"name": 1, "tissue": -1})."""
+
+    name: Optional[str] = None
+    """Optional name of the index, defaults to the MongoDB name derived from the keys (i.e. "name_1_tissue_-1")."""
+
+    unique: bool = False
+    """Reject documents with the same values of the keys."""
+
+    sparse: bool = False
+    """Only index the documents with the keys."""
+
+    expire_after_seconds: Optional[int] = None
+    """Rejected, the TTL monitor of the cluster is disabled so a TTL index would never delete documents."""
+
+    def __post_init__(self) -> None:
+        if not COLLECTION_NAME_PATTERN.match(self.collection):
+            raise ValueError(f"Invalid DocumentDB collection name {self.collection}")
+        if not self.keys:
+            raise ValueError(f"Index of collection {self.collection} has no keys")
+        if len(self.keys) > DOCDB_MAX_COMPOUND_INDEX_KEYS:
+            raise ValueError(
+                f"Index of collection {self.collection} has more than "
+                f"{DOCDB_MAX_COMPOUND_INDEX_KEYS} keys"
+            )
+        for field_name, key_type in self.keys.items():
+            if not field_name or field_name.startswith("$"):
+                raise ValueError(
+                    f"Invalid field {field_name} in an index of collection {self.collection}"
+                )
+            if key_type not in DOCDB_INDEX_KEY_TYPES:
+                raise ValueError(
+                    f"Invalid type {key_type} of field {field_name} in an index of collection "
+                    f"{self.collection}, must be one of {DOCDB_INDEX_KEY_TYPES}"
+                )
+        if self.expire_after_seconds is not None:
+            # `ttl_monitor` is disabled in the cluster parameter group of `DocdbStack`
+            raise ValueError(
+                f"TTL index of collection {self.collection} would never expire documents, "
+                "the DocumentDB TTL monitor is disabled"
+            )
+        if self.name is None:
+            self.name = "_".join(
+                f"{field_name}_{key_type}" for field_name, key_type in self.keys.items()
+            )
+
+    def options(self) -> dict:
+        """The `createIndex` options of the index"""
+        options = {"name": self.name}
+        if self.unique:
+            options["unique"] = True
+        if self.sparse:
+            options["sparse"] = True
+        return options
+
+
+def load_index_spec(path: str) -> List[DocdbIndex]:
+    """
+    Load the indexes of an index spec file, a JSON object of the indexes of each collection
+
+    i.e. {"genes": [{"keys": {"ensembl_gene_id": 1}, "unique": true}]}
+    """
+    with open(path) as spec_json:
+        spec = json.load(spec_json)
+    return [
+        DocdbIndex(collection=collection, **index)
+        for collection, indexes in spec.items()
+        for index in indexes
+    ]
+
+
+class DocdbIndexProps:
+    """
+    DocumentDB index task properties
+
+    indexes: List of `DocdbIndex` the collections must have, i.e. loaded with `load_index_spec`
+    container_env_vars: a json dictionary of environment variables to pass into the index container,
+      the container connects with `MONGODB_HOST`, `MONGODB_PORT`, `MONGODB_NAME`, `MONGODB_USER` and `MONGODB_PASS`
+    container_secrets: List of `ServiceSecret` resources to pull from AWS secrets manager
+    apply_on_deploy: run the task when a deploy changes the indexes
+    task_cpu: the number of cpu units used by the task, 1024 is one vCPU
+    task_memory: the amount of memory in MiB used by the task
+    mongo_shell_image: the image with the `mongosh` shell
+    """
+
+    def __init__(
+        self,
+        indexes: List[DocdbIndex],
+        container_env_vars: dict = None,
+        container_secrets: List[ServiceSecret] = None,
+        apply_on_deploy: bool = True,
+        task_cpu: int = 256,
+        task_memory: int = 512,
+        mongo_shell_image: str = "public.ecr.aws/docker/library/mongo:7.0.14",
+    ) -> None:
+        collections: Dict[str, List[DocdbIndex]] = {}
+        for index in indexes:
+            collections.setdefault(index.collection, []).append(index)
+        for collection, collection_indexes in collections.items():
+            names = [index.name for index in collection_indexes]
+            keys = [
+                json.dumps(list(index.keys.items())) for index in collection_indexes
+            ]
+            if len(set(names)) != len(names) or len(set(keys)) != len(keys):
+                raise ValueError(
+                    f"Duplicate index names or keys in collection {collection}: {names}"
+                )
+            # the _id index counts towards the limit
+            if len(collection_indexes) >= DOCDB_MAX_INDEXES_PER_COLLECTION:
+                raise ValueError(
+                    f"Collection {collection} has more than "
+                    f"{DOCDB_MAX_INDEXES_PER_COLLECTION} indexes"
+                )
+        self.indexes = indexes
+
+        if container_env_vars is None:
+            self.container_env_vars = {}
+        else:
+            self.container_env_vars = container_env_vars
+
+        if container_secrets is None:
+            self.container_secrets = []
+        else:
+            self.container_secrets = container_secrets
+
+        self.apply_on_deploy = apply_on_deploy
+        self.task_cpu = task_cpu
+        self.task_memory = task_memory
+        self.mongo_shell_image = mongo_shell_image
+
+    def index_spec(self) -> dict:
+        """The indexes of each collection passed to the index script"""
+        spec: Dict[str, list] = {}
+        for index in self.indexes:
+            spec.setdefault(index.collection, []).append(
+                {"keys": index.keys, "options": index.options()}
+            )
+        return spec
@@ -0,0 +1,118 @@
+import hashlib
+import json
+
+from aws_cdk import (
+    aws_docdb as docdb,
+    aws_ec2 as ec2,
+    aws_ecs as ecs,
+)
+
+from constructs import Construct
+
+from src.docdb_index_props import DocdbIndexProps
+from src.one_off_task_stack import OneOffTaskStack
+from src.service_stack import _container_secrets
+
+# create the missing indexes in the background, then report the missing collections, the indexes
+# that are not in the spec and the indexes without any access since the instance started
+INDEX_SCRIPT = r"""const spec = JSON.parse(process.env.INDEX_SPEC);
+const reportOnly = process.env.INDEX_REPORT_ONLY === "true";
+const database = db.getSiblingDB(process.env.MONGODB_NAME);
+const collectionNames = new Set(database.getCollectionNames());
+const keysId = (keys) => JSON.stringify(Object.entries(keys));
+
+for (const [collectionName, indexes] of Object.entries(spec)) {
+  if (!collectionNames.has(collectionName)) {
+    print(`MISSING COLLECTION ${collectionName}`);
+    continue;
+  }
+  const collection = database.getCollection(collectionName);
+  const existingKeys = new Set(collection.getIndexes().map((index) => keysId(index.key)));
+  for (const index of indexes) {
+    if (existingKeys.has(keysId(index.keys))) {
+      continue;
+    }
+    if (reportOnly) {
+      print(`MISSING INDEX ${collectionName}.${index.options.name}`);
+      continue;
+    }
+    print(`CREATE INDEX ${collectionName}.${index.options.name}`);
+    collection.createIndex(index.keys, { ...index.options, background: true });
+  }
+
+  const specKeys = new Set(indexes.map((index) => keysId(index.keys)));
+  for (const stats of collection.aggregate([{ $indexStats: {} }]).toArray()) {
+    if (stats.name === "_id_") {
+      continue;
+    }
+    if (!specKeys.has(keysId(stats.key))) {
+      print(`UNMANAGED INDEX ${collectionName}.${stats.name}`);
+    }
+    if (Number(stats.accesses.ops) === 0) {
+      print(`UNUSED INDEX ${collectionName}.${stats.name} since ${stats.accesses.since}`);
+    }
+  }
+}
+"""
+
+
+class DocdbIndexStack(OneOffTaskStack):
+    """
+    DocumentDB index task, creates the indexes of the spec that are missing and reports the
+    missing and unused ones in its logs.
+
+    The task is started on deploy when the indexes change, once it is allowed to connect to the
+    `docdb_cluster`, and can be started again with `aws ecs run-task` (set `INDEX_REPORT_ONLY=true`
+    to only report).
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        vpc: ec2.Vpc,
+        cluster: ecs.Cluster,
+        docdb_cluster: docdb.IDatabaseCluster,
+        props: DocdbIndexProps,
+        **kwargs,
+    ) -> None:
+        super().__init__(
+            scope,
+            construct_id,
+            vpc,
+            cluster,
+            description="DocumentDB index task",
+            task_cpu=props.task_cpu,
+            task_memory=props.task_memory,
+            **kwargs,
+        )
+
+        self.index_spec = json.dumps(props.index_spec(), sort_keys=True)
+        self.container = self.task_definition.add_container(
+            "docdb-index",
+            image=ecs.ContainerImage.from_registry(props.mongo_shell_image),
+            entry_point=["bash", "-c"],
+            command=[
+                'printf "%s" "${INDEX_SCRIPT}" > /tmp/indexes.js && mongosh --quiet '
+                '"mongodb://${MONGODB_USER}:${MONGODB_PASS}@${MONGODB_HOST}:${MONGODB_PORT}/?retryWrites=false" '
+                "--file /tmp/indexes.js"
+            ],
+            environment={
+                **props.container_env_vars,
+                "INDEX_SCRIPT": INDEX_SCRIPT,
+                "INDEX_SPEC": self.index_spec,
+                "INDEX_REPORT_ONLY": "",
+            },
+            secrets=_container_secrets(self, "sm-secrets-", props.container_secrets),
+            logging=self.task_log_driver(),
+        )
+
+        self.security_group.connections.allow_to_default_port(
+            docdb_cluster,
+            "Allow DocumentDB index task to connect to DocumentDB cluster",
+        )
+
+        if props.apply_on_deploy:
+            self.run_task = self.run_on_deploy(
+                hashlib.sha256(self.index_spec.encode()).hexdigest()
+            )
@@ -1,5 +1,29 @@
+from typing import Optional
+
 from aws_cdk import aws_ec2 as ec2
 
+# maximum number of connections to a DocumentDB instance by instance type
+# https://docs.aws.amazon.com/documentdb/latest/developerguide/limits.html#limits.instance
+DOCDB_MAX_CONNECTIONS = {
+    "t3.medium": 500,
+    "t4g.medium": 500,
+    "r5.large": 1700,
+    "r5.xlarge": 3500,
+    "r5.2xlarge": 7000,
+    "r5.4xlarge": 14000,
+    "r5.8xlarge": 28000,
+    "r5.12xlarge": 30000,
+    "r5.16xlarge": 30000,
+    "r5.24xlarge": 30000,
+    "r6g.large": 1700,
+    "r6g.xlarge": 3500,
+    "r6g.2xlarge": 7000,
+    "r6g.4xlarge": 14000,
+    "r6g.8xlarge": 28000,
+    "r6g.12xlarge": 30000,
+    "r6g.16xlarge": 30000,
+}
+
 
 class DocdbProps:
     """
@@ -8,11 +32,28 @@ class DocdbProps:
     instance_type: What type of instance to start for the replicas
     master_username: The database admin account username
     port: The MongoDB port
+    max_connections: Optional maximum number of connections to an instance, defaults to the
+      DocumentDB limit of the instance type
     """
 
     def __init__(
-        self, instance_type: ec2.InstanceType, master_username: str, port: int
+        self,
+        instance_type: ec2.InstanceType,
+        master_username: str,
+        port: int,
+        max_connections: Optional[int] = None,
     ) -> None:
         self.instance_type = instance_type
         self.master_username = master_username
         self.port = port
+
+        if max_connections is None:
+            instance_type_name = instance_type.to_string()
+            if instance_type_name not in DOCDB_MAX_CONNECTIONS:
+                raise ValueError(
+                    f"Unknown connection limit of DocumentDB instance type {instance_type_name}, "
+                    "set max_connections"
+                )
+            self.max_connections = DOCDB_MAX_CONNECTIONS[instance_type_name]
+        else:
+            self.max_connections = max_connections
@@ -6,11 +6,15 @@ from aws_cdk import (
 )
 
 from constructs import Construct
+from typing import Optional
 
 
 class EcsStack(cdk.Stack):
     """
     ECS cluster
+
+    container_insights: Optional CloudWatch Container Insights mode for the cluster
+      (i.e. `ecs.ContainerInsights.ENHANCED` for enhanced observability)
     """
 
     def __init__(
@@ -19,6 +23,7 @@ class EcsStack(cdk.Stack):
         construct_id: str,
         vpc: ec2.Vpc,
         namespace: str,
+        container_insights: Optional[ecs.ContainerInsights] = None,
         **kwargs
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
@@ -31,4 +36,5 @@ class EcsStack(cdk.Stack):
                 name=namespace,
                 use_for_service_connect=True,
             ),
+            container_insights_v2=container_insights,
         )
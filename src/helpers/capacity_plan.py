@@ -0,0 +1,308 @@
+"""
+Plan the capacity of an environment at synth time.
+
+The plan sums the tasks, vCPUs and memory of the services at their auto scaling maximum
+capacity, estimates their monthly cost and the DocumentDB connections they open, then fails
+the synth when the configuration over-commits:
+
+  - the container memory reservations exceed the task memory,
+  - the Node.js heap (`--max-old-space-size`) does not fit in the memory left by the sidecars,
+  - the task cpu and memory are not a Fargate combination,
+  - the connection pools of the tasks exceed the DocumentDB connection limit.
+
+The report is written to `capacity-plan.md` in the cloud assembly directory, i.e. `cdk.out`.
+"""
+
+import math
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import constructs
+import jsii
+
+from src.docdb_props import DocdbProps
+from src.service_props import ServiceProps
+
+REPORT_FILE_NAME = "capacity-plan.md"
+HOURS_PER_MONTH = 730
+# on-demand us-east-1 prices in USD, an estimate to compare configurations rather than a bill
+FARGATE_VCPU_HOUR = 0.04048
+FARGATE_GB_HOUR = 0.004445
+FARGATE_EPHEMERAL_STORAGE_GB_HOUR = 0.000111
+FARGATE_INCLUDED_EPHEMERAL_STORAGE = 20
+DOCDB_INSTANCE_HOUR = {
+    "t3.medium": 0.078,
+    "t4g.medium": 0.073,
+    "r5.large": 0.277,
+    "r5.xlarge": 0.554,
+    "r5.2xlarge": 1.108,
+    "r6g.large": 0.249,
+    "r6g.xlarge": 0.498,
+    "r6g.2xlarge": 0.996,
+}
+# the memory (MiB) range and step of each Fargate task cpu
+FARGATE_TASK_MEMORY = {
+    256: (512, 2048, 512),
+    512: (1024, 4096, 1024),
+    1024: (2048, 8192, 1024),
+    2048: (4096, 16384, 1024),
+    4096: (8192, 30720, 1024),
+    8192: (16384, 61440, 4096),
+    16384: (32768, 122880, 8192),
+}
+# the MongoDB Node.js driver pool size when `MONGODB_MAX_POOL_SIZE` is not set
+MONGODB_DEFAULT_POOL_SIZE = 100
+MAX_OLD_SPACE_SIZE_PATTERN = re.compile(r"--max-old-space-size=(\d+)")
+
+
+@dataclass
+class TaskPlan:
+    """The capacity of a service, or of a one-off task, at its peak"""
+
+    name: str
+    task_cpu: int
+    task_memory: int
+    task_ephemeral_storage: int
+    peak_tasks: int
+    min_tasks: int
+    docdb_connections_per_task: int = 0
+    one_off: bool = False
+
+    @property
+    def peak_vcpu(self) -> float:
+        return self.task_cpu / 1024 * self.peak_tasks
+
+    @property
+    def peak_memory_gib(self) -> float:
+        return self.task_memory / 1024 * self.peak_tasks
+
+    @property
+    def peak_docdb_connections(self) -> int:
+        return self.docdb_connections_per_task * self.peak_tasks
+
+    def hourly_cost(self, tasks: int) -> float:
+        """The Fargate cost of running the tasks for an hour"""
+        extra_storage = max(
+            0, self.task_ephemeral_storage - FARGATE_INCLUDED_EPHEMERAL_STORAGE
+        )
+        return tasks * (
+            self.task_cpu / 1024 * FARGATE_VCPU_HOUR
+            + self.task_memory / 1024 * FARGATE_GB_HOUR
+            + extra_storage * FARGATE_EPHEMERAL_STORAGE_GB_HOUR
+        )
+
+
+def get_fargate_error(name: str, task_cpu: int, task_memory: int) -> Optional[str]:
+    """Check the task cpu and memory are a Fargate combination"""
+    if task_cpu not in FARGATE_TASK_MEMORY:
+        return (
+            f"{name}: task cpu {task_cpu} is not one of {sorted(FARGATE_TASK_MEMORY)}"
+        )
+    low, high, step = FARGATE_TASK_MEMORY[task_cpu]
+    if not low <= task_memory <= high or (task_memory - low) % step:
+        return (
+            f"{name}: task memory {task_memory} MiB is not between {low} and {high} MiB "
+            f"in {step} MiB steps for task cpu {task_cpu}"
+        )
+    return None
+
+
+def get_memory_errors(props: ServiceProps) -> List[str]:
+    """Check the containers, and the heap of the main container, fit in the task memory"""
+    sidecar_memory = sum(
+        container.memory_reservation for container in props.additional_containers
+    )
+    if props.container_tracing is not None:
+        sidecar_memory += props.container_tracing.memory_reservation
+    if props.container_logging.firelens:
+        sidecar_memory += props.container_logging.firelens_memory_reservation
+
+    errors = []
+    reserved_memory = props.container_memory_reservation + sidecar_memory
+    if reserved_memory > props.task_memory:
+        errors.append(
+            f"{props.container_name}: the containers reserve {reserved_memory} MiB "
+            f"of the {props.task_memory} MiB task memory"
+        )
+    heap = MAX_OLD_SPACE_SIZE_PATTERN.search(
+        props.container_env_vars.get("NODE_OPTIONS", "")
+    )
+    if heap is not None and int(heap.group(1)) > props.task_memory - sidecar_memory:
+        errors.append(
+            f"{props.container_name}: the {heap.group(1)} MiB heap does not fit in the "
+            f"{props.task_memory - sidecar_memory} MiB left by the sidecars"
+        )
+    return errors
+
+
+def get_peak_tasks(props: ServiceProps) -> int:
+    """The most tasks of a service, estimated from the buffer when predictive scaling raises the maximum"""
+    predictive_scaling = props.predictive_scaling
+    if (
+        predictive_scaling is not None
+        and predictive_scaling.max_capacity_breach_behavior == "IncreaseMaxCapacity"
+    ):
+        buffer = predictive_scaling.max_capacity_buffer or 0
+        return math.ceil(props.auto_scale_max_capacity * (1 + buffer / 100))
+    return props.auto_scale_max_capacity
+
+
+@jsii.implements(constructs.IValidation)
+class CapacityPlan:
+    """
+    Capacity plan of an environment, validated when the app is synthesized
+
+    i.e. `cdk_app.node.add_validation(capacity_plan)` after adding the services
+    """
+
+    def __init__(
+        self,
+        environment: str,
+        outdir: str,
+        docdb_props: Optional[DocdbProps] = None,
+    ) -> None:
+        self.environment = environment
+        self.outdir = outdir
+        self.docdb_props = docdb_props
+        self.tasks: List[TaskPlan] = []
+        self.errors: List[str] = []
+
+    def add_service(self, props: ServiceProps, docdb_client: bool = False) -> None:
+        """Plan a service at its peak, the DocumentDB clients open a connection pool per task"""
+        connections = 0
+        if docdb_client:
+            connections = int(
+                props.container_env_vars.get(
+                    "MONGODB_MAX_POOL_SIZE", MONGODB_DEFAULT_POOL_SIZE
+                )
+            )
+        self.tasks.append(
+            TaskPlan(
+                name=props.container_name,
+                task_cpu=props.task_cpu,
+                task_memory=props.task_memory,
+                task_ephemeral_storage=props.task_ephemeral_storage
+                or FARGATE_INCLUDED_EPHEMERAL_STORAGE,
+                peak_tasks=get_peak_tasks(props),
+                min_tasks=props.auto_scale_min_capacity,
+                docdb_connections_per_task=connections,
+            )
+        )
+        fargate_error = get_fargate_error(
+            props.container_name, props.task_cpu, props.task_memory
+        )
+        if fargate_error is not None:
+            self.errors.append(fargate_error)
+        self.errors.extend(get_memory_errors(props))
+
+    def add_task(
+        self,
+        name: str,
+        task_cpu: int,
+        task_memory: int,
+        task_ephemeral_storage: int = FARGATE_INCLUDED_EPHEMERAL_STORAGE,
+        docdb_connections: int = 0,
+    ) -> None:
+        """Plan a one-off task, it may run next to the services at their peak"""
+        self.tasks.append(
+            TaskPlan(
+                name=name,
+                task_cpu=task_cpu,
+                task_memory=task_memory,
+                task_ephemeral_storage=task_ephemeral_storage,
+                peak_tasks=1,
+                min_tasks=0,
+                docdb_connections_per_task=docdb_connections,
+                one_off=True,
+            )
+        )
+        fargate_error = get_fargate_error(name, task_cpu, task_memory)
+        if fargate_error is not None:
+            self.errors.append(fargate_error)
+
+    def get_totals(self) -> Dict[str, float]:
+        """Sum the peak capacity and the monthly cost of the services"""
+        services = [task for task in self.tasks if not task.one_off]
+        totals = {
+            "peak_tasks": sum(task.peak_tasks for task in services),
+            "peak_vcpu": sum(task.peak_vcpu for task in services),
+            "peak_memory_gib": sum(task.peak_memory_gib for task in services),
+            "monthly_cost_min": HOURS_PER_MONTH
+            * sum(task.hourly_cost(task.min_tasks) for task in services),
+            "monthly_cost_peak": HOURS_PER_MONTH
+            * sum(task.hourly_cost(task.peak_tasks) for task in services),
+            "docdb_connections": sum(
+                task.peak_docdb_connections for task in self.tasks
+            ),
+        }
+        if self.docdb_props is not None:
+            instance_hour = DOCDB_INSTANCE_HOUR.get(
+                self.docdb_props.instance_type.to_string()
+            )
+            if instance_hour is not None:
+                totals["monthly_cost_min"] += HOURS_PER_MONTH * instance_hour
+                totals["monthly_cost_peak"] += HOURS_PER_MONTH * instance_hour
+        return totals
+
+    def get_docdb_errors(self) -> List[str]:
+        """Check the connection pools of the tasks at their peak fit in the DocumentDB limit"""
+        if self.docdb_props is None:
+            return []
+        connections = self.get_totals()["docdb_connections"]
+        if connections <= self.docdb_props.max_connections:
+            return []
+        clients = ", ".join(
+            f"{task.name} {task.peak_tasks} x {task.docdb_connections_per_task}"
+            for task in self.tasks
+            if task.docdb_connections_per_task
+        )
+        return [
+            f"DocumentDB: {connections} connections at peak ({clients}) exceed the "
+            f"{self.docdb_props.max_connections} connections of "
+            f"{self.docdb_props.instance_type.to_string()}"
+        ]
+
+    def report(self) -> str:
+        """Render the plan as a markdown report"""
+        lines = [
+            f"# Capacity plan of {self.environment}",
+            "",
+            "| Task | CPU | Memory (MiB) | Tasks (min-peak) | Peak vCPU | Peak memory (GiB) "
+            "| DocumentDB connections |",
+            "| --- | --- | --- | --- | --- | --- | --- |",
+        ]
+        for task in self.tasks:
+            tasks = "one-off" if task.one_off else f"{task.min_tasks}-{task.peak_tasks}"
+            lines.append(
+                f"| {task.name} | {task.task_cpu} | {task.task_memory} | {tasks} "
+                f"| {task.peak_vcpu:g} | {task.peak_memory_gib:g} "
+                f"| {task.peak_docdb_connections} |"
+            )
+        totals = self.get_totals()
+        lines += [
+            "",
+            f"Services at peak: {totals['peak_tasks']} tasks, {totals['peak_vcpu']:g} vCPU, "
+            f"{totals['peak_memory_gib']:g} GiB",
+            "",
+            f"Estimated monthly cost: ${totals['monthly_cost_min']:,.0f} at the minimum "
+            f"capacity, ${totals['monthly_cost_peak']:,.0f} at the peak",
+        ]
+        if self.docdb_props is not None:
+            lines += [
+                "",
+                f"DocumentDB connections at peak: {totals['docdb_connections']} of "
+                f"{self.docdb_props.max_connections}",
+            ]
+        errors = self.errors + self.get_docdb_errors()
+        if errors:
+            lines += ["", "## Errors", ""] + [f"- {error}" for error in errors]
+        return "\n".join(lines) + "\n"
+
+    def validate(self) -> List[str]:
+        """Write the report and fail the synth on an over-commit"""
+        os.makedirs(self.outdir, exist_ok=True)
+        with open(os.path.join(self.outdir, REPORT_FILE_NAME), "w") as report:
+            report.write(self.report())
+        return self.errors + self.get_docdb_errors()
@@ -0,0 +1,122 @@
+"""
+Render the k6 script of a load test from its scenario definitions.
+
+The script writes its results to `REPORT_PATH`: the k6 summary (`summary.json`, `summary.txt`)
+and the CloudWatch metric data (`metric-data.json`) of each scenario, in the format of
+`aws cloudwatch put-metric-data --metric-data`.
+"""
+
+import json
+
+from src.load_test_props import LoadTestProps
+
+SUMMARY_TREND_STATS = ["avg", "min", "med", "max", "p(90)", "p(95)", "p(99)"]
+
+K6_SCRIPT_TEMPLATE = """import http from "k6/http";
+import exec from "k6/execution";
+import {{ check, sleep }} from "k6";
+import {{ textSummary }} from "https://jslib.k6.io/k6-summary/0.1.0/index.js";
+
+const BASE_URL = __ENV.BASE_URL;
+const REPORT_PATH = __ENV.REPORT_PATH;
+const ENVIRONMENT = __ENV.ENVIRONMENT;
+const SCENARIOS = {scenarios};
+
+export const options = {options};
+
+export function run() {{
+  const scenario = SCENARIOS[exec.scenario.name];
+  for (const route of scenario.routes) {{
+    const response = http.get(`${{BASE_URL}}${{route}}`, {{ tags: {{ name: route }} }});
+    check(response, {{ "status is not an error": (r) => r.status < 400 }});
+    sleep(scenario.thinkTime);
+  }}
+}}
+
+function metricData(data, scenario) {{
+  const filter = scenario === "all" ? "" : `{{scenario:${{scenario}}}}`;
+  const duration = data.metrics[`http_req_duration${{filter}}`];
+  const requests = data.metrics[`http_reqs${{filter}}`];
+  const failed = data.metrics[`http_req_failed${{filter}}`];
+  const dimensions = [
+    {{ Name: "Environment", Value: ENVIRONMENT }},
+    {{ Name: "Scenario", Value: scenario }},
+  ];
+  const values = [
+    ["LatencyP50", duration && duration.values["med"], "Milliseconds"],
+    ["LatencyP95", duration && duration.values["p(95)"], "Milliseconds"],
+    ["LatencyP99", duration && duration.values["p(99)"], "Milliseconds"],
+    ["Requests", requests && requests.values.count, "Count"],
+    ["Throughput", requests && requests.values.rate, "Count/Second"],
+    ["ErrorRate", failed && failed.values.rate * 100, "Percent"],
+  ];
+  return values
+    .filter(([, value]) => value !== undefined && !Number.isNaN(value))
+    .map(([name, value, unit]) => ({{ MetricName: name, Dimensions: dimensions, Value: value, Unit: unit }}));
+}}
+
+export function handleSummary(data) {{
+  const failedThresholds = Object.values(data.metrics)
+    .flatMap((metric) => Object.values(metric.thresholds || {{}}))
+    .filter((threshold) => !threshold.ok).length;
+  const metrics = ["all", ...Object.keys(SCENARIOS)].flatMap((scenario) => metricData(data, scenario));
+  metrics.push({{
+    MetricName: "FailedThresholds",
+    Dimensions: [{{ Name: "Environment", Value: ENVIRONMENT }}],
+    Value: failedThresholds,
+    Unit: "Count",
+  }});
+  const text = textSummary(data, {{ indent: " ", enableColors: false }});
+  return {{
+    stdout: text,
+    [`${{REPORT_PATH}}/summary.txt`]: text,
+    [`${{REPORT_PATH}}/summary.json`]: JSON.stringify(data, null, 2),
+    [`${{REPORT_PATH}}/metric-data.json`]: JSON.stringify(metrics),
+  }};
+}}
+"""
+
+
+def get_k6_options(props: LoadTestProps) -> dict:
+    """Get the k6 options, every scenario has thresholds so its metrics are in the summary"""
+    scenarios = {}
+    thresholds = {"http_req_failed": [f"rate<{props.max_error_rate}"]}
+    for scenario in props.scenarios:
+        scenarios[scenario.name] = {
+            "executor": "ramping-vus",
+            "exec": "run",
+            "startVUs": 0,
+            "stages": [
+                {"duration": scenario.ramp_up, "target": scenario.virtual_users},
+                {"duration": scenario.duration, "target": scenario.virtual_users},
+            ],
+            "gracefulRampDown": "10s",
+        }
+        duration_thresholds = ["max>=0"]
+        if scenario.p95_threshold is not None:
+            duration_thresholds = [f"p(95)<{scenario.p95_threshold}"]
+        thresholds[f"http_req_duration{{scenario:{scenario.name}}}"] = (
+            duration_thresholds
+        )
+        thresholds[f"http_req_failed{{scenario:{scenario.name}}}"] = [
+            f"rate<{props.max_error_rate}"
+        ]
+        thresholds[f"http_reqs{{scenario:{scenario.name}}}"] = ["count>=0"]
+
+    return {
+        "summaryTrendStats": SUMMARY_TREND_STATS,
+        "scenarios": scenarios,
+        "thresholds": thresholds,
+    }
+
+
+def render_k6_script(props: LoadTestProps) -> str:
+    """Render the k6 script running the load test scenarios"""
+    scenarios = {
+        scenario.name: {"routes": scenario.routes, "thinkTime": scenario.think_time}
+        for scenario in props.scenarios
+    }
+    return K6_SCRIPT_TEMPLATE.format(
+        scenarios=json.dumps(scenarios, indent=2),
+        options=json.dumps(get_k6_options(props), indent=2),
+    )
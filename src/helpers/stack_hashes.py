@@ -0,0 +1,126 @@
+"""
+Detect the synthesized stacks that changed since the last deploy.
+
+Each stack is hashed from its template and the ids of its assets (which CDK derives from the
+asset contents) and compared against a manifest of the hashes recorded at the last deploy.
+
+i.e. after `cdk synth`:
+
+  python -m src.helpers.stack_hashes plan cdk.out deployed-hashes.json
+  cdk deploy --exclusively <stacks printed by plan>
+  python -m src.helpers.stack_hashes record cdk.out deployed-hashes.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from graphlib import TopologicalSorter
+from typing import Dict, List
+
+STACK_ARTIFACT_TYPE = "aws:cloudformation:stack"
+ASSET_MANIFEST_ARTIFACT_TYPE = "cdk:asset-manifest"
+ASSET_KINDS = ["files", "dockerImages"]
+
+
+def load_artifacts(cdk_out: str) -> dict:
+    """Load the artifacts of a cloud assembly directory"""
+    with open(os.path.join(cdk_out, "manifest.json")) as manifest:
+        return json.load(manifest)["artifacts"]
+
+
+def get_stack_dependencies(artifacts: dict) -> Dict[str, List[str]]:
+    """Map each stack to the stacks it depends on, i.e. through `add_dependency`"""
+    return {
+        name: [
+            dependency
+            for dependency in artifact.get("dependencies", [])
+            if artifacts.get(dependency, {}).get("type") == STACK_ARTIFACT_TYPE
+        ]
+        for name, artifact in artifacts.items()
+        if artifact["type"] == STACK_ARTIFACT_TYPE
+    }
+
+
+def hash_stack(cdk_out: str, artifacts: dict, stack_name: str) -> str:
+    """Hash the template of a stack together with the ids of its assets"""
+    artifact = artifacts[stack_name]
+    digest = hashlib.sha256()
+    template_file = os.path.join(cdk_out, artifact["properties"]["templateFile"])
+    with open(template_file, "rb") as template:
+        digest.update(template.read())
+
+    for dependency in artifact.get("dependencies", []):
+        dependency_artifact = artifacts.get(dependency, {})
+        if dependency_artifact.get("type") != ASSET_MANIFEST_ARTIFACT_TYPE:
+            continue
+        asset_manifest_file = os.path.join(
+            cdk_out, dependency_artifact["properties"]["file"]
+        )
+        with open(asset_manifest_file) as asset_manifest_json:
+            asset_manifest = json.load(asset_manifest_json)
+        for kind in ASSET_KINDS:
+            for asset_id in sorted(asset_manifest.get(kind, {})):
+                digest.update(f"{kind}:{asset_id}".encode())
+
+    return digest.hexdigest()
+
+
+def hash_stacks(cdk_out: str) -> Dict[str, str]:
+    """Hash every stack of a cloud assembly directory"""
+    artifacts = load_artifacts(cdk_out)
+    return {
+        name: hash_stack(cdk_out, artifacts, name)
+        for name in get_stack_dependencies(artifacts)
+    }
+
+
+def plan_deploy(cdk_out: str, deployed_hashes: Dict[str, str]) -> List[str]:
+    """List the changed stacks, dependencies first"""
+    artifacts = load_artifacts(cdk_out)
+    dependencies = get_stack_dependencies(artifacts)
+    changed = {
+        name
+        for name in dependencies
+        if deployed_hashes.get(name) != hash_stack(cdk_out, artifacts, name)
+    }
+    return [
+        name
+        for name in TopologicalSorter(dependencies).static_order()
+        if name in changed
+    ]
+
+
+def load_deployed_hashes(path: str) -> Dict[str, str]:
+    """Load the hashes recorded at the last deploy, nothing is deployed if the file is missing"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as deployed_hashes:
+        return json.load(deployed_hashes)
+
+
+def record_deploy(cdk_out: str, path: str) -> None:
+    """Record the hashes of the stacks in a cloud assembly directory as deployed"""
+    deployed_hashes = load_deployed_hashes(path)
+    deployed_hashes.update(hash_stacks(cdk_out))
+    with open(path, "w") as deployed_hashes_json:
+        json.dump(deployed_hashes, deployed_hashes_json, indent=2, sort_keys=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["plan", "record"])
+    parser.add_argument("cdk_out", help="the synthesized cloud assembly directory")
+    parser.add_argument("deployed_hashes", help="the manifest of deployed stack hashes")
+    args = parser.parse_args()
+
+    if args.command == "plan":
+        deployed_hashes = load_deployed_hashes(args.deployed_hashes)
+        for stack_name in plan_deploy(args.cdk_out, deployed_hashes):
+            print(stack_name)
+    else:
+        record_deploy(args.cdk_out, args.deployed_hashes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+API_PATH_PREFIX = "/api/v1"
+# the paths proxied to the API, i.e. any version of it
+DYNAMIC_PATH_PREFIX = "/api/"
+# https://docs.aws.amazon.com/waf/latest/developerguide/waf-rule-statement-type-rate-based-high-level-settings.html
+RATE_LIMIT_WINDOWS = [60, 120, 300, 600]
+STATIC_ASSET_EXTENSIONS = [
+    ".js",
+    ".css",
+    ".map",
+    ".png",
+    ".jpg",
+    ".svg",
+    ".ico",
+    ".webp",
+    ".woff",
+    ".woff2",
+]
+
+
+@dataclass
+class AccessLogs:
+    """
+    Holds onto configuration for the load balancer access logs and the Athena table to query them.
+
+    Attributes:
+      prefix: The S3 key prefix of the access logs in the bucket.
+      infrequent_access_days: The number of days after which the access logs move to infrequent access storage.
+      expiration_days: The number of days after which the access logs are deleted.
+      query_results_expiration_days: The number of days after which the Athena query results are deleted.
+      projection_start: The first day (yyyy/MM/dd) of the projected `day` partitions of the access log table.
+    """
+
+    prefix: str = "alb"
+    """The S3 key prefix of the access logs in the bucket."""
+
+    infrequent_access_days: int = 30
+    """The number of days after which the access logs move to infrequent access storage."""
+
+    expiration_days: int = 90
+    """The number of days after which the access logs are deleted."""
+
+    query_results_expiration_days: int = 7
+    """The number of days after which the Athena query results are deleted."""
+
+    projection_start: str = "2025/01/01"
+    """The first day (yyyy/MM/dd) of the projected `day` partitions of the access log table."""
+
+
+class LoadBalancerProps:
+    """
+    Load balancer and WAF properties
+
+    rate_limit: requests allowed per client IP in the rate limit window, for all routes
+    api_rate_limit: requests allowed per client IP in the rate limit window, for `api_path_prefix` routes
+    page_rate_limit: requests allowed per client IP in the rate limit window, for page routes
+      (i.e. routes that are neither API routes nor static assets)
+    rate_limit_window: the rate limit evaluation window in seconds, one of 60, 120, 300 or 600
+    api_path_prefix: the path prefix of the API routes
+    static_asset_extensions: file extensions of static assets, these skip the common managed rule group
+    dynamic_path_prefix: the path prefix of the routes that are never static assets, whatever their extension
+    waf_block: block requests over a rate limit, set to `False` to only count them
+    access_logs: Optional `AccessLogs` to store the load balancer access logs and query them with Athena
+    certificate_id: Optional ACM certificate id to create a shared HTTPS listener with, services then
+      register their target group on it with a `ListenerRuleServiceStack`
+    """
+
+    def __init__(
+        self,
+        rate_limit: Optional[int] = 2000,
+        api_rate_limit: Optional[int] = 1000,
+        page_rate_limit: Optional[int] = 500,
+        rate_limit_window: int = 300,
+        api_path_prefix: str = API_PATH_PREFIX,
+        static_asset_extensions: List[str] = None,
+        dynamic_path_prefix: str = DYNAMIC_PATH_PREFIX,
+        waf_block: bool = True,
+        access_logs: Optional[AccessLogs] = None,
+        certificate_id: Optional[str] = None,
+    ) -> None:
+        self.rate_limit = rate_limit
+        self.api_rate_limit = api_rate_limit
+        self.page_rate_limit = page_rate_limit
+        if rate_limit_window not in RATE_LIMIT_WINDOWS:
+            raise ValueError(
+                f"rate_limit_window must be one of {RATE_LIMIT_WINDOWS}, not {rate_limit_window}"
+            )
+        self.rate_limit_window = rate_limit_window
+        self.api_path_prefix = api_path_prefix
+        self.dynamic_path_prefix = dynamic_path_prefix
+        if static_asset_extensions is None:
+            self.static_asset_extensions = STATIC_ASSET_EXTENSIONS
+        else:
+            self.static_asset_extensions = static_asset_extensions
+        self.waf_block = waf_block
+        self.access_logs = access_logs
+        self.certificate_id = certificate_id
@@ -1,49 +1,261 @@
 import aws_cdk as cdk
 
 from aws_cdk import (
+    aws_athena as athena,
+    aws_certificatemanager as acm,
     aws_ec2 as ec2,
     aws_elasticloadbalancingv2 as elbv2,
+    aws_glue as glue,
+    aws_iam as iam,
+    aws_s3 as s3,
     aws_wafv2 as wafv2,
+    region_info,
 )
 
 from constructs import Construct
+from typing import List, Optional
+
+from src.load_balancer_props import AccessLogs, LoadBalancerProps
+
+HTTP_LISTENER_PORT = 80
+HTTPS_LISTENER_PORT = 443
+
+# https://docs.aws.amazon.com/athena/latest/ug/create-alb-access-logs-table-partition-projection.html
+ACCESS_LOG_TABLE_NAME = "alb_access_logs"
+ACCESS_LOG_COLUMNS = [
+    ("type", "string"),
+    ("time", "string"),
+    ("elb", "string"),
+    ("client_ip", "string"),
+    ("client_port", "int"),
+    ("target_ip", "string"),
+    ("target_port", "int"),
+    ("request_processing_time", "double"),
+    ("target_processing_time", "double"),
+    ("response_processing_time", "double"),
+    ("elb_status_code", "int"),
+    ("target_status_code", "string"),
+    ("received_bytes", "bigint"),
+    ("sent_bytes", "bigint"),
+    ("request_verb", "string"),
+    ("request_url", "string"),
+    ("request_proto", "string"),
+    ("user_agent", "string"),
+    ("ssl_cipher", "string"),
+    ("ssl_protocol", "string"),
+    ("target_group_arn", "string"),
+    ("trace_id", "string"),
+    ("domain_name", "string"),
+    ("chosen_cert_arn", "string"),
+    ("matched_rule_priority", "string"),
+    ("request_creation_time", "string"),
+    ("actions_executed", "string"),
+    ("redirect_url", "string"),
+    ("lambda_error_reason", "string"),
+    ("target_port_list", "string"),
+    ("target_status_code_list", "string"),
+    ("classification", "string"),
+    ("classification_reason", "string"),
+    ("conn_trace_id", "string"),
+]
+ACCESS_LOG_REGEX = (
+    r"([^ ]*) ([^ ]*) ([^ ]*) ([^ ]*):([0-9]*) ([^ ]*)[:-]([0-9]*) ([-.0-9]*) ([-.0-9]*) ([-.0-9]*) "
+    r'(|[-0-9]*) (-|[-0-9]*) ([-0-9]*) ([-0-9]*) "([^ ]*) (.*) (- |[^ ]*)" "([^"]*)" ([A-Z0-9-_]+) '
+    r'([A-Za-z0-9.-]*) ([^ ]*) "([^"]*)" "([^"]*)" "([^"]*)" ([-.0-9]*) ([^ ]*) "([^"]*)" "([^"]*)" '
+    r'"([^ ]*)" "([^\s]+?)" "([^\s]+)" "([^ ]*)" "([^ ]*)" ?([^ ]*)?'
+)
+# the processing times are -1 when the load balancer could not dispatch the request to a target
+ACCESS_LOG_QUERIES = {
+    "top-slow-paths": (
+        "Paths with the slowest p99 target response time over the last 7 days",
+        """SELECT url_extract_path(request_url) AS path,
+  count(*) AS requests,
+  approx_percentile(target_processing_time, 0.5) AS p50_seconds,
+  approx_percentile(target_processing_time, 0.99) AS p99_seconds,
+  approx_percentile(request_processing_time + response_processing_time, 0.99) AS p99_client_seconds
+FROM {table}
+WHERE day >= date_format(current_date - interval '7' day, '%Y/%m/%d')
+  AND target_processing_time >= 0
+GROUP BY 1
+HAVING count(*) >= 10
+ORDER BY p99_seconds DESC
+LIMIT 50""",
+    ),
+    "p99-by-target": (
+        "p99 target response time of each target over the last day",
+        """SELECT target_group_arn,
+  target_ip,
+  count(*) AS requests,
+  approx_percentile(target_processing_time, 0.99) AS p99_seconds,
+  max(target_processing_time) AS max_seconds
+FROM {table}
+WHERE day >= date_format(current_date - interval '1' day, '%Y/%m/%d')
+  AND target_processing_time >= 0
+GROUP BY 1, 2
+ORDER BY p99_seconds DESC""",
+    ),
+    "5xx-by-route": (
+        "5xx responses by path and status code over the last 7 days",
+        """SELECT url_extract_path(request_url) AS path,
+  elb_status_code,
+  target_status_code,
+  count(*) AS responses
+FROM {table}
+WHERE day >= date_format(current_date - interval '7' day, '%Y/%m/%d')
+  AND elb_status_code >= 500
+GROUP BY 1, 2, 3
+ORDER BY responses DESC
+LIMIT 50""",
+    ),
+}
+
+
+def _uri_path_match(
+    search_string: str, positional_constraint: str
+) -> wafv2.CfnWebACL.StatementProperty:
+    """Match the request path, decoded and normalized like the proxies do, against a string"""
+    return wafv2.CfnWebACL.StatementProperty(
+        byte_match_statement=wafv2.CfnWebACL.ByteMatchStatementProperty(
+            field_to_match=wafv2.CfnWebACL.FieldToMatchProperty(uri_path={}),
+            positional_constraint=positional_constraint,
+            search_string=search_string,
+            text_transformations=[
+                wafv2.CfnWebACL.TextTransformationProperty(
+                    priority=priority, type=transformation
+                )
+                for priority, transformation in enumerate(
+                    ["URL_DECODE", "NORMALIZE_PATH", "LOWERCASE"]
+                )
+            ],
+        )
+    )
+
+
+def _any_of(
+    statements: List[wafv2.CfnWebACL.StatementProperty],
+) -> wafv2.CfnWebACL.StatementProperty:
+    """Match any of the statements, WAF requires at least two statements in an OR statement"""
+    if len(statements) == 1:
+        return statements[0]
+    return wafv2.CfnWebACL.StatementProperty(
+        or_statement=wafv2.CfnWebACL.OrStatementProperty(statements=statements)
+    )
+
+
+def _all_of(
+    statements: List[wafv2.CfnWebACL.StatementProperty],
+) -> wafv2.CfnWebACL.StatementProperty:
+    """Match all of the statements"""
+    return wafv2.CfnWebACL.StatementProperty(
+        and_statement=wafv2.CfnWebACL.AndStatementProperty(statements=statements)
+    )
+
+
+def _not(
+    statement: wafv2.CfnWebACL.StatementProperty,
+) -> wafv2.CfnWebACL.StatementProperty:
+    """Negate a statement"""
+    return wafv2.CfnWebACL.StatementProperty(
+        not_statement=wafv2.CfnWebACL.NotStatementProperty(statement=statement)
+    )
 
 
 class LoadBalancerStack(cdk.Stack):
     """
     API Gateway to allow access to ECS app from the internet
+
+    props: Optional `LoadBalancerProps` with the WAF rate limits
     """
 
     def __init__(
-        self, scope: Construct, construct_id: str, vpc: ec2.Vpc, **kwargs
+        self,
+        scope: Construct,
+        construct_id: str,
+        vpc: ec2.Vpc,
+        props: Optional[LoadBalancerProps] = None,
+        **kwargs,
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        if props is None:
+            props = LoadBalancerProps()
+
         self.alb = elbv2.ApplicationLoadBalancer(
             self, "AppLoadBalancer", vpc=vpc, internet_facing=True
         )
 
-        # WAF to protect against common web attacks
-        web_acl = wafv2.CfnWebACL(
-            self,
-            "WebAcl",
-            scope="REGIONAL",
-            default_action=wafv2.CfnWebACL.DefaultActionProperty(allow={}),
-            visibility_config=wafv2.CfnWebACL.VisibilityConfigProperty(
-                cloud_watch_metrics_enabled=True,
-                metric_name="WebAclMetrics",
-                sampled_requests_enabled=True,
-            ),
-            rules=[
+        api_statement = _uri_path_match(props.api_path_prefix, "STARTS_WITH")
+        static_asset_statement = None
+        if props.static_asset_extensions:
+            # a path under the API prefix is never a static asset, whatever its extension
+            static_asset_statement = _all_of(
+                [
+                    _any_of(
+                        [
+                            _uri_path_match(extension.lower(), "ENDS_WITH")
+                            for extension in props.static_asset_extensions
+                        ]
+                    ),
+                    _not(_uri_path_match(props.dynamic_path_prefix, "STARTS_WITH")),
+                ]
+            )
+        if static_asset_statement is None:
+            page_statement = _not(api_statement)
+        else:
+            page_statement = _not(_any_of([api_statement, static_asset_statement]))
+
+        # Rate based rules come first so abusive clients are shed before the managed rule
+        # groups inspect their requests
+        rules = []
+        rate_limit_action = wafv2.CfnWebACL.RuleActionProperty(
+            block={} if props.waf_block else None,
+            count=None if props.waf_block else {},
+        )
+        for name, limit, scope_down_statement in [
+            ("RateLimitPerIp", props.rate_limit, None),
+            ("RateLimitApiPerIp", props.api_rate_limit, api_statement),
+            ("RateLimitPagesPerIp", props.page_rate_limit, page_statement),
+        ]:
+            if limit is None:
+                continue
+            rules.append(
+                wafv2.CfnWebACL.RuleProperty(
+                    name=name,
+                    priority=len(rules),
+                    statement=wafv2.CfnWebACL.StatementProperty(
+                        rate_based_statement=wafv2.CfnWebACL.RateBasedStatementProperty(
+                            aggregate_key_type="IP",
+                            limit=limit,
+                            evaluation_window_sec=props.rate_limit_window,
+                            scope_down_statement=scope_down_statement,
+                        )
+                    ),
+                    action=rate_limit_action,
+                    visibility_config=wafv2.CfnWebACL.VisibilityConfigProperty(
+                        cloud_watch_metrics_enabled=True,
+                        metric_name=name,
+                        sampled_requests_enabled=True,
+                    ),
+                )
+            )
+
+        # Static assets skip the common rule set, the known bad inputs rule set inspects every request
+        managed_rule_scope_down_statement = None
+        if static_asset_statement is not None:
+            managed_rule_scope_down_statement = _not(static_asset_statement)
+
+        rules.extend(
+            [
                 # Rules that provide protection against exploitation of a wide range of vulnerabilities,
                 # including those described in OWASP top 10 publications
                 wafv2.CfnWebACL.RuleProperty(
                     name="AWSManagedRulesCommonRuleSet",
-                    priority=0,
+                    priority=len(rules),
                     statement=wafv2.CfnWebACL.StatementProperty(
                         managed_rule_group_statement=wafv2.CfnWebACL.ManagedRuleGroupStatementProperty(
                             name="AWSManagedRulesCommonRuleSet",
                             vendor_name="AWS",
+                            scope_down_statement=managed_rule_scope_down_statement,
                             rule_action_overrides=[
                                 wafv2.CfnWebACL.RuleActionOverrideProperty(
                                     name="SizeRestrictions_QUERYSTRING",
@@ -65,7 +277,7 @@ class LoadBalancerStack(cdk.Stack):
                 # exploitation or discovery of vulnerabilities.
                 wafv2.CfnWebACL.RuleProperty(
                     name="AWSManagedRulesKnownBadInputsRuleSet",
-                    priority=1,
+                    priority=len(rules) + 1,
                     statement=wafv2.CfnWebACL.StatementProperty(
                         managed_rule_group_statement=wafv2.CfnWebACL.ManagedRuleGroupStatementProperty(
                             vendor_name="AWS",
@@ -79,7 +291,21 @@ class LoadBalancerStack(cdk.Stack):
                         metric_name="AWSManagedRulesKnownBadInputsRuleSet",
                     ),
                 ),
-            ],
+            ]
+        )
+
+        # WAF to protect against common web attacks
+        web_acl = wafv2.CfnWebACL(
+            self,
+            "WebAcl",
+            scope="REGIONAL",
+            default_action=wafv2.CfnWebACL.DefaultActionProperty(allow={}),
+            visibility_config=wafv2.CfnWebACL.VisibilityConfigProperty(
+                cloud_watch_metrics_enabled=True,
+                metric_name="WebAclMetrics",
+                sampled_requests_enabled=True,
+            ),
+            rules=rules,
         )
 
         wafv2.CfnWebACLAssociation(
@@ -89,9 +315,177 @@ class LoadBalancerStack(cdk.Stack):
             web_acl_arn=web_acl.attr_arn,
         )
 
+        if props.access_logs is not None:
+            self._add_access_logs(construct_id, props.access_logs)
+
+        # services register path or host based listener rules on the shared HTTPS listener,
+        # requests no rule matches get a 404
+        self.https_listener = None
+        if props.certificate_id is not None:
+            certificate = acm.Certificate.from_certificate_arn(
+                self,
+                "Cert",
+                certificate_arn=f"arn:aws:acm:{self.region}:{self.account}:certificate/{props.certificate_id}",
+            )
+            self.https_listener = self.alb.add_listener(
+                "HttpsListener",
+                port=HTTPS_LISTENER_PORT,
+                open=True,
+                protocol=elbv2.ApplicationProtocol.HTTPS,
+                certificates=[certificate],
+                default_action=elbv2.ListenerAction.fixed_response(
+                    404, content_type="text/plain", message_body="Not Found"
+                ),
+            )
+            self.alb.add_listener(
+                "HttpListener",
+                port=HTTP_LISTENER_PORT,
+                open=True,
+                protocol=elbv2.ApplicationProtocol.HTTP,
+                default_action=elbv2.ListenerAction.redirect(
+                    port=str(HTTPS_LISTENER_PORT),
+                    protocol=elbv2.ApplicationProtocol.HTTPS.value,
+                    permanent=True,
+                ),
+            )
+
         cdk.CfnOutput(
             self,
             "LoadBalancerDns",
             value=self.alb.load_balancer_dns_name,
             export_name=f"{construct_id}-dns",
         )
+
+    def _add_access_logs(self, construct_id: str, access_logs: AccessLogs) -> None:
+        """Store the load balancer access logs in S3 and query them with Athena"""
+        # the load balancer only delivers logs to buckets with S3 managed encryption
+        self.access_logs_bucket = s3.Bucket(
+            self,
+            "AccessLogsBucket",
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            enforce_ssl=True,
+            lifecycle_rules=[
+                s3.LifecycleRule(
+                    prefix=f"{access_logs.prefix}/",
+                    transitions=[
+                        s3.Transition(
+                            storage_class=s3.StorageClass.INFREQUENT_ACCESS,
+                            transition_after=cdk.Duration.days(
+                                access_logs.infrequent_access_days
+                            ),
+                        )
+                    ],
+                    expiration=cdk.Duration.days(access_logs.expiration_days),
+                ),
+                s3.LifecycleRule(
+                    prefix="athena-results/",
+                    expiration=cdk.Duration.days(
+                        access_logs.query_results_expiration_days
+                    ),
+                ),
+            ],
+        )
+
+        # the stacks are environment agnostic, the load balancer account of the region is looked
+        # up in a mapping at deploy time
+        self.access_logs_bucket.add_to_resource_policy(
+            iam.PolicyStatement(
+                principals=[
+                    iam.AccountPrincipal(
+                        self.regional_fact(region_info.FactName.ELBV2_ACCOUNT)
+                    )
+                ],
+                actions=["s3:PutObject"],
+                resources=[
+                    self.access_logs_bucket.arn_for_objects(
+                        f"{access_logs.prefix}/AWSLogs/{self.account}/*"
+                    )
+                ],
+            )
+        )
+        self.alb.set_attribute("access_logs.s3.enabled", "true")
+        self.alb.set_attribute(
+            "access_logs.s3.bucket", self.access_logs_bucket.bucket_name
+        )
+        self.alb.set_attribute("access_logs.s3.prefix", access_logs.prefix)
+        # the load balancer checks it can write to the bucket when access logs are enabled
+        self.alb.node.add_dependency(self.access_logs_bucket.policy)
+
+        database_name = construct_id.replace("-", "_").lower()
+        database = glue.CfnDatabase(
+            self,
+            "AccessLogsDatabase",
+            catalog_id=self.account,
+            database_input=glue.CfnDatabase.DatabaseInputProperty(name=database_name),
+        )
+
+        # the `day` partitions are projected from the S3 key, no crawler or partition repair needed
+        location = (
+            f"s3://{self.access_logs_bucket.bucket_name}/{access_logs.prefix}"
+            f"/AWSLogs/{self.account}/elasticloadbalancing/{self.region}/"
+        )
+        self.access_logs_table = glue.CfnTable(
+            self,
+            "AccessLogsTable",
+            catalog_id=self.account,
+            database_name=database_name,
+            table_input=glue.CfnTable.TableInputProperty(
+                name=ACCESS_LOG_TABLE_NAME,
+                table_type="EXTERNAL_TABLE",
+                parameters={
+                    "projection.enabled": "true",
+                    "projection.day.type": "date",
+                    "projection.day.range": f"{access_logs.projection_start},NOW",
+                    "projection.day.format": "yyyy/MM/dd",
+                    "projection.day.interval": "1",
+                    "projection.day.interval.unit": "DAYS",
+                    "storage.location.template": f"{location}${{day}}",
+                },
+                partition_keys=[
+                    glue.CfnTable.ColumnProperty(name="day", type="string")
+                ],
+                storage_descriptor=glue.CfnTable.StorageDescriptorProperty(
+                    columns=[
+                        glue.CfnTable.ColumnProperty(name=name, type=column_type)
+                        for name, column_type in ACCESS_LOG_COLUMNS
+                    ],
+                    location=location,
+                    input_format="org.apache.hadoop.mapred.TextInputFormat",
+                    output_format="org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat",
+                    serde_info=glue.CfnTable.SerdeInfoProperty(
+                        serialization_library="org.apache.hadoop.hive.serde2.RegexSerDe",
+                        parameters={
+                            "serialization.format": "1",
+                            "input.regex": ACCESS_LOG_REGEX,
+                        },
+                    ),
+                ),
+            ),
+        )
+        self.access_logs_table.add_dependency(database)
+
+        workgroup = athena.CfnWorkGroup(
+            self,
+            "AccessLogsWorkGroup",
+            name=construct_id,
+            work_group_configuration=athena.CfnWorkGroup.WorkGroupConfigurationProperty(
+                enforce_work_group_configuration=True,
+                publish_cloud_watch_metrics_enabled=True,
+                result_configuration=athena.CfnWorkGroup.ResultConfigurationProperty(
+                    output_location=f"s3://{self.access_logs_bucket.bucket_name}/athena-results/",
+                ),
+            ),
+        )
+        for name, (description, query) in ACCESS_LOG_QUERIES.items():
+            named_query = athena.CfnNamedQuery(
+                self,
+                f"AccessLogsQuery-{name}",
+                name=f"{construct_id}-{name}",
+                description=description,
+                database=database_name,
+                work_group=workgroup.name,
+                query_string=query.format(table=ACCESS_LOG_TABLE_NAME),
+            )
+            named_query.add_dependency(workgroup)
+            named_query.add_dependency(self.access_logs_table)
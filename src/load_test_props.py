@@ -0,0 +1,103 @@
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+SCENARIO_NAME_PATTERN = re.compile(r"^[a-z0-9][a-z0-9-]*$")
+
+
+@dataclass
+class LoadTestScenario:
+    """
+    Holds onto a load test scenario, each virtual user requests the routes in turn.
+
+    Attributes:
+      name: The name of the scenario, lowercase letters, digits and dashes.
+      routes: The paths requested by the virtual users, relative to the base URL (i.e. "/api/v1/genes").
+      virtual_users: The number of concurrent virtual users once ramped up.
+      duration: How long the virtual users run once ramped up (i.e. "5m").
+      ramp_up: How long to ramp up to the virtual users (i.e. "30s").
+      think_time: The seconds each virtual user waits between two requests.
+      p95_threshold: Optional p95 response time in milliseconds over which the scenario fails.
+    """
+
+    name: str
+    """The name of the scenario, lowercase letters, digits and dashes."""
+
+    routes: List[str]
+    """The paths requested by the virtual users, relative to the base URL (i.e. "/api/v1/genes")."""
+
+    virtual_users: int = 10
+    """The number of concurrent virtual users once ramped up."""
+
+    duration: str = "5m"
+    """How long the virtual users run once ramped up (i.e. "5m")."""
+
+    ramp_up: str = "30s"
+    """How long to ramp up to the virtual users (i.e. "30s")."""
+
+    think_time: float = 1.0
+    """The seconds each virtual user waits between two requests."""
+
+    p95_threshold: Optional[int] = None
+    """Optional p95 response time in milliseconds over which the scenario fails."""
+
+    def __post_init__(self) -> None:
+        if not SCENARIO_NAME_PATTERN.match(self.name):
+            raise ValueError(
+                f"Load test scenario name {self.name} must be lowercase letters, digits and dashes"
+            )
+        if not self.routes or not all(route.startswith("/") for route in self.routes):
+            raise ValueError(
+                f"Load test scenario {self.name} routes must be paths starting with /"
+            )
+        if self.virtual_users < 1:
+            raise ValueError(
+                f"Load test scenario {self.name} needs at least one virtual user"
+            )
+
+
+class LoadTestProps:
+    """
+    Load test properties
+
+    base_url: the URL the scenario routes are requested from (i.e. https://dev.app.io)
+    scenarios: List of `LoadTestScenario` run at the same time
+    environment: the environment name, the `Environment` dimension of the published metrics
+    max_error_rate: the share of failed requests over which a scenario fails
+    metrics_namespace: the CloudWatch namespace the results are published to
+    report_expiration_days: the number of days after which the S3 reports are deleted
+    task_cpu: the number of cpu units used by the task, 1024 is one vCPU
+    task_memory: the amount of memory in MiB used by the task
+    k6_image: the k6 image running the scenarios
+    aws_cli_image: the image with the AWS CLI used to publish the results
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        scenarios: List[LoadTestScenario],
+        environment: str,
+        max_error_rate: float = 0.01,
+        metrics_namespace: str = "LoadTest",
+        report_expiration_days: int = 90,
+        task_cpu: int = 2048,
+        task_memory: int = 4096,
+        k6_image: str = "grafana/k6:0.52.0",
+        aws_cli_image: str = "public.ecr.aws/aws-cli/aws-cli:2.17.0",
+    ) -> None:
+        if not scenarios:
+            raise ValueError("A load test needs at least one scenario")
+        scenario_names = [scenario.name for scenario in scenarios]
+        if len(set(scenario_names)) != len(scenario_names):
+            raise ValueError(f"Duplicate load test scenario names {scenario_names}")
+
+        self.base_url = base_url.rstrip("/")
+        self.scenarios = scenarios
+        self.environment = environment
+        self.max_error_rate = max_error_rate
+        self.metrics_namespace = metrics_namespace
+        self.report_expiration_days = report_expiration_days
+        self.task_cpu = task_cpu
+        self.task_memory = task_memory
+        self.k6_image = k6_image
+        self.aws_cli_image = aws_cli_image
@@ -0,0 +1,127 @@
+import aws_cdk as cdk
+
+from aws_cdk import (
+    aws_ec2 as ec2,
+    aws_ecs as ecs,
+    aws_iam as iam,
+    aws_s3 as s3,
+)
+
+from constructs import Construct
+
+from src.helpers.load_test_script import render_k6_script
+from src.load_test_props import LoadTestProps
+from src.one_off_task_stack import OneOffTaskStack
+
+REPORT_PATH = "/reports"
+
+# copy the reports of the run to S3 and publish the metric data written by the k6 script
+PUBLISH_SCRIPT = """set -eu
+RUN_ID="$(date -u +%Y-%m-%dT%H-%M-%SZ)"
+aws s3 cp --recursive --only-show-errors "${REPORT_PATH}" "s3://${REPORT_BUCKET}/${ENVIRONMENT}/${RUN_ID}/"
+aws cloudwatch put-metric-data --namespace "${METRICS_NAMESPACE}" --metric-data "file://${REPORT_PATH}/metric-data.json"
+echo "Published s3://${REPORT_BUCKET}/${ENVIRONMENT}/${RUN_ID}/"
+"""
+
+
+class LoadTestStack(OneOffTaskStack):
+    """
+    Load test task, started with `aws ecs run-task`
+
+    k6 runs the scenarios against the environment, then the results are published as CloudWatch
+    metrics and the k6 summary is stored in the `report_bucket`.
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        vpc: ec2.Vpc,
+        cluster: ecs.Cluster,
+        props: LoadTestProps,
+        **kwargs,
+    ) -> None:
+        super().__init__(
+            scope,
+            construct_id,
+            vpc,
+            cluster,
+            description="Load test task",
+            task_cpu=props.task_cpu,
+            task_memory=props.task_memory,
+            **kwargs,
+        )
+
+        self.report_bucket = s3.Bucket(
+            self,
+            "ReportBucket",
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            enforce_ssl=True,
+            lifecycle_rules=[
+                s3.LifecycleRule(
+                    expiration=cdk.Duration.days(props.report_expiration_days)
+                )
+            ],
+        )
+
+        self.report_bucket.grant_put(self.task_definition.task_role)
+        self.task_definition.add_to_task_role_policy(
+            iam.PolicyStatement(
+                actions=["cloudwatch:PutMetricData"],
+                resources=["*"],
+                conditions={
+                    "StringEquals": {"cloudwatch:namespace": props.metrics_namespace}
+                },
+            )
+        )
+
+        self.task_definition.add_volume(name="reports")
+        report_mount_point = ecs.MountPoint(
+            container_path=REPORT_PATH, source_volume="reports", read_only=False
+        )
+
+        # k6 exits with an error when a threshold fails, the results are published regardless
+        self.k6_script = render_k6_script(props)
+        k6_container = self.task_definition.add_container(
+            "k6",
+            image=ecs.ContainerImage.from_registry(props.k6_image),
+            entry_point=["sh", "-c"],
+            command=[
+                'printf "%s" "${K6_SCRIPT}" > /tmp/script.js && k6 run /tmp/script.js'
+            ],
+            environment={
+                "K6_SCRIPT": self.k6_script,
+                "BASE_URL": props.base_url,
+                "ENVIRONMENT": props.environment,
+                "REPORT_PATH": REPORT_PATH,
+            },
+            essential=False,
+            # the image runs as a user that cannot write to the task volume
+            user="root",
+            logging=self.task_log_driver(),
+        )
+        k6_container.add_mount_points(report_mount_point)
+
+        publish_container = self.task_definition.add_container(
+            "publish",
+            image=ecs.ContainerImage.from_registry(props.aws_cli_image),
+            entry_point=["sh", "-c"],
+            command=[PUBLISH_SCRIPT],
+            environment={
+                "ENVIRONMENT": props.environment,
+                "METRICS_NAMESPACE": props.metrics_namespace,
+                "REPORT_BUCKET": self.report_bucket.bucket_name,
+                "REPORT_PATH": REPORT_PATH,
+            },
+            logging=self.task_log_driver(),
+        )
+        publish_container.add_mount_points(report_mount_point)
+        publish_container.add_container_dependencies(
+            ecs.ContainerDependency(
+                container=k6_container,
+                condition=ecs.ContainerDependencyCondition.COMPLETE,
+            )
+        )
+
+        cdk.CfnOutput(self, "ReportBucketName", value=self.report_bucket.bucket_name)
@@ -0,0 +1,125 @@
+from typing import Optional
+
+import aws_cdk as cdk
+
+from aws_cdk import (
+    aws_ec2 as ec2,
+    aws_ecs as ecs,
+    aws_iam as iam,
+    aws_logs as logs,
+    custom_resources as cr,
+)
+
+from constructs import Construct
+
+
+class OneOffTaskStack(cdk.Stack):
+    """
+    A Fargate task that runs once, started with `aws ecs run-task` or on deploy, rather than an
+    ECS service. The stack outputs the values to start the task with, the subclasses add the
+    containers to `task_definition` and allow `security_group` to connect to their targets.
+
+    description: the description of the task security group
+    task_cpu: the number of cpu units used by the task, 1024 is one vCPU
+    task_memory: the amount of memory in MiB used by the task
+    task_ephemeral_storage: Optional ephemeral storage of the task in GiB, between 21 and 200
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        vpc: ec2.Vpc,
+        cluster: ecs.Cluster,
+        description: str,
+        task_cpu: int,
+        task_memory: int,
+        task_ephemeral_storage: Optional[int] = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        self.cluster = cluster
+        self.task_definition = ecs.FargateTaskDefinition(
+            self,
+            "TaskDef",
+            cpu=task_cpu,
+            memory_limit_mib=task_memory,
+            ephemeral_storage_gib=task_ephemeral_storage,
+        )
+        self.security_group = ec2.SecurityGroup(
+            self,
+            "SecurityGroup",
+            vpc=vpc,
+            description=description,
+        )
+        self.subnet_ids = vpc.select_subnets(
+            subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
+        ).subnet_ids
+
+        # the values to start the task with `aws ecs run-task`
+        cdk.CfnOutput(self, "ClusterName", value=cluster.cluster_name)
+        cdk.CfnOutput(
+            self,
+            "TaskDefinitionArn",
+            value=self.task_definition.task_definition_arn,
+        )
+        cdk.CfnOutput(
+            self, "SecurityGroupId", value=self.security_group.security_group_id
+        )
+        cdk.CfnOutput(self, "SubnetIds", value=cdk.Fn.join(",", self.subnet_ids))
+
+    def task_log_driver(self) -> ecs.LogDriver:
+        """Create the `awslogs` driver of a container of the task"""
+        return ecs.LogDrivers.aws_logs(
+            stream_prefix=self.node.id,
+            log_retention=logs.RetentionDays.FOUR_MONTHS,
+        )
+
+    def run_on_deploy(self, run_id: str) -> cr.AwsCustomResource:
+        """Start the task on the first deploy, and on the deploys that change the `run_id`"""
+        # a new physical id, on a change of the run id, starts the task again
+        run_task = cr.AwsSdkCall(
+            service="ECS",
+            action="runTask",
+            parameters={
+                "cluster": self.cluster.cluster_name,
+                "taskDefinition": self.task_definition.task_definition_arn,
+                "launchType": "FARGATE",
+                "networkConfiguration": {
+                    "awsvpcConfiguration": {
+                        "subnets": self.subnet_ids,
+                        "securityGroups": [self.security_group.security_group_id],
+                        "assignPublicIp": "DISABLED",
+                    }
+                },
+            },
+            physical_resource_id=cr.PhysicalResourceId.of(run_id),
+            # the custom resource response is limited to 4 KB
+            output_paths=["tasks.0.taskArn"],
+        )
+        run_task_resource = cr.AwsCustomResource(
+            self,
+            "RunTask",
+            on_create=run_task,
+            on_update=run_task,
+            policy=cr.AwsCustomResourcePolicy.from_statements(
+                [
+                    iam.PolicyStatement(
+                        actions=["ecs:RunTask"],
+                        resources=[self.task_definition.task_definition_arn],
+                    ),
+                    iam.PolicyStatement(
+                        actions=["iam:PassRole"],
+                        resources=[
+                            self.task_definition.task_role.role_arn,
+                            self.task_definition.obtain_execution_role().role_arn,
+                        ],
+                    ),
+                ]
+            ),
+            install_latest_aws_sdk=False,
+        )
+        # start the task once the ingress rules of the security group exist
+        run_task_resource.node.add_dependency(self.security_group)
+        return run_task_resource
@@ -1,9 +1,28 @@
-from dataclasses import dataclass
-from typing import List, Optional, Sequence
+import math
+import posixpath
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
 
+from aws_cdk import aws_applicationautoscaling as appscaling
+from aws_cdk import aws_ecr_assets as ecr_assets
 from aws_cdk import aws_ecs as ecs
 
 CONTAINER_LOCATION_PATH_ID = "path://"
+# the longest time Fargate waits for a container to exit after SIGTERM before killing it
+FARGATE_MAX_STOP_TIMEOUT = 120
+# the characters of a path that are not allowed in a task definition volume name
+VOLUME_NAME_INVALID_CHARACTERS = re.compile(r"[^A-Za-z0-9_-]")
+# the statistics of a custom metric target tracking policy, percentiles need step scaling
+TARGET_TRACKING_STATISTICS = ["Average", "Minimum", "Maximum", "SampleCount", "Sum"]
+PREDICTIVE_SCALING_MODES = ["ForecastOnly", "ForecastAndScale"]
+PREDICTIVE_SCALING_METRIC_TYPES = [
+    "ECSServiceCPUUtilization",
+    "ECSServiceMemoryUtilization",
+]
+PREDICTIVE_SCALING_MAX_CAPACITY_BEHAVIORS = ["HonorMaxCapacity", "IncreaseMaxCapacity"]
+# the longest time capacity can be launched ahead of the forecast
+PREDICTIVE_SCALING_MAX_SCHEDULING_BUFFER_TIME = 3600
 
 
 @dataclass
@@ -32,6 +51,11 @@ class ContainerVolume:
       path: The path on the container to mount the host volume at.
       size: The size of the volume in GiB.
       read_only: Container has read-only access to the volume, set to `false` for write access.
+      name: The volume name, defaults to the container name.
+      iops: The provisioned IOPS of the volume, defaults to the gp3 baseline of 3,000.
+      throughput: The provisioned throughput in MiB/s of the gp3 volume, defaults to the baseline of 125.
+      file_system_type: The Linux filesystem type of the volume, defaults to xfs.
+      snapshot_id: Optional EBS snapshot to create the volume from.
     """
 
     path: str
@@ -43,6 +67,446 @@ class ContainerVolume:
     read_only: bool = False
     """Container has read-only access to the volume, set to `false` for write access."""
 
+    name: Optional[str] = None
+    """The volume name, defaults to the container name."""
+
+    iops: Optional[int] = None
+    """The provisioned IOPS of the volume, defaults to the gp3 baseline of 3,000."""
+
+    throughput: Optional[int] = None
+    """The provisioned throughput in MiB/s of the gp3 volume, defaults to the baseline of 125."""
+
+    file_system_type: Optional[ecs.FileSystemType] = None
+    """The Linux filesystem type of the volume, defaults to xfs."""
+
+    snapshot_id: Optional[str] = None
+    """Optional EBS snapshot to create the volume from."""
+
+
+@dataclass
+class ContainerLogging:
+    """
+    Holds onto configuration for shipping the container and Service Connect proxy logs.
+
+    Attributes:
+      mode: The delivery mode of log messages, `NON_BLOCKING` keeps stdout writes off the request path.
+      max_buffer_size: The size in MiB of the in-memory buffer used in `NON_BLOCKING` mode.
+      firelens: Route the container logs through a FireLens Fluent Bit sidecar instead of `awslogs`.
+      firelens_image: The Fluent Bit image used for the FireLens log router.
+      firelens_memory_reservation: The soft limit of memory in MiB to reserve for the log router.
+      firelens_config_file: Optional Fluent Bit config file (S3 ARN or path in the image) with filters.
+      firelens_options: Optional extra options passed to the Fluent Bit `cloudwatch_logs` output.
+    """
+
+    mode: ecs.AwsLogDriverMode = ecs.AwsLogDriverMode.NON_BLOCKING
+    """The delivery mode of log messages, `NON_BLOCKING` keeps stdout writes off the request path."""
+
+    max_buffer_size: int = 25
+    """The size in MiB of the in-memory buffer used in `NON_BLOCKING` mode."""
+
+    firelens: bool = False
+    """Route the container logs through a FireLens Fluent Bit sidecar instead of `awslogs`."""
+
+    firelens_image: str = "public.ecr.aws/aws-observability/aws-for-fluent-bit:stable"
+    """The Fluent Bit image used for the FireLens log router."""
+
+    firelens_memory_reservation: int = 50
+    """The soft limit of memory in MiB to reserve for the log router."""
+
+    firelens_config_file: Optional[str] = None
+    """Optional Fluent Bit config file (S3 ARN or path in the image) with filters."""
+
+    firelens_options: dict = field(default_factory=dict)
+    """Optional extra options passed to the Fluent Bit `cloudwatch_logs` output."""
+
+
+@dataclass
+class ContainerAssetOptions:
+    """
+    Holds onto the docker build options for a container built from a "path://" location.
+
+    Attributes:
+      build_args: Build args to pass to the `docker build` command.
+      target: Optional Docker target stage to build.
+      platform: The platform to build the image for, defaults to the Fargate `linux/amd64` platform.
+      cache_from: Cache sources (i.e. a registry ref) to reuse image layers from.
+      cache_to: Optional cache destination to export the built layers to.
+      exclude: File paths matching these patterns are excluded from the build context.
+      file: Optional path to the Dockerfile relative to the container location.
+    """
+
+    build_args: dict = field(default_factory=dict)
+    """Build args to pass to the `docker build` command."""
+
+    target: Optional[str] = None
+    """Optional Docker target stage to build."""
+
+    platform: Optional[ecr_assets.Platform] = field(
+        default_factory=lambda: ecr_assets.Platform.LINUX_AMD64
+    )
+    """The platform to build the image for, defaults to the Fargate `linux/amd64` platform."""
+
+    cache_from: List[ecr_assets.DockerCacheOption] = field(default_factory=list)
+    """Cache sources (i.e. a registry ref) to reuse image layers from."""
+
+    cache_to: Optional[ecr_assets.DockerCacheOption] = None
+    """Optional cache destination to export the built layers to."""
+
+    exclude: List[str] = field(default_factory=list)
+    """File paths matching these patterns are excluded from the build context."""
+
+    file: Optional[str] = None
+    """Optional path to the Dockerfile relative to the container location."""
+
+
+@dataclass
+class DeploymentAlarms:
+    """
+    Holds onto the alarm thresholds that roll back a service deployment, unset thresholds are not alarmed.
+
+    Attributes:
+      target_p99_latency: The load balancer p99 target response time threshold in milliseconds.
+      target_5xx_rate: The load balancer target 5xx response rate threshold in percent.
+      service_connect_p99_latency: The Service Connect p99 response time threshold in milliseconds.
+      evaluation_periods: The number of one minute periods over a threshold that trigger a rollback.
+    """
+
+    target_p99_latency: Optional[float] = None
+    """The load balancer p99 target response time threshold in milliseconds."""
+
+    target_5xx_rate: Optional[float] = None
+    """The load balancer target 5xx response rate threshold in percent."""
+
+    service_connect_p99_latency: Optional[float] = None
+    """The Service Connect p99 response time threshold in milliseconds."""
+
+    evaluation_periods: int = 3
+    """The number of one minute periods over a threshold that trigger a rollback."""
+
+
+@dataclass
+class ScalingMetric:
+    """
+    Holds onto a custom CloudWatch metric the service scales on, i.e. an event loop lag or in-flight
+    requests metric emitted by the container in the CloudWatch embedded metric format (EMF).
+    Set either a `target_value` to track or the `scaling_steps` to scale by.
+
+    Attributes:
+      metric_name: The name of the metric.
+      namespace: The CloudWatch namespace of the metric, the task is allowed to publish to it.
+      dimensions: Optional dimensions of the metric, defaults to {"Service": <container name>}.
+      statistic: The statistic of the metric aggregated over one minute periods.
+      target_value: Optional value of the metric to keep the service at with target tracking.
+      scaling_steps: Optional list of at least two `appscaling.ScalingInterval` to step scale by.
+      scale_in_cooldown: The seconds to wait after a scale in before scaling in again.
+      scale_out_cooldown: The seconds to wait after a scale out before scaling out again, the cooldown of step scaling.
+    """
+
+    metric_name: str
+    """The name of the metric."""
+
+    namespace: str
+    """The CloudWatch namespace of the metric, the task is allowed to publish to it."""
+
+    dimensions: Optional[Dict[str, str]] = None
+    """Optional dimensions of the metric, defaults to {"Service": <container name>}."""
+
+    statistic: str = "Average"
+    """The statistic of the metric aggregated over one minute periods."""
+
+    target_value: Optional[float] = None
+    """Optional value of the metric to keep the service at with target tracking."""
+
+    scaling_steps: Optional[List[appscaling.ScalingInterval]] = None
+    """Optional list of at least two `appscaling.ScalingInterval` to step scale by."""
+
+    scale_in_cooldown: int = 300
+    """The seconds to wait after a scale in before scaling in again."""
+
+    scale_out_cooldown: int = 60
+    """The seconds to wait after a scale out before scaling out again, the cooldown of step scaling."""
+
+    def __post_init__(self) -> None:
+        if (self.target_value is None) == (self.scaling_steps is None):
+            raise ValueError(
+                f"Scaling metric {self.metric_name} needs either a target_value or scaling_steps"
+            )
+        if (
+            self.target_value is not None
+            and self.statistic not in TARGET_TRACKING_STATISTICS
+        ):
+            raise ValueError(
+                f"Scaling metric {self.metric_name} tracks a target with the {self.statistic} statistic, "
+                f"target tracking supports {TARGET_TRACKING_STATISTICS}"
+            )
+        if self.scaling_steps is not None and len(self.scaling_steps) < 2:
+            raise ValueError(
+                f"Scaling metric {self.metric_name} needs at least two scaling_steps"
+            )
+
+
+@dataclass
+class PredictiveScaling:
+    """
+    Holds onto a predictive scaling policy, the task count is forecast from the daily and weekly
+    patterns of the metric and capacity is launched ahead of the load.
+
+    Attributes:
+      mode: "ForecastOnly" to evaluate the forecasts, "ForecastAndScale" to scale on them.
+      metric_type: The utilization the forecast is based on, "ECSServiceCPUUtilization" or
+        "ECSServiceMemoryUtilization".
+      target_value: The utilization in percent to keep the forecast task count at.
+      scheduling_buffer_time: The seconds capacity is launched ahead of the forecast load.
+      max_capacity_breach_behavior: "HonorMaxCapacity" to cap the forecast task count at the auto
+        scaling maximum capacity, "IncreaseMaxCapacity" to raise the maximum above it.
+      max_capacity_buffer: Optional percent of the forecast the maximum capacity may be raised to,
+        with "IncreaseMaxCapacity" only.
+    """
+
+    mode: str = "ForecastOnly"
+    """"ForecastOnly" to evaluate the forecasts, "ForecastAndScale" to scale on them."""
+
+    metric_type: str = "ECSServiceCPUUtilization"
+    """The utilization the forecast is based on, "ECSServiceCPUUtilization" or "ECSServiceMemoryUtilization"."""
+
+    target_value: float = 50
+    """The utilization in percent to keep the forecast task count at."""
+
+    scheduling_buffer_time: int = 300
+    """The seconds capacity is launched ahead of the forecast load."""
+
+    max_capacity_breach_behavior: str = "HonorMaxCapacity"
+    """"HonorMaxCapacity" to cap the task count at the maximum capacity, "IncreaseMaxCapacity" to raise it."""
+
+    max_capacity_buffer: Optional[int] = None
+    """Optional percent of the forecast the maximum capacity may be raised to, with "IncreaseMaxCapacity" only."""
+
+    def __post_init__(self) -> None:
+        if self.mode not in PREDICTIVE_SCALING_MODES:
+            raise ValueError(
+                f"Predictive scaling mode {self.mode} must be one of {PREDICTIVE_SCALING_MODES}"
+            )
+        if self.metric_type not in PREDICTIVE_SCALING_METRIC_TYPES:
+            raise ValueError(
+                f"Predictive scaling metric type {self.metric_type} must be one of "
+                f"{PREDICTIVE_SCALING_METRIC_TYPES}"
+            )
+        if (
+            not 0
+            <= self.scheduling_buffer_time
+            <= PREDICTIVE_SCALING_MAX_SCHEDULING_BUFFER_TIME
+        ):
+            raise ValueError(
+                f"Predictive scaling scheduling_buffer_time must be between 0 and "
+                f"{PREDICTIVE_SCALING_MAX_SCHEDULING_BUFFER_TIME} seconds"
+            )
+        if (
+            self.max_capacity_breach_behavior
+            not in PREDICTIVE_SCALING_MAX_CAPACITY_BEHAVIORS
+        ):
+            raise ValueError(
+                f"Predictive scaling max_capacity_breach_behavior {self.max_capacity_breach_behavior} "
+                f"must be one of {PREDICTIVE_SCALING_MAX_CAPACITY_BEHAVIORS}"
+            )
+        if (
+            self.max_capacity_buffer is not None
+            and self.max_capacity_breach_behavior != "IncreaseMaxCapacity"
+        ):
+            raise ValueError(
+                "Predictive scaling max_capacity_buffer needs the IncreaseMaxCapacity behavior"
+            )
+
+
+@dataclass
+class ContainerTracing:
+    """
+    Holds onto configuration for an AWS Distro for OpenTelemetry (ADOT) collector sidecar that
+    receives OTLP spans from the container on localhost and exports them to AWS X-Ray.
+
+    Attributes:
+      image: The ADOT collector image.
+      config: The collector configuration file in the image, the default only exports traces to X-Ray.
+      memory_reservation: The soft limit of memory in MiB to reserve for the collector.
+      sampling_ratio: The ratio of traces started by the container that are sampled.
+    """
+
+    image: str = "public.ecr.aws/aws-observability/aws-otel-collector:v0.40.0"
+    """The ADOT collector image."""
+
+    # the default ECS configuration also publishes EMF metrics, the task role cannot write their logs
+    config: str = "/etc/ecs/ecs-xray.yaml"
+    """The collector configuration file in the image, the default only exports traces to X-Ray."""
+
+    memory_reservation: int = 64
+    """The soft limit of memory in MiB to reserve for the collector."""
+
+    sampling_ratio: float = 1.0
+    """The ratio of traces started by the container that are sampled."""
+
+
+@dataclass
+class ContainerRuntime:
+    """
+    Holds onto the Linux runtime settings of the container.
+
+    Attributes:
+      ulimits: List of `ecs.Ulimit` to set in the container, i.e. a raised `NOFILE` limit for more connections.
+      init_process_enabled: Run an init process in the container that forwards signals and reaps processes.
+      scratch_paths: Absolute paths mounted from the task ephemeral storage instead of the container overlay
+        filesystem. The mount replaces the directory of the image with an empty one owned by root with mode 0755,
+        use a dedicated path the image creates rather than a shared one like `/tmp`.
+      stop_timeout: Optional seconds to wait for the container to exit after SIGTERM, at most 120 on Fargate.
+    """
+
+    ulimits: List[ecs.Ulimit] = field(default_factory=list)
+    """List of `ecs.Ulimit` to set in the container, i.e. a raised `NOFILE` limit for more connections."""
+
+    init_process_enabled: bool = False
+    """Run an init process in the container that forwards signals and reaps processes."""
+
+    scratch_paths: List[str] = field(default_factory=list)
+    """Absolute paths mounted from the task ephemeral storage instead of the container overlay filesystem."""
+
+    stop_timeout: Optional[int] = None
+    """Optional seconds to wait for the container to exit after SIGTERM, at most 120 on Fargate."""
+
+    def __post_init__(self) -> None:
+        if self.stop_timeout is not None and not (
+            0 < self.stop_timeout <= FARGATE_MAX_STOP_TIMEOUT
+        ):
+            raise ValueError(
+                f"stop_timeout must be between 1 and {FARGATE_MAX_STOP_TIMEOUT} seconds on Fargate"
+            )
+        for scratch_path in self.scratch_paths:
+            if (
+                not posixpath.isabs(scratch_path)
+                or posixpath.normpath(scratch_path) != scratch_path
+                or scratch_path == "/"
+            ):
+                raise ValueError(
+                    f"scratch path {scratch_path} must be a normalized absolute path below /"
+                )
+        volume_names = list(self.scratch_volume_names().values())
+        if len(set(volume_names)) != len(self.scratch_paths):
+            raise ValueError(
+                f"scratch paths {self.scratch_paths} are duplicated or map to the same volume names {volume_names}"
+            )
+
+    def scratch_volume_names(self) -> Dict[str, str]:
+        """Name the task volume of each scratch path, i.e. `scratch-var-cache` for `/var/cache`"""
+        return {
+            scratch_path: "scratch-"
+            + VOLUME_NAME_INVALID_CHARACTERS.sub("-", scratch_path.strip("/"))
+            for scratch_path in self.scratch_paths
+        }
+
+
+@dataclass
+class RuntimeTuning:
+    """
+    Holds onto the Node.js runtime settings derived from the resources of the task. Each derived
+    setting is passed to the container as an environment variable, unless overridden.
+
+    Attributes:
+      node_env: Optional `NODE_ENV` of the container, `production` enables the framework optimizations.
+      heap_ratio: The share of the task memory left to the container that the V8 heap can use.
+      max_old_space_size: Optional V8 heap size in MiB, overrides the size derived from `heap_ratio`.
+      threads_per_vcpu: The number of libuv thread pool threads per task vCPU.
+      threadpool_size: Optional libuv thread pool size, overrides the size derived from `threads_per_vcpu`.
+      mongodb_max_connections: Optional connection limit of the DocumentDB instance the container connects to,
+        the MongoDB connection pool is only sized when set. The driver reads no environment variable, the
+        container passes `MONGODB_MAX_POOL_SIZE` to it as the `maxPoolSize` option.
+      mongodb_connection_ratio: The share of the DocumentDB connections the tasks of the service can open,
+        the rest is left to the other clients (i.e. the bastion host).
+      mongodb_max_pool_size: Optional MongoDB connection pool size, overrides the size derived from the
+        connection limit and the auto scaling maximum capacity.
+    """
+
+    node_env: Optional[str] = None
+    """Optional `NODE_ENV` of the container, `production` enables the framework optimizations."""
+
+    heap_ratio: float = 0.75
+    """The share of the task memory left to the container that the V8 heap can use."""
+
+    max_old_space_size: Optional[int] = None
+    """Optional V8 heap size in MiB, overrides the size derived from `heap_ratio`."""
+
+    threads_per_vcpu: int = 4
+    """The number of libuv thread pool threads per task vCPU."""
+
+    threadpool_size: Optional[int] = None
+    """Optional libuv thread pool size, overrides the size derived from `threads_per_vcpu`."""
+
+    mongodb_max_connections: Optional[int] = None
+    """Optional connection limit of the DocumentDB instance the container connects to."""
+
+    mongodb_connection_ratio: float = 0.8
+    """The share of the DocumentDB connections the tasks of the service can open."""
+
+    mongodb_max_pool_size: Optional[int] = None
+    """Optional MongoDB connection pool size, overrides the derived size."""
+
+
+@dataclass
+class ServiceContainer:
+    """
+    Holds onto configuration for an additional application container in the service task.
+    The containers of a task share its network namespace and reach each other on localhost.
+
+    Attributes:
+      name: The name of the container.
+      location: A docker registry reference or a "path://" to build the container from local.
+      port: Optional container application port.
+      memory_reservation: The soft limit of memory in MiB to reserve from the task memory for the container.
+      env_vars: A json dictionary of environment variables to pass into the container.
+      secrets: List of `ServiceSecret` resources to pull from AWS secrets manager.
+      command: Optional commands to run during the container startup.
+      healthcheck: Optional health check configuration for the container.
+      depends_on: The containers of the task to wait for, keyed by name, before starting the container.
+      essential: Stop the task when the container stops.
+      asset_options: The docker build options used when building a "path://" container.
+    """
+
+    name: str
+    """The name of the container."""
+
+    location: str
+    """A docker registry reference or a "path://" to build the container from local."""
+
+    port: Optional[int] = None
+    """Optional container application port."""
+
+    memory_reservation: int = 512
+    """The soft limit of memory in MiB to reserve from the task memory for the container."""
+
+    env_vars: dict = field(default_factory=dict)
+    """A json dictionary of environment variables to pass into the container."""
+
+    secrets: List[ServiceSecret] = field(default_factory=list)
+    """List of `ServiceSecret` resources to pull from AWS secrets manager."""
+
+    command: Optional[Sequence[str]] = None
+    """Optional commands to run during the container startup."""
+
+    healthcheck: Optional[ecs.HealthCheck] = None
+    """Optional health check configuration for the container."""
+
+    depends_on: Dict[str, ecs.ContainerDependencyCondition] = field(
+        default_factory=dict
+    )
+    """The containers of the task to wait for, keyed by name, before starting the container."""
+
+    essential: bool = True
+    """Stop the task when the container stops."""
+
+    asset_options: ContainerAssetOptions = field(default_factory=ContainerAssetOptions)
+    """The docker build options used when building a "path://" container."""
+
+    def __post_init__(self) -> None:
+        self.from_path = CONTAINER_LOCATION_PATH_ID in self.location
+        if self.from_path:
+            self.location = self.location.removeprefix(CONTAINER_LOCATION_PATH_ID)
+
 
 class ServiceProps:
     """
@@ -57,11 +521,30 @@ class ServiceProps:
     container_env_vars: a json dictionary of environment variables to pass into the container
       i.e. {"EnvA": "EnvValueA", "EnvB": "EnvValueB"}
     container_secrets: List of `ServiceSecret` resources to pull from AWS secrets manager
-    container_volumes: List of `ContainerVolume` resources to mount into the container
+    container_volumes: List of `ContainerVolume` resources to mount into the container,
+      ECS currently attaches at most one EBS volume to each task
     auto_scale_min_capacity: the fargate auto scaling minimum capacity
     auto_scale_max_capacity: the fargate auto scaling maximum capacity
     container_command: Optional commands to run during the container startup
     container_healthcheck: Optional health check configuration for the container
+    container_logging: Optional `ContainerLogging` configuration, defaults to non-blocking `awslogs`
+    container_asset_options: Optional `ContainerAssetOptions` used when building a "path://" container
+    deployment_alarms: Optional `DeploymentAlarms` thresholds that roll back a deployment
+    container_tracing: Optional `ContainerTracing` to export the container spans to AWS X-Ray
+    container_depends_on: The containers of the task to wait for, keyed by name, before starting the container
+      i.e. {"model-ad-app": ecs.ContainerDependencyCondition.HEALTHY}
+    additional_containers: List of `ServiceContainer` to run in the task next to the container,
+      the containers share the task network and reach each other on localhost
+    task_cpu: the number of cpu units used by the task, 1024 is one vCPU
+    task_memory: the amount of memory in MiB used by the task
+    runtime_tuning: Optional `RuntimeTuning` to derive the Node.js heap, thread pool and MongoDB
+      connection pool sizes of the container from the task resources
+    container_runtime: Optional `ContainerRuntime` with the ulimits, init process, scratch paths and
+      stop timeout of the container
+    task_ephemeral_storage: Optional size in GiB (21 to 200) of the task ephemeral storage, defaults to 20
+    scaling_metrics: List of `ScalingMetric` custom metrics the service scales on in addition to the
+      cpu and memory utilization, the container logs are shipped in the EMF format through FireLens
+    predictive_scaling: Optional `PredictiveScaling` policy to launch tasks ahead of the forecast load
     """
 
     def __init__(
@@ -77,11 +560,27 @@ class ServiceProps:
         auto_scale_max_capacity: int = 1,
         container_command: Optional[Sequence[str]] = None,
         container_healthcheck: Optional[ecs.HealthCheck] = None,
+        container_logging: Optional[ContainerLogging] = None,
+        container_asset_options: Optional[ContainerAssetOptions] = None,
+        deployment_alarms: Optional[DeploymentAlarms] = None,
+        container_tracing: Optional[ContainerTracing] = None,
+        container_depends_on: Optional[
+            Dict[str, ecs.ContainerDependencyCondition]
+        ] = None,
+        additional_containers: Optional[List[ServiceContainer]] = None,
+        task_cpu: int = 2048,
+        task_memory: int = 4096,
+        runtime_tuning: Optional[RuntimeTuning] = None,
+        container_runtime: Optional[ContainerRuntime] = None,
+        task_ephemeral_storage: Optional[int] = None,
+        scaling_metrics: Optional[List[ScalingMetric]] = None,
+        predictive_scaling: Optional[PredictiveScaling] = None,
     ) -> None:
         self.container_name = container_name
         self.container_port = container_port
         self.container_memory_reservation = container_memory_reservation
-        if CONTAINER_LOCATION_PATH_ID in container_location:
+        self.container_from_path = CONTAINER_LOCATION_PATH_ID in container_location
+        if self.container_from_path:
             container_location = container_location.removeprefix(
                 CONTAINER_LOCATION_PATH_ID
             )
@@ -101,8 +600,121 @@ class ServiceProps:
             self.container_volumes = []
         else:
             self.container_volumes = container_volumes
+        # ECS attaches at most one EBS volume, configured at launch, to each task
+        if len(self.container_volumes) > 1:
+            raise ValueError(
+                f"{container_name} defines {len(self.container_volumes)} container volumes, "
+                "ECS supports only one EBS volume per task"
+            )
 
         self.auto_scale_min_capacity = auto_scale_min_capacity
         self.auto_scale_max_capacity = auto_scale_max_capacity
+        self.scaling_metrics = scaling_metrics or []
+        self.predictive_scaling = predictive_scaling
         self.container_command = container_command
         self.container_healthcheck = container_healthcheck
+
+        if container_asset_options is None:
+            self.container_asset_options = ContainerAssetOptions()
+        else:
+            self.container_asset_options = container_asset_options
+
+        self.deployment_alarms = deployment_alarms
+        self.container_tracing = container_tracing
+
+        if container_logging is None:
+            self.container_logging = ContainerLogging()
+        else:
+            self.container_logging = container_logging
+        self._validate_scaling_metrics()
+
+        if container_depends_on is None:
+            self.container_depends_on = {}
+        else:
+            self.container_depends_on = container_depends_on
+
+        if additional_containers is None:
+            self.additional_containers = []
+        else:
+            self.additional_containers = additional_containers
+        self._validate_containers()
+
+        self.task_cpu = task_cpu
+        self.task_memory = task_memory
+        self.task_ephemeral_storage = task_ephemeral_storage
+
+        if container_runtime is None:
+            self.container_runtime = ContainerRuntime()
+        else:
+            self.container_runtime = container_runtime
+
+        self.runtime_tuning = runtime_tuning
+        if runtime_tuning is not None:
+            # the configured env vars override the derived settings
+            self.container_env_vars = {
+                **self.runtime_env_vars(),
+                **self.container_env_vars,
+            }
+
+    def _validate_scaling_metrics(self) -> None:
+        """Check the container logs are shipped in the format the scaling metrics are read from"""
+        # CloudWatch only extracts the EMF metrics from the log streams written in the EMF format
+        if self.scaling_metrics and not self.container_logging.firelens:
+            raise ValueError(
+                f"{self.container_name} scales on the EMF metrics of its logs, they need FireLens logging"
+            )
+
+    def _validate_containers(self) -> None:
+        """Check the task container names are unique and the dependencies exist"""
+        container_names = [self.container_name] + [
+            container.name for container in self.additional_containers
+        ]
+        if len(set(container_names)) != len(container_names):
+            raise ValueError(
+                f"{self.container_name} task defines duplicate container names {container_names}"
+            )
+        dependencies = [self.container_depends_on] + [
+            container.depends_on for container in self.additional_containers
+        ]
+        for depends_on in dependencies:
+            for dependency_name in depends_on:
+                if dependency_name not in container_names:
+                    raise ValueError(
+                        f"{self.container_name} task has no container named {dependency_name} to depend on"
+                    )
+
+    def runtime_env_vars(self) -> Dict[str, str]:
+        """Derive the Node.js runtime env vars of the container from the task resources"""
+        tuning = self.runtime_tuning
+        # the container can use the task memory not reserved by the other containers
+        sidecar_memory = sum(
+            container.memory_reservation for container in self.additional_containers
+        )
+        if self.container_tracing is not None:
+            sidecar_memory += self.container_tracing.memory_reservation
+        if self.container_logging.firelens:
+            sidecar_memory += self.container_logging.firelens_memory_reservation
+        max_old_space_size = tuning.max_old_space_size or math.floor(
+            (self.task_memory - sidecar_memory) * tuning.heap_ratio
+        )
+        threadpool_size = tuning.threadpool_size or max(
+            4, math.ceil(self.task_cpu / 1024 * tuning.threads_per_vcpu)
+        )
+        env_vars = {}
+        if tuning.node_env is not None:
+            env_vars["NODE_ENV"] = tuning.node_env
+        env_vars["NODE_OPTIONS"] = f"--max-old-space-size={max_old_space_size}"
+        env_vars["UV_THREADPOOL_SIZE"] = str(threadpool_size)
+
+        # every task at the maximum capacity opens a pool of connections to each instance, the
+        # pools share the connection limit even when their share is over the driver default
+        if tuning.mongodb_max_pool_size is not None:
+            env_vars["MONGODB_MAX_POOL_SIZE"] = str(tuning.mongodb_max_pool_size)
+        elif tuning.mongodb_max_connections is not None:
+            max_pool_size = math.floor(
+                tuning.mongodb_max_connections
+                * tuning.mongodb_connection_ratio
+                / self.auto_scale_max_capacity
+            )
+            env_vars["MONGODB_MAX_POOL_SIZE"] = str(max(1, max_pool_size))
+        return env_vars
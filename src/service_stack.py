@@ -1,6 +1,11 @@
+from typing import List, Optional
+
 import aws_cdk as cdk
+import jsii
 from aws_cdk import Duration as duration
+from aws_cdk import aws_applicationautoscaling as appscaling
 from aws_cdk import aws_certificatemanager as acm
+from aws_cdk import aws_cloudwatch as cloudwatch
 from aws_cdk import aws_ec2 as ec2
 from aws_cdk import aws_ecs as ecs
 from aws_cdk import aws_elasticloadbalancingv2 as elbv2
@@ -10,17 +15,165 @@ from aws_cdk import aws_secretsmanager as sm
 from aws_cdk import Size as size
 from constructs import Construct
 
-from src.service_props import ServiceProps
+from src.service_props import (
+    ContainerAssetOptions,
+    ContainerLogging,
+    ContainerTracing,
+    DeploymentAlarms,
+    PredictiveScaling,
+    ScalingMetric,
+    ServiceProps,
+    ServiceSecret,
+)
 
 ALB_HTTP_LISTENER_PORT = 80
 ALB_HTTPS_LISTENER_PORT = 443
 
 
+def _scaling_metric(
+    scaling_metric: ScalingMetric, container_name: str
+) -> cloudwatch.Metric:
+    """Create the one minute metric of a custom scaling metric"""
+    dimensions = scaling_metric.dimensions
+    if dimensions is None:
+        dimensions = {"Service": container_name}
+    return _metric(
+        scaling_metric.namespace,
+        scaling_metric.metric_name,
+        scaling_metric.statistic,
+        dimensions,
+    )
+
+
+def _metric(
+    namespace: str, metric_name: str, statistic: str, dimensions: dict
+) -> cloudwatch.Metric:
+    """Create a one minute metric labeled with its statistic"""
+    return cloudwatch.Metric(
+        namespace=namespace,
+        metric_name=metric_name,
+        dimensions_map=dimensions,
+        statistic=statistic,
+        period=duration.minutes(1),
+        label=f"{metric_name} {statistic}",
+    )
+
+
+@jsii.implements(cdk.IStableListProducer)
+class _ListProducer:
+    """Produce the contents of a list as they are at synth time"""
+
+    def __init__(self, values: list) -> None:
+        self.values = values
+
+    def produce(self) -> list:
+        return self.values
+
+
+def _aws_log_driver(
+    stream_prefix: str,
+    logging_props: ContainerLogging,
+    log_retention: logs.RetentionDays = None,
+) -> ecs.LogDriver:
+    """Create an `awslogs` driver honoring the configured delivery mode"""
+    max_buffer_size = None
+    if logging_props.mode == ecs.AwsLogDriverMode.NON_BLOCKING:
+        max_buffer_size = size.mebibytes(logging_props.max_buffer_size)
+    return ecs.LogDrivers.aws_logs(
+        stream_prefix=stream_prefix,
+        log_retention=log_retention,
+        mode=logging_props.mode,
+        max_buffer_size=max_buffer_size,
+    )
+
+
+def _container_log_driver(
+    stream_prefix: str, logging_props: ContainerLogging, firelens_options: dict = None
+) -> ecs.LogDriver:
+    """Create the log driver of an application container, FireLens when its options are set"""
+    if firelens_options is not None:
+        return ecs.LogDrivers.firelens(options=firelens_options)
+    return _aws_log_driver(
+        stream_prefix,
+        logging_props,
+        logs.RetentionDays.FOUR_MONTHS,
+    )
+
+
+def _container_image(
+    location: str, from_path: bool, asset_options: ContainerAssetOptions
+) -> ecs.ContainerImage:
+    """Reference a registry image or build the image from source"""
+    if not from_path:
+        return ecs.ContainerImage.from_registry(location)
+    return ecs.ContainerImage.from_asset(
+        location,
+        build_args=asset_options.build_args or None,
+        target=asset_options.target,
+        platform=asset_options.platform,
+        cache_from=asset_options.cache_from or None,
+        cache_to=asset_options.cache_to,
+        exclude=asset_options.exclude or None,
+        file=asset_options.file,
+    )
+
+
+def _get_secret(scope: Construct, id: str, name: str) -> sm.Secret:
+    """Get a secret from the AWS secrets manager"""
+    isecret = sm.Secret.from_secret_name_v2(scope, id, name)
+    return ecs.Secret.from_secrets_manager(isecret)
+
+
+def _container_secrets(
+    scope: Construct, id_prefix: str, container_secrets: List[ServiceSecret]
+) -> dict:
+    """Get the secrets of a container keyed by their environment variable"""
+    secrets = {}
+    for secret in container_secrets:
+        secrets[secret.environment_key] = _get_secret(
+            scope, f"{id_prefix}{secret.environment_key}", secret.secret_name
+        )
+    return secrets
+
+
+def _port_mappings(container_name: str, container_port: Optional[int]) -> list:
+    """Map the application port of a container, named after the container"""
+    if container_port is None:
+        return None
+    return [
+        ecs.PortMapping(
+            name=container_name,
+            container_port=container_port,
+            protocol=ecs.Protocol.TCP,
+        )
+    ]
+
+
+def _tracing_env_vars(
+    container_name: str, env_vars: dict, tracing_props: Optional[ContainerTracing]
+) -> dict:
+    """Add the OpenTelemetry exporter settings to the environment of a traced container"""
+    if tracing_props is None:
+        return env_vars
+    return {
+        "OTEL_SERVICE_NAME": container_name,
+        "OTEL_EXPORTER_OTLP_ENDPOINT": "http://localhost:4318",
+        "OTEL_EXPORTER_OTLP_PROTOCOL": "http/protobuf",
+        "OTEL_PROPAGATORS": "tracecontext,baggage,xray",
+        "OTEL_TRACES_SAMPLER": "parentbased_traceidratio",
+        "OTEL_TRACES_SAMPLER_ARG": str(tracing_props.sampling_ratio),
+        **env_vars,
+    }
+
+
 class ServiceStack(cdk.Stack):
     """
     ECS Service stack
     """
 
+    # the stacks that route load balancer requests to the service through a target group
+    load_balanced = False
+
     def __init__(
         self,
         scope: Construct,
@@ -30,8 +183,25 @@ class ServiceStack(cdk.Stack):
         props: ServiceProps,
         **kwargs,
     ) -> None:
+        deployment_alarms = props.deployment_alarms
+        if (
+            not self.load_balanced
+            and deployment_alarms is not None
+            and (
+                deployment_alarms.target_p99_latency is not None
+                or deployment_alarms.target_5xx_rate is not None
+            )
+        ):
+            raise ValueError(
+                f"{construct_id} has load balancer target alarms but no target group, "
+                "use a LoadBalancedServiceStack or a ListenerRuleServiceStack"
+            )
+
         super().__init__(scope, construct_id, **kwargs)
 
+        # the load balanced stacks name their target group, the dashboard searches its metrics by name
+        self.target_group_name = None
+
         # allow containers default task access and s3 bucket access
         task_role = iam.Role(
             self,
@@ -84,48 +254,161 @@ class ServiceStack(cdk.Stack):
         self.task_definition = ecs.FargateTaskDefinition(
             self,
             "TaskDef",
-            cpu=2048,
-            memory_limit_mib=4096,
+            cpu=props.task_cpu,
+            memory_limit_mib=props.task_memory,
+            ephemeral_storage_gib=props.task_ephemeral_storage,
             task_role=task_role,
             execution_role=execution_role,
         )
 
-        image = ecs.ContainerImage.from_registry(props.container_location)
-        if "path://" in props.container_location:  # build container from source
-            location = props.container_location.removeprefix("path://")
-            image = ecs.ContainerImage.from_asset(location)
-
-        def _get_secret(scope: Construct, id: str, name: str) -> sm.Secret:
-            """Get a secret from the AWS secrets manager"""
-            isecret = sm.Secret.from_secret_name_v2(scope, id, name)
-            return ecs.Secret.from_secrets_manager(isecret)
+        # ship logs with awslogs, or through a FireLens Fluent Bit sidecar that batches
+        # and filters them before they reach CloudWatch
+        logging_props = props.container_logging
+        firelens_options = None
+        if logging_props.firelens:
+            log_group = logs.LogGroup(
+                self,
+                "ContainerLogGroup",
+                retention=logs.RetentionDays.FOUR_MONTHS,
+            )
+            self.task_definition.add_firelens_log_router(
+                "LogRouter",
+                image=ecs.ContainerImage.from_registry(logging_props.firelens_image),
+                memory_reservation_mib=logging_props.firelens_memory_reservation,
+                firelens_config=ecs.FirelensConfig(
+                    type=ecs.FirelensLogRouterType.FLUENTBIT,
+                    options=(
+                        ecs.FirelensOptions(
+                            config_file_value=logging_props.firelens_config_file,
+                        )
+                        if logging_props.firelens_config_file
+                        else None
+                    ),
+                ),
+                logging=_aws_log_driver(
+                    f"{construct_id}-firelens",
+                    logging_props,
+                    logs.RetentionDays.FOUR_MONTHS,
+                ),
+            )
+            firelens_options = {
+                "Name": "cloudwatch_logs",
+                "region": self.region,
+                "log_group_name": log_group.log_group_name,
+                "log_stream_prefix": f"{construct_id}/",
+            }
+            if props.scaling_metrics:
+                # send the raw log lines in the EMF format, CloudWatch extracts the metrics the
+                # service scales on from the lines written as EMF documents
+                firelens_options["log_key"] = "log"
+                firelens_options["log_format"] = "json/emf"
+            if logging_props.mode == ecs.AwsLogDriverMode.NON_BLOCKING:
+                # bytes buffered by the FireLens log driver before dropping logs
+                firelens_options["log-driver-buffer-limit"] = str(
+                    size.mebibytes(logging_props.max_buffer_size).to_bytes()
+                )
+            firelens_options.update(logging_props.firelens_options)
 
-        secrets = {}
-        for secret in props.container_secrets:
-            secrets[secret.environment_key] = _get_secret(
-                self, f"sm-secrets-{secret.environment_key}", secret.secret_name
+        # export spans through an ADOT collector sidecar, the trace context is propagated in
+        # the request headers through the load balancer and the Service Connect proxies
+        tracing_props = props.container_tracing
+        if tracing_props is not None:
+            task_role.add_managed_policy(
+                iam.ManagedPolicy.from_aws_managed_policy_name("AWSXrayWriteOnlyAccess")
+            )
+            self.collector_container = self.task_definition.add_container(
+                "otel-collector",
+                image=ecs.ContainerImage.from_registry(tracing_props.image),
+                command=[f"--config={tracing_props.config}"],
+                memory_reservation_mib=tracing_props.memory_reservation,
+                essential=False,
+                logging=_aws_log_driver(
+                    f"{construct_id}-otel-collector",
+                    props.container_logging,
+                    logs.RetentionDays.FOUR_MONTHS,
+                ),
             )
 
+        runtime_props = props.container_runtime
         self.container = self.task_definition.add_container(
             props.container_name,
-            image=image,
+            image=_container_image(
+                props.container_location,
+                props.container_from_path,
+                props.container_asset_options,
+            ),
             memory_reservation_mib=props.container_memory_reservation,
-            environment=props.container_env_vars,
-            secrets=secrets,
-            port_mappings=[
-                ecs.PortMapping(
-                    name=props.container_name,
-                    container_port=props.container_port,
-                    protocol=ecs.Protocol.TCP,
-                )
-            ],
-            logging=ecs.LogDrivers.aws_logs(
-                stream_prefix=f"{construct_id}",
-                log_retention=logs.RetentionDays.FOUR_MONTHS,
+            environment=_tracing_env_vars(
+                props.container_name, props.container_env_vars, tracing_props
+            ),
+            secrets=_container_secrets(self, "sm-secrets-", props.container_secrets),
+            port_mappings=_port_mappings(props.container_name, props.container_port),
+            logging=_container_log_driver(
+                construct_id, logging_props, firelens_options
             ),
             command=props.container_command,
             health_check=props.container_healthcheck,
+            ulimits=runtime_props.ulimits or None,
+            linux_parameters=(
+                ecs.LinuxParameters(self, "LinuxParameters", init_process_enabled=True)
+                if runtime_props.init_process_enabled
+                else None
+            ),
+            stop_timeout=(
+                duration.seconds(runtime_props.stop_timeout)
+                if runtime_props.stop_timeout is not None
+                else None
+            ),
         )
+        # the load balancer targets the default container, which would otherwise be the
+        # first essential sidecar added
+        self.task_definition.default_container = self.container
+
+        # Fargate does not support tmpfs mounts, scratch data is written to bind mounts on the
+        # task ephemeral storage to keep it off the copy-on-write overlay filesystem
+        scratch_volume_names = runtime_props.scratch_volume_names()
+        for scratch_path, scratch_volume_name in scratch_volume_names.items():
+            self.task_definition.add_volume(name=scratch_volume_name)
+            self.container.add_mount_points(
+                ecs.MountPoint(
+                    container_path=scratch_path,
+                    source_volume=scratch_volume_name,
+                    read_only=False,
+                )
+            )
+
+        # additional containers share the task network namespace, they reach each other on localhost
+        self.additional_containers = {}
+        for container_props in props.additional_containers:
+            self.additional_containers[container_props.name] = (
+                self.task_definition.add_container(
+                    container_props.name,
+                    image=_container_image(
+                        container_props.location,
+                        container_props.from_path,
+                        container_props.asset_options,
+                    ),
+                    memory_reservation_mib=container_props.memory_reservation,
+                    environment=_tracing_env_vars(
+                        container_props.name, container_props.env_vars, tracing_props
+                    ),
+                    secrets=_container_secrets(
+                        self,
+                        f"sm-secrets-{container_props.name}-",
+                        container_props.secrets,
+                    ),
+                    port_mappings=_port_mappings(
+                        container_props.name, container_props.port
+                    ),
+                    logging=_container_log_driver(
+                        construct_id, logging_props, firelens_options
+                    ),
+                    command=container_props.command,
+                    health_check=container_props.healthcheck,
+                    essential=container_props.essential,
+                )
+            )
+        self._add_container_dependencies(props)
 
         # attach ECS task to ECS cluster
         self.service = ecs.FargateService(
@@ -136,7 +419,7 @@ class ServiceStack(cdk.Stack):
             enable_execute_command=True,
             circuit_breaker=ecs.DeploymentCircuitBreaker(enable=True, rollback=True),
             service_connect_configuration=ecs.ServiceConnectProps(
-                log_driver=ecs.LogDrivers.aws_logs(stream_prefix=f"{construct_id}"),
+                log_driver=_aws_log_driver(f"{construct_id}", logging_props),
                 services=[
                     ecs.ServiceConnectService(
                         port_mapping_name=props.container_name,
@@ -158,36 +441,56 @@ class ServiceStack(cdk.Stack):
             ],
         )
         self.service.connections.allow_from_any_ipv4(ec2.Port.tcp(props.container_port))
+        self.service_dimensions = {
+            "ClusterName": cluster.cluster_name,
+            "ServiceName": self.service.service_name,
+        }
+        self.service_connect_dimensions = {
+            **self.service_dimensions,
+            "DiscoveryName": props.container_name,
+        }
 
         # Setup AutoScaling policy
-        scaling = self.service.auto_scale_task_count(
+        self.scaling = self.service.auto_scale_task_count(
             min_capacity=props.auto_scale_min_capacity,
             max_capacity=props.auto_scale_max_capacity,
         )
-        scaling.scale_on_cpu_utilization(
+        self.scaling.scale_on_cpu_utilization(
             "CpuScaling",
             target_utilization_percent=50,
         )
-        scaling.scale_on_memory_utilization(
+        self.scaling.scale_on_memory_utilization(
             "MemoryScaling",
             target_utilization_percent=50,
         )
+        self._add_metric_scaling(props, task_role)
+        if props.predictive_scaling is not None:
+            self._add_predictive_scaling(props.predictive_scaling)
 
-        # mount volumes
+        # mount volumes, an unnamed volume keeps the container name for backwards compatibility
         for container_volume in props.container_volumes:
+            if container_volume.name is None:
+                volume_id = "ContainerVolume"
+                volume_name = props.container_name
+            else:
+                volume_id = f"ContainerVolume-{container_volume.name}"
+                volume_name = container_volume.name
+
             service_volume = ecs.ServiceManagedVolume(
                 self,
-                "ContainerVolume",
-                name=props.container_name,
+                volume_id,
+                name=volume_name,
                 managed_ebs_volume=ecs.ServiceManagedEBSVolumeConfiguration(
                     size=size.gibibytes(container_volume.size),
                     volume_type=ec2.EbsDeviceVolumeType.GP3,
+                    iops=container_volume.iops,
+                    throughput=container_volume.throughput,
+                    file_system_type=container_volume.file_system_type,
+                    snap_shot_id=container_volume.snapshot_id,
                 ),
             )
 
-            self.task_definition.add_volume(
-                name=props.container_name, configured_at_launch=True
-            )
+            self.task_definition.add_volume(name=volume_name, configured_at_launch=True)
             self.service.add_volume(service_volume)
 
             service_volume.mount_in(
@@ -196,6 +499,197 @@ class ServiceStack(cdk.Stack):
                 read_only=container_volume.read_only,
             )
 
+        # roll back deployments that regress the latency of internal requests
+        self.deployment_alarm_names = []
+        if (
+            deployment_alarms is not None
+            and deployment_alarms.service_connect_p99_latency is not None
+        ):
+            self.add_deployment_alarm(
+                "ServiceConnectLatencyAlarm",
+                "service-connect-p99-latency",
+                _metric(
+                    "AWS/ECS",
+                    "TargetResponseTime",
+                    "p99",
+                    self.service_connect_dimensions,
+                ),
+                deployment_alarms.service_connect_p99_latency,
+                deployment_alarms,
+            )
+
+    def _add_metric_scaling(self, props: ServiceProps, task_role: iam.Role) -> None:
+        """Scale on the custom metrics published by the containers"""
+        if not props.scaling_metrics:
+            return
+
+        # the containers publish with PutMetricData or EMF logs, only to the scaling namespaces
+        namespaces = sorted({metric.namespace for metric in props.scaling_metrics})
+        task_role.add_to_policy(
+            iam.PolicyStatement(
+                actions=["cloudwatch:PutMetricData"],
+                resources=["*"],
+                conditions={"StringEquals": {"cloudwatch:namespace": namespaces}},
+            )
+        )
+
+        for scaling_metric in props.scaling_metrics:
+            metric = _scaling_metric(scaling_metric, props.container_name)
+            if scaling_metric.target_value is not None:
+                self.scaling.scale_to_track_custom_metric(
+                    f"{scaling_metric.metric_name}Scaling",
+                    metric=metric,
+                    target_value=scaling_metric.target_value,
+                    scale_in_cooldown=duration.seconds(
+                        scaling_metric.scale_in_cooldown
+                    ),
+                    scale_out_cooldown=duration.seconds(
+                        scaling_metric.scale_out_cooldown
+                    ),
+                )
+            else:
+                self.scaling.scale_on_metric(
+                    f"{scaling_metric.metric_name}Scaling",
+                    metric=metric,
+                    scaling_steps=scaling_metric.scaling_steps,
+                    adjustment_type=appscaling.AdjustmentType.CHANGE_IN_CAPACITY,
+                    cooldown=duration.seconds(scaling_metric.scale_out_cooldown),
+                )
+
+    def _add_predictive_scaling(self, predictive_scaling: PredictiveScaling) -> None:
+        """Launch tasks ahead of the load forecast from the history of the service"""
+        # the L2 scalable task count has no predictive scaling, attach the policy to its target
+        scalable_target = self.scaling.node.find_child("Target")
+        cfn_policy = appscaling.CfnScalingPolicy
+        cfn_policy(
+            self,
+            "PredictiveScaling",
+            policy_name=f"{self.stack_name}-predictive-scaling",
+            policy_type="PredictiveScaling",
+            scaling_target_id=scalable_target.scalable_target_id,
+            predictive_scaling_policy_configuration=cfn_policy.PredictiveScalingPolicyConfigurationProperty(
+                mode=predictive_scaling.mode,
+                scheduling_buffer_time=predictive_scaling.scheduling_buffer_time,
+                max_capacity_breach_behavior=predictive_scaling.max_capacity_breach_behavior,
+                max_capacity_buffer=predictive_scaling.max_capacity_buffer,
+                metric_specifications=[
+                    cfn_policy.PredictiveScalingMetricSpecificationProperty(
+                        target_value=predictive_scaling.target_value,
+                        predefined_metric_pair_specification=cfn_policy.PredictiveScalingPredefinedMetricPairProperty(
+                            predefined_metric_type=predictive_scaling.metric_type,
+                        ),
+                    )
+                ],
+            ),
+        )
+
+    def _add_container_dependencies(self, props: ServiceProps) -> None:
+        """Order the start up of the containers in the task"""
+        containers = {
+            props.container_name: self.container,
+            **self.additional_containers,
+        }
+        depends_on = {props.container_name: props.container_depends_on}
+        for container_props in props.additional_containers:
+            depends_on[container_props.name] = container_props.depends_on
+        # the application containers export their spans to the collector once it started
+        if props.container_tracing is not None:
+            containers["otel-collector"] = self.collector_container
+            for container_name, dependencies in depends_on.items():
+                depends_on[container_name] = {
+                    "otel-collector": ecs.ContainerDependencyCondition.START,
+                    **dependencies,
+                }
+
+        for container_name, dependencies in depends_on.items():
+            for dependency_name, condition in dependencies.items():
+                containers[container_name].add_container_dependencies(
+                    ecs.ContainerDependency(
+                        container=containers[dependency_name], condition=condition
+                    )
+                )
+
+    def add_deployment_alarm(
+        self,
+        alarm_id: str,
+        alarm_name_suffix: str,
+        metric: cloudwatch.IMetric,
+        threshold: float,
+        deployment_alarms: DeploymentAlarms,
+    ) -> cloudwatch.Alarm:
+        """Create an alarm that rolls back the service deployment when the metric exceeds the threshold"""
+        # the alarm name is set explicitly, the service referencing the alarm by a token while the
+        # alarm metric references the service would be a circular dependency
+        alarm_name = f"{self.stack_name}-{alarm_name_suffix}"
+        alarm = cloudwatch.Alarm(
+            self,
+            alarm_id,
+            alarm_name=alarm_name,
+            metric=metric,
+            threshold=threshold,
+            evaluation_periods=deployment_alarms.evaluation_periods,
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+        )
+        if not self.deployment_alarm_names:
+            # deployment alarms can only be enabled once, later alarms are added to the lazy list
+            self.service.enable_deployment_alarms(
+                cdk.Lazy.list(_ListProducer(self.deployment_alarm_names)),
+                behavior=ecs.AlarmBehavior.ROLLBACK_ON_ALARM,
+            )
+        self.deployment_alarm_names.append(alarm_name)
+        return alarm
+
+    def add_target_group_monitoring(
+        self,
+        target_group: elbv2.ApplicationTargetGroup,
+        props: ServiceProps,
+        requests_per_target: int = None,
+    ) -> None:
+        """Scale on the requests and alarm on the responses of a load balancer target group"""
+        if requests_per_target is not None:
+            self.scaling.scale_on_request_count(
+                "RequestCountScaling",
+                requests_per_target=requests_per_target,
+                target_group=target_group,
+            )
+
+        # roll back deployments that regress the latency or error rate of public requests
+        deployment_alarms = props.deployment_alarms
+        if deployment_alarms is not None:
+            if deployment_alarms.target_p99_latency is not None:
+                self.add_deployment_alarm(
+                    "TargetLatencyAlarm",
+                    "alb-p99-latency",
+                    target_group.metrics.target_response_time(
+                        statistic="p99", period=duration.minutes(1)
+                    ),
+                    # the load balancer reports the target response time in seconds
+                    deployment_alarms.target_p99_latency / 1000,
+                    deployment_alarms,
+                )
+            if deployment_alarms.target_5xx_rate is not None:
+                self.add_deployment_alarm(
+                    "Target5xxRateAlarm",
+                    "alb-5xx-rate",
+                    cloudwatch.MathExpression(
+                        expression="100 * errors / requests",
+                        using_metrics={
+                            "errors": target_group.metrics.http_code_target(
+                                elbv2.HttpCodeTarget.TARGET_5XX_COUNT,
+                                period=duration.minutes(1),
+                            ),
+                            "requests": target_group.metrics.request_count(
+                                period=duration.minutes(1)
+                            ),
+                        },
+                        label="5xx rate",
+                        period=duration.minutes(1),
+                    ),
+                    deployment_alarms.target_5xx_rate,
+                    deployment_alarms,
+                )
+
 
 class LoadBalancedServiceStack(ServiceStack):
     """
@@ -207,8 +701,12 @@ class LoadBalancedServiceStack(ServiceStack):
 
     To work around this problem we use the "Split at listener" option from
     https://github.com/aws-samples/aws-cdk-examples
+
+    requests_per_target: Optional number of requests per target to scale the service on
     """
 
+    load_balanced = True
+
     def __init__(
         self,
         scope: Construct,
@@ -220,9 +718,17 @@ class LoadBalancedServiceStack(ServiceStack):
         certificate_id: str,
         health_check_path: str = "/",
         health_check_interval: int = 1,  # max is 5
+        requests_per_target: int = None,
         **kwargs,
     ) -> None:
-        super().__init__(scope, construct_id, vpc, cluster, props, **kwargs)
+        super().__init__(
+            scope,
+            construct_id,
+            vpc,
+            cluster,
+            props,
+            **kwargs,
+        )
 
         # -------------------
         # ACM Certificate for HTTPS
@@ -247,8 +753,10 @@ class LoadBalancedServiceStack(ServiceStack):
             certificates=[self.cert],
         )
 
-        https_listener.add_targets(
+        self.target_group_name = construct_id
+        self.target_group = https_listener.add_targets(
             "HttpsTarget",
+            target_group_name=self.target_group_name,
             port=props.container_port,
             protocol=elbv2.ApplicationProtocol.HTTP,
             targets=[self.service],
@@ -277,3 +785,95 @@ class LoadBalancedServiceStack(ServiceStack):
                 permanent=True,
             ),
         )
+
+        self.add_target_group_monitoring(
+            self.target_group,
+            props,
+            requests_per_target=requests_per_target,
+        )
+
+
+class ListenerRuleServiceStack(ServiceStack):
+    """
+    An ECS service registered on a shared HTTPS listener with a path and/or host based listener
+    rule, several services can then be routed from the same load balancer (i.e. `/api/*` to the API
+    and the rest to the frontend). The target group and the listener rule are created in this stack
+    so the service is attached to the load balancer before it is created.
+
+    listener: the shared HTTPS listener, i.e. `LoadBalancerStack.https_listener`
+    priority: the listener rule priority, lower values are evaluated first
+    path_patterns: Optional request path patterns routed to the service (i.e. ["/api/*"])
+    host_headers: Optional request host headers routed to the service
+    health_check_path: the target group health check path
+    health_check_interval: the target group health check interval in minutes, max is 5
+    health_check_healthy_codes: Optional HTTP codes of a healthy target (i.e. "200-399")
+    requests_per_target: Optional number of requests per target to scale the service on
+    """
+
+    load_balanced = True
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        vpc: ec2.Vpc,
+        cluster: ecs.Cluster,
+        props: ServiceProps,
+        listener: elbv2.ApplicationListener,
+        priority: int,
+        path_patterns: List[str] = None,
+        host_headers: List[str] = None,
+        health_check_path: str = "/",
+        health_check_interval: int = 1,
+        health_check_healthy_codes: Optional[str] = None,
+        requests_per_target: int = None,
+        **kwargs,
+    ) -> None:
+        conditions = []
+        if path_patterns:
+            conditions.append(elbv2.ListenerCondition.path_patterns(path_patterns))
+        if host_headers:
+            conditions.append(elbv2.ListenerCondition.host_headers(host_headers))
+        if not conditions:
+            raise ValueError(
+                f"{construct_id} listener rule needs path patterns or host headers"
+            )
+
+        super().__init__(
+            scope,
+            construct_id,
+            vpc,
+            cluster,
+            props,
+            **kwargs,
+        )
+
+        self.target_group_name = construct_id
+        self.target_group = elbv2.ApplicationTargetGroup(
+            self,
+            "TargetGroup",
+            target_group_name=self.target_group_name,
+            vpc=vpc,
+            port=props.container_port,
+            protocol=elbv2.ApplicationProtocol.HTTP,
+            targets=[self.service],
+            health_check=elbv2.HealthCheck(
+                path=health_check_path,
+                interval=duration.minutes(health_check_interval),
+                healthy_http_codes=health_check_healthy_codes,
+            ),
+        )
+        self.listener_rule = elbv2.ApplicationListenerRule(
+            self,
+            "ListenerRule",
+            listener=listener,
+            priority=priority,
+            conditions=conditions,
+            target_groups=[self.target_group],
+        )
+
+        self.add_target_group_monitoring(
+            self.target_group,
+            props,
+            requests_per_target=requests_per_target,
+        )
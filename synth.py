@@ -0,0 +1,232 @@
+"""
+Synthesize several environments in parallel, each into its own output directory.
+
+Each environment is synthesized in its own worker process (and jsii runtime). The image tags
+are looked up once per GHCR package version and shared by all the workers, this process never
+imports the CDK so the workers' start up is the only runtime start up paid.
+
+i.e. `python synth.py dev stage prod` writes `cdk.out/dev`, `cdk.out/stage` and `cdk.out/prod`
+
+With `--watch` the workers keep running: on a change of app.py, the `src` modules or the data
+files they read, only the changed modules and the modules importing them are reloaded, and the
+environment is synthesized again in the warm worker.
+"""
+
+import argparse
+import ast
+import glob
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from graphlib import TopologicalSorter
+from typing import Dict, List, Optional, Set
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CDK_JSON = os.path.join(ROOT, "cdk.json")
+CDK_CONTEXT_JSON = os.path.join(ROOT, "cdk.context.json")
+# the files the app is built from, the JSON files are data read while building the app
+WATCHED_PATTERNS = ["app.py", "src/**/*.py", "*.json"]
+WATCH_INTERVAL = 0.25
+
+
+def load_context() -> dict:
+    """Load the context the CDK CLI would pass to the app from cdk.json and cdk.context.json"""
+    context = {}
+    with open(CDK_JSON) as cdk_json:
+        context.update(json.load(cdk_json).get("context", {}))
+    if os.path.exists(CDK_CONTEXT_JSON):
+        with open(CDK_CONTEXT_JSON) as cdk_context_json:
+            context.update(json.load(cdk_context_json))
+    return context
+
+
+def reload_context(changed_files: List[str], context: dict) -> dict:
+    """Load the context again when cdk.json or cdk.context.json changed"""
+    if {CDK_JSON, CDK_CONTEXT_JSON} & set(changed_files):
+        return load_context()
+    return context
+
+
+def synth_environment(
+    environment: str, outdir: str, context: dict, image_versions_cache, lock
+) -> str:
+    """Synthesize a single environment, runs in a worker process"""
+    from app import build_app, get_environment_variables, get_image_versions
+
+    package_version = get_environment_variables(environment)["GHCR_PACKAGE_VERSION"]
+    with lock:
+        if package_version not in image_versions_cache:
+            image_versions_cache[package_version] = get_image_versions(package_version)
+    image_versions = image_versions_cache[package_version]
+    print(
+        f"Using images for {environment}: "
+        + ", ".join(f"{name}:{version}" for name, version in image_versions.items())
+    )
+
+    build_app(environment, image_versions, outdir=outdir, context=context).synth()
+    return outdir
+
+
+def get_watched_files() -> Dict[str, float]:
+    """Map each file the app is built from to its modification time"""
+    mtimes = {}
+    for pattern in WATCHED_PATTERNS:
+        for path in glob.glob(os.path.join(ROOT, pattern), recursive=True):
+            mtimes[path] = os.stat(path).st_mtime
+    return mtimes
+
+
+def get_module_name(path: str) -> Optional[str]:
+    """The name a Python file is imported with, i.e. src/helpers/capacity_plan.py is src.helpers.capacity_plan"""
+    relative_path = os.path.relpath(path, ROOT)
+    if not relative_path.endswith(".py"):
+        return None
+    module_name = relative_path.removesuffix(".py").replace(os.sep, ".")
+    return module_name.removesuffix(".__init__")
+
+
+def get_local_imports(path: str, module_names: Set[str]) -> Set[str]:
+    """The modules of the project a Python file imports"""
+    with open(path) as source:
+        tree = ast.parse(source.read(), path)
+    imports = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module is not None:
+            imports.add(node.module)
+            imports.update(f"{node.module}.{alias.name}" for alias in node.names)
+    return imports & module_names
+
+
+def get_stale_modules(
+    changed_modules: Set[str], dependencies: Dict[str, Set[str]]
+) -> List[str]:
+    """The changed modules and the modules importing them, each after the modules it imports"""
+    stale = set(changed_modules)
+    while True:
+        dependents = {
+            module_name
+            for module_name, imports in dependencies.items()
+            if imports & stale
+        }
+        if dependents <= stale:
+            break
+        stale |= dependents
+    return [
+        module_name
+        for module_name in TopologicalSorter(dependencies).static_order()
+        if module_name in stale
+    ]
+
+
+def reload_modules(changed_files: List[str]) -> List[str]:
+    """Reload the changed modules, and the modules importing them, that are already imported"""
+    module_paths = {
+        get_module_name(path): path
+        for path in get_watched_files()
+        if get_module_name(path) is not None
+    }
+    dependencies = {
+        module_name: get_local_imports(path, set(module_paths))
+        for module_name, path in module_paths.items()
+    }
+    changed_modules = {
+        get_module_name(path)
+        for path in changed_files
+        if get_module_name(path) is not None
+    }
+    reloaded = []
+    for module_name in get_stale_modules(changed_modules, dependencies):
+        if module_name in sys.modules:
+            importlib.reload(sys.modules[module_name])
+            reloaded.append(module_name)
+    return reloaded
+
+
+def watch_environment(
+    environment: str, outdir: str, context: dict, image_versions_cache, lock
+) -> None:
+    """Synthesize an environment again on each change of its files, runs in a worker process"""
+    mtimes = get_watched_files()
+    synth_environment(environment, outdir, context, image_versions_cache, lock)
+    print(f"Watching {environment}, synthesized to {outdir}")
+    while True:
+        time.sleep(WATCH_INTERVAL)
+        current_mtimes = get_watched_files()
+        # a removed file is a change too, i.e. a deleted cdk.context.json
+        changed_files = [
+            path
+            for path in current_mtimes.keys() | mtimes.keys()
+            if mtimes.get(path) != current_mtimes.get(path)
+        ]
+        mtimes = current_mtimes
+        if not changed_files:
+            continue
+
+        start = time.perf_counter()
+        try:
+            context = reload_context(changed_files, context)
+            reloaded = reload_modules(changed_files)
+            # the image tags were looked up by the first synth and are shared by the workers
+            synth_environment(environment, outdir, context, image_versions_cache, lock)
+        except Exception:
+            # keep watching, the next change may fix the error
+            traceback.print_exc()
+            continue
+        print(
+            f"Synthesized {environment} in {time.perf_counter() - start:.2f}s"
+            + (f", reloaded {', '.join(reloaded)}" if reloaded else "")
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("environments", nargs="+", help="environments to synthesize")
+    parser.add_argument(
+        "--output", default="cdk.out", help="root of the per environment output dirs"
+    )
+    parser.add_argument(
+        "--max-workers", type=int, default=None, help="number of worker processes"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="synthesize again on each change of the app, until interrupted",
+    )
+    args = parser.parse_args(argv)
+    if args.watch and args.max_workers is not None:
+        parser.error("--watch runs a worker per environment")
+
+    context = load_context()
+
+    # spawn the workers so each one starts a clean jsii runtime instead of a forked copy
+    mp_context = multiprocessing.get_context("spawn")
+    with mp_context.Manager() as manager, ProcessPoolExecutor(
+        max_workers=args.max_workers or len(args.environments),
+        mp_context=mp_context,
+    ) as executor:
+        image_versions_cache = manager.dict()
+        lock = manager.Lock()
+        futures = {
+            environment: executor.submit(
+                watch_environment if args.watch else synth_environment,
+                environment,
+                os.path.join(args.output, environment),
+                context,
+                image_versions_cache,
+                lock,
+            )
+            for environment in args.environments
+        }
+        for environment, future in futures.items():
+            print(f"Synthesized {environment} to {future.result()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Shared fixtures synthesizing the full app of each environment once per test session.
+
+The templates are compared to the golden snapshots in `snapshots/<environment>/` by test_app.py,
+run the tests with `UPDATE_SNAPSHOTS=1` to write the snapshots after an intended change and
+review the diff.
+"""
+
+import json
+import os
+import re
+from typing import Dict
+
+import pytest
+
+import app
+import synth
+
+# stub image tags, the app is synthesized without looking them up
+IMAGE_VERSIONS = {image_name: "1.0.0" for image_name in app.IMAGE_NAMES}
+# the file assets bundled by the CDK (i.e. custom resource handlers) change with its version
+ASSET_KEY_PATTERN = re.compile(r"[0-9a-f]{64}\.zip")
+
+
+def normalize_template(template: dict) -> dict:
+    """Strip the values of a template that change without a change of the app"""
+    return json.loads(ASSET_KEY_PATTERN.sub("<asset>.zip", json.dumps(template)))
+
+
+@pytest.fixture(scope="session")
+def environment_templates(tmp_path_factory) -> Dict[str, Dict[str, dict]]:
+    """Map each environment to the normalized templates of its stacks, keyed by stack name"""
+    context = {**synth.load_context(), "aws:cdk:version-reporting": False}
+    templates = {}
+    for environment in app.VALID_ENVIRONMENTS:
+        cloud_assembly = app.build_app(
+            environment,
+            IMAGE_VERSIONS,
+            outdir=str(tmp_path_factory.mktemp(environment)),
+            context=context,
+        ).synth()
+        templates[environment] = {
+            stack.stack_name: normalize_template(stack.template)
+            for stack in cloud_assembly.stacks
+        }
+    return templates
+
+
+@pytest.fixture(scope="session")
+def update_snapshots() -> bool:
+    return os.environ.get("UPDATE_SNAPSHOTS") == "1"
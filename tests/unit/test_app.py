@@ -0,0 +1,72 @@
+import json
+import os
+
+import pytest
+
+import app
+
+SNAPSHOTS_PATH = os.path.join(os.path.dirname(__file__), "snapshots")
+
+
+@pytest.mark.parametrize("environment", app.VALID_ENVIRONMENTS)
+def test_app_matches_snapshots(environment, environment_templates, update_snapshots):
+    snapshots_path = os.path.join(SNAPSHOTS_PATH, environment)
+    templates = environment_templates[environment]
+
+    if update_snapshots:
+        os.makedirs(snapshots_path, exist_ok=True)
+        for snapshot in os.listdir(snapshots_path):
+            os.remove(os.path.join(snapshots_path, snapshot))
+        for stack_name, template in templates.items():
+            with open(
+                os.path.join(snapshots_path, f"{stack_name}.json"), "w"
+            ) as snapshot:
+                json.dump(template, snapshot, indent=2, sort_keys=True)
+                snapshot.write("\n")
+
+    snapshots = {}
+    for snapshot_file in sorted(os.listdir(snapshots_path)):
+        with open(os.path.join(snapshots_path, snapshot_file)) as snapshot:
+            snapshots[snapshot_file.removesuffix(".json")] = json.load(snapshot)
+
+    assert sorted(templates) == sorted(
+        snapshots
+    ), "The stacks changed, run the tests with UPDATE_SNAPSHOTS=1 and review the diff"
+    for stack_name, template in templates.items():
+        assert (
+            template == snapshots[stack_name]
+        ), f"{stack_name} changed, run the tests with UPDATE_SNAPSHOTS=1 and review the diff"
+
+
+def test_app_load_test_in_dev_only(environment_templates):
+    for environment, templates in environment_templates.items():
+        has_load_test = f"model-ad-{environment}-load-test" in templates
+        assert has_load_test == (environment == "dev")
+
+
+def test_app_api_path_routing_off(environment_templates):
+    for environment, templates in environment_templates.items():
+        api_template = templates[f"model-ad-{environment}-api"]
+        listener_rules = [
+            resource
+            for resource in api_template["Resources"].values()
+            if resource["Type"] == "AWS::ElasticLoadBalancingV2::ListenerRule"
+        ]
+        assert listener_rules == []
+
+
+def test_app_load_test_needs_waf_count(monkeypatch, tmp_path):
+    environment_variables = {
+        **app.get_environment_variables("stage"),
+        "LOAD_TEST": True,
+    }
+    monkeypatch.setattr(
+        app, "get_environment_variables", lambda environment: environment_variables
+    )
+
+    with pytest.raises(ValueError, match="stage blocks requests over the WAF"):
+        app.build_app(
+            "stage",
+            {image_name: "1.0.0" for image_name in app.IMAGE_NAMES},
+            outdir=str(tmp_path),
+        )
@@ -0,0 +1,101 @@
+import pytest
+import aws_cdk as cdk
+from aws_cdk import aws_ec2 as ec2
+
+from src.docdb_props import DocdbProps
+from src.helpers.capacity_plan import REPORT_FILE_NAME, CapacityPlan
+from src.service_props import ServiceContainer, ServiceProps
+
+
+def get_docdb_props() -> DocdbProps:
+    return DocdbProps(
+        instance_type=ec2.InstanceType.of(
+            ec2.InstanceClass.MEMORY5, ec2.InstanceSize.LARGE
+        ),
+        master_username="master",
+        port=27017,
+    )
+
+
+def test_capacity_plan_totals():
+    capacity_plan = CapacityPlan("dev", "cdk.out", get_docdb_props())
+    capacity_plan.add_service(
+        ServiceProps(
+            container_name="api",
+            container_location="ghcr.io/sage-bionetworks/api:1.0",
+            container_port=3333,
+            container_env_vars={"MONGODB_MAX_POOL_SIZE": "50"},
+            auto_scale_min_capacity=2,
+            auto_scale_max_capacity=4,
+        ),
+        docdb_client=True,
+    )
+    capacity_plan.add_task("data-load", 4096, 8192, docdb_connections=8)
+
+    totals = capacity_plan.get_totals()
+    assert totals["peak_tasks"] == 4
+    assert totals["peak_vcpu"] == 8
+    assert totals["peak_memory_gib"] == 16
+    assert totals["docdb_connections"] == 208
+    assert totals["monthly_cost_min"] < totals["monthly_cost_peak"]
+    assert capacity_plan.errors + capacity_plan.get_docdb_errors() == []
+
+
+def test_capacity_plan_fails_synth_on_over_commit(tmp_path):
+    cdk_app = cdk.App(outdir=str(tmp_path))
+    capacity_plan = CapacityPlan("dev", cdk_app.outdir, get_docdb_props())
+    cdk_app.node.add_validation(capacity_plan)
+    cdk.Stack(cdk_app, "Stack")
+
+    # the default driver pool of 100 connections on 20 tasks exceeds the 1700 of an r5.large
+    capacity_plan.add_service(
+        ServiceProps(
+            container_name="api",
+            container_location="ghcr.io/sage-bionetworks/api:1.0",
+            container_port=3333,
+            auto_scale_max_capacity=20,
+        ),
+        docdb_client=True,
+    )
+    # the sidecar and the container reserve more than the task memory
+    capacity_plan.add_service(
+        ServiceProps(
+            container_name="app",
+            container_location="ghcr.io/sage-bionetworks/app:1.0",
+            container_port=4200,
+            container_memory_reservation=3072,
+            additional_containers=[
+                ServiceContainer(
+                    name="cache",
+                    location="redis:7",
+                    port=6379,
+                    memory_reservation=2048,
+                )
+            ],
+        )
+    )
+    capacity_plan.add_task("data-load", 1024, 512)
+
+    with pytest.raises(Exception, match="2000 connections at peak"):
+        cdk_app.synth()
+
+    report = (tmp_path / REPORT_FILE_NAME).read_text()
+    assert "app: the containers reserve 5120 MiB of the 4096 MiB task memory" in report
+    assert "data-load: task memory 512 MiB is not between 2048 and 8192 MiB" in report
+    assert "DocumentDB connections at peak: 2000 of 1700" in report
+
+
+def test_capacity_plan_heap_over_commit():
+    capacity_plan = CapacityPlan("dev", "cdk.out")
+    capacity_plan.add_service(
+        ServiceProps(
+            container_name="app",
+            container_location="ghcr.io/sage-bionetworks/app:1.0",
+            container_port=4200,
+            container_env_vars={"NODE_OPTIONS": "--max-old-space-size=8192"},
+        )
+    )
+
+    assert capacity_plan.errors == [
+        "app: the 8192 MiB heap does not fit in the 4096 MiB left by the sidecars"
+    ]
@@ -0,0 +1,82 @@
+import aws_cdk as cdk
+import aws_cdk.assertions as assertions
+
+from src.dashboard_stack import DashboardStack
+from src.ecs_stack import EcsStack
+from src.load_balancer_stack import LoadBalancerStack
+from src.network_stack import NetworkStack
+from src.service_props import ServiceProps
+from src.service_stack import LoadBalancedServiceStack, ServiceStack
+
+
+def test_dashboard_created():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app,
+        "EcsStack",
+        vpc=network_stack.vpc,
+        namespace="dev.app.io",
+        container_insights=cdk.aws_ecs.ContainerInsights.ENHANCED,
+    )
+    load_balancer_stack = LoadBalancerStack(
+        cdk_app, "LoadBalancerStack", vpc=network_stack.vpc
+    )
+    dashboard_stack = DashboardStack(cdk_app, "DashboardStack")
+
+    api_props = ServiceProps(
+        container_name="api",
+        container_location="ghcr.io/sage-bionetworks/api:1.0",
+        container_port=3333,
+    )
+    api_stack = ServiceStack(
+        scope=cdk_app,
+        construct_id="api",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        props=api_props,
+    )
+    dashboard_stack.add_service(api_stack, api_props)
+    apex_props = ServiceProps(
+        container_name="apex",
+        container_location="ghcr.io/sage-bionetworks/apex:1.0",
+        container_port=80,
+    )
+    apex_stack = LoadBalancedServiceStack(
+        scope=cdk_app,
+        construct_id="apex",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        props=apex_props,
+        load_balancer=load_balancer_stack.alb,
+        certificate_id="0e9682f6-3ffa-46fb-9671-b6349f5164d6",
+    )
+    dashboard_stack.add_service(apex_stack, apex_props)
+
+    assertions.Template.from_stack(ecs_stack).has_resource_properties(
+        "AWS::ECS::Cluster",
+        {"ClusterSettings": [{"Name": "containerInsights", "Value": "enhanced"}]},
+    )
+    assertions.Template.from_stack(apex_stack).has_resource_properties(
+        "AWS::ElasticLoadBalancingV2::TargetGroup", {"Name": "apex"}
+    )
+
+    template = assertions.Template.from_stack(dashboard_stack)
+    template.resource_count_is("AWS::CloudWatch::Dashboard", 1)
+    body = template.find_resources("AWS::CloudWatch::Dashboard")
+    rendered = str(list(body.values())[0]["Properties"]["DashboardBody"])
+    for expected in (
+        "RunningTaskCount",
+        "DesiredTaskCount",
+        'ServiceName=api DiscoveryName=\\\\"api\\\\"',
+        "apex Service Connect latency",
+        "TargetGroup=apex",
+        "HTTPCode_Target_5XX_Count",
+        "TargetResponseTime p99",
+    ):
+        assert expected in rendered
+    # the widgets search the metrics by name, the dashboard does not import the service stacks
+    assert "Fn::ImportValue" not in rendered
+    assert dashboard_stack.dependencies == []
+    for service_stack in (api_stack, apex_stack):
+        assert assertions.Template.from_stack(service_stack).find_outputs("*") == {}
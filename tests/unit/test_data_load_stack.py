@@ -0,0 +1,118 @@
+import subprocess
+
+import pytest
+import aws_cdk as cdk
+import aws_cdk.assertions as assertions
+
+from src.data_load_props import DataLoadProps
+from src.data_load_stack import DATA_LOAD_SCRIPT, DataLoadStack
+from src.ecs_stack import EcsStack
+from src.network_stack import NetworkStack
+from src.service_props import ServiceSecret
+
+
+def test_data_load_stack_created():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app, "EcsStack", vpc=network_stack.vpc, namespace="dev.app.io"
+    )
+
+    data_load_props = DataLoadProps(
+        source_s3_prefix="s3://data-bucket/model-ad/v1/",
+        parallelism=8,
+        batch_size=500,
+        container_env_vars={"MONGODB_HOST": "docdb.dev.app.io"},
+        container_secrets=[
+            ServiceSecret(secret_name="/docdb/password", environment_key="MONGODB_PASS")
+        ],
+    )
+    data_load_stack = DataLoadStack(
+        scope=cdk_app,
+        construct_id="data-load",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        props=data_load_props,
+    )
+
+    template = assertions.Template.from_stack(data_load_stack)
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "Cpu": "4096",
+            "Memory": "8192",
+            "EphemeralStorage": {"SizeInGiB": 100},
+            "ContainerDefinitions": [
+                assertions.Match.object_like(
+                    {
+                        "Name": "download",
+                        "Essential": False,
+                        "Command": [
+                            assertions.Match.string_like_regexp(
+                                "aws s3 sync --only-show-errors s3://data-bucket/model-ad/v1/ /data"
+                            )
+                        ],
+                    }
+                ),
+                assertions.Match.object_like(
+                    {
+                        "Name": "data-load",
+                        "DependsOn": [
+                            {"Condition": "SUCCESS", "ContainerName": "download"}
+                        ],
+                        "Environment": assertions.Match.array_with(
+                            [
+                                {"Name": "MONGODB_HOST", "Value": "docdb.dev.app.io"},
+                                {"Name": "LOAD_PARALLELISM", "Value": "8"},
+                                {"Name": "LOAD_BATCH_SIZE", "Value": "500"},
+                            ]
+                        ),
+                        "Secrets": [
+                            assertions.Match.object_like({"Name": "MONGODB_PASS"})
+                        ],
+                    }
+                ),
+            ],
+        },
+    )
+    template.has_resource_properties(
+        "AWS::IAM::Policy",
+        {
+            "PolicyDocument": {
+                "Statement": assertions.Match.array_with(
+                    [
+                        assertions.Match.object_like(
+                            {
+                                "Action": assertions.Match.array_with(
+                                    ["s3:GetObject*"]
+                                ),
+                                "Resource": assertions.Match.array_with(
+                                    [
+                                        {
+                                            "Fn::Join": [
+                                                "",
+                                                [
+                                                    "arn:",
+                                                    {"Ref": "AWS::Partition"},
+                                                    ":s3:::data-bucket/model-ad/v1/*",
+                                                ],
+                                            ]
+                                        }
+                                    ]
+                                ),
+                            }
+                        )
+                    ]
+                )
+            }
+        },
+    )
+
+
+def test_data_load_props_invalid_source():
+    with pytest.raises(ValueError):
+        DataLoadProps(source_s3_prefix="data-bucket/model-ad/v1/")
+
+
+def test_data_load_script_syntax():
+    subprocess.run(["bash", "-n"], input=DATA_LOAD_SCRIPT, text=True, check=True)
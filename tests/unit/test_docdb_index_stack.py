@@ -0,0 +1,122 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+import aws_cdk as cdk
+import aws_cdk.assertions as assertions
+from aws_cdk import aws_ec2 as ec2
+
+from src.docdb_index_props import DocdbIndex, DocdbIndexProps, load_index_spec
+from src.docdb_index_stack import INDEX_SCRIPT, DocdbIndexStack
+from src.docdb_props import DocdbProps
+from src.docdb_stack import DocdbStack
+from src.ecs_stack import EcsStack
+from src.network_stack import NetworkStack
+
+DOCDB_INDEX_SPEC = os.path.join(
+    os.path.dirname(__file__), "..", "..", "docdb-indexes.json"
+)
+
+
+def test_docdb_index_spec_valid():
+    indexes = load_index_spec(DOCDB_INDEX_SPEC)
+
+    assert indexes
+    DocdbIndexProps(indexes=indexes)
+
+
+def test_docdb_index_invalid():
+    with pytest.raises(ValueError):
+        DocdbIndex(collection="genes", keys={})
+    with pytest.raises(ValueError):
+        DocdbIndex(collection="genes", keys={"name": 2})
+    with pytest.raises(ValueError):
+        DocdbIndex(collection="system.profile", keys={"name": 1})
+    with pytest.raises(ValueError, match="would never expire documents"):
+        DocdbIndex(collection="sessions", keys={"created": 1}, expire_after_seconds=60)
+    with pytest.raises(ValueError):
+        DocdbIndexProps(
+            indexes=[
+                DocdbIndex(collection="genes", keys={"name": 1}),
+                DocdbIndex(collection="genes", keys={"name": 1}, name="by_name"),
+            ]
+        )
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_docdb_index_script_syntax(tmp_path):
+    script = tmp_path / "indexes.js"
+    script.write_text(INDEX_SCRIPT)
+
+    subprocess.run(["node", "--check", str(script)], check=True)
+
+
+def test_docdb_index_stack_created():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app, "EcsStack", vpc=network_stack.vpc, namespace="dev.app.io"
+    )
+    docdb_stack = DocdbStack(
+        cdk_app,
+        "DocdbStack",
+        vpc=network_stack.vpc,
+        props=DocdbProps(
+            instance_type=ec2.InstanceType.of(
+                ec2.InstanceClass.MEMORY5, ec2.InstanceSize.LARGE
+            ),
+            master_username="master",
+            port=27017,
+        ),
+    )
+    docdb_index_stack = DocdbIndexStack(
+        scope=cdk_app,
+        construct_id="docdb-index",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        docdb_cluster=docdb_stack.cluster,
+        props=DocdbIndexProps(
+            indexes=[
+                DocdbIndex(
+                    collection="genes", keys={"ensembl_gene_id": 1}, unique=True
+                ),
+                DocdbIndex(collection="genes", keys={"name": 1, "tissue": -1}),
+            ],
+            container_env_vars={"MONGODB_NAME": "model-ad"},
+        ),
+    )
+
+    template = assertions.Template.from_stack(docdb_index_stack)
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": [
+                assertions.Match.object_like(
+                    {
+                        "Name": "docdb-index",
+                        "Environment": assertions.Match.array_with(
+                            [
+                                {
+                                    "Name": "INDEX_SPEC",
+                                    "Value": '{"genes": [{"keys": {"ensembl_gene_id": 1}, '
+                                    '"options": {"name": "ensembl_gene_id_1", "unique": true}}, '
+                                    '{"keys": {"name": 1, "tissue": -1}, '
+                                    '"options": {"name": "name_1_tissue_-1"}}]}',
+                                }
+                            ]
+                        ),
+                    }
+                )
+            ]
+        },
+    )
+    template.has_resource_properties(
+        "AWS::EC2::SecurityGroupIngress",
+        {"SourceSecurityGroupId": {"Fn::GetAtt": ["SecurityGroupDD263621", "GroupId"]}},
+    )
+    run_task = template.find_resources("Custom::AWS")
+    assert len(run_task) == 1
+    depends_on = list(run_task.values())[0]["DependsOn"]
+    ingress = template.find_resources("AWS::EC2::SecurityGroupIngress")
+    assert set(ingress) <= set(depends_on)
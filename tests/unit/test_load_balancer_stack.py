@@ -0,0 +1,246 @@
+import re
+
+import pytest
+import aws_cdk as cdk
+import aws_cdk.assertions as assertions
+
+from src.load_balancer_props import AccessLogs, LoadBalancerProps
+from src.load_balancer_stack import (
+    ACCESS_LOG_COLUMNS,
+    ACCESS_LOG_REGEX,
+    LoadBalancerStack,
+)
+from src.network_stack import NetworkStack
+
+
+def test_load_balancer_waf_rate_limits():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    load_balancer_stack = LoadBalancerStack(
+        cdk_app,
+        "LoadBalancerStack",
+        vpc=network_stack.vpc,
+        props=LoadBalancerProps(
+            rate_limit=3000,
+            api_rate_limit=1500,
+            page_rate_limit=None,
+            static_asset_extensions=[".js", ".css"],
+            waf_block=False,
+        ),
+    )
+
+    template = assertions.Template.from_stack(load_balancer_stack)
+    static_asset_statement = {
+        "AndStatement": {
+            "Statements": [
+                {
+                    "OrStatement": {
+                        "Statements": [
+                            assertions.Match.object_like(
+                                {
+                                    "ByteMatchStatement": assertions.Match.object_like(
+                                        {
+                                            "PositionalConstraint": "ENDS_WITH",
+                                            "SearchString": ext,
+                                        }
+                                    )
+                                }
+                            )
+                            for ext in (".js", ".css")
+                        ]
+                    }
+                },
+                {
+                    "NotStatement": {
+                        "Statement": {
+                            "ByteMatchStatement": assertions.Match.object_like(
+                                {
+                                    "PositionalConstraint": "STARTS_WITH",
+                                    "SearchString": "/api/",
+                                    "TextTransformations": [
+                                        {"Priority": 0, "Type": "URL_DECODE"},
+                                        {"Priority": 1, "Type": "NORMALIZE_PATH"},
+                                        {"Priority": 2, "Type": "LOWERCASE"},
+                                    ],
+                                }
+                            )
+                        }
+                    }
+                },
+            ]
+        }
+    }
+    template.has_resource_properties(
+        "AWS::WAFv2::WebACL",
+        {
+            "Rules": [
+                {
+                    "Name": "RateLimitPerIp",
+                    "Priority": 0,
+                    "Action": {"Count": {}},
+                    "Statement": {
+                        "RateBasedStatement": {
+                            "AggregateKeyType": "IP",
+                            "Limit": 3000,
+                            "EvaluationWindowSec": 300,
+                        }
+                    },
+                    "VisibilityConfig": assertions.Match.any_value(),
+                },
+                assertions.Match.object_like(
+                    {
+                        "Name": "RateLimitApiPerIp",
+                        "Priority": 1,
+                        "Statement": {
+                            "RateBasedStatement": assertions.Match.object_like(
+                                {
+                                    "Limit": 1500,
+                                    "ScopeDownStatement": {
+                                        "ByteMatchStatement": assertions.Match.object_like(
+                                            {
+                                                "PositionalConstraint": "STARTS_WITH",
+                                                "SearchString": "/api/v1",
+                                            }
+                                        )
+                                    },
+                                }
+                            )
+                        },
+                    }
+                ),
+                assertions.Match.object_like(
+                    {
+                        "Name": "AWSManagedRulesCommonRuleSet",
+                        "Priority": 2,
+                        "Statement": {
+                            "ManagedRuleGroupStatement": assertions.Match.object_like(
+                                {
+                                    "ScopeDownStatement": {
+                                        "NotStatement": {
+                                            "Statement": static_asset_statement
+                                        }
+                                    }
+                                }
+                            )
+                        },
+                    }
+                ),
+                assertions.Match.object_like(
+                    {
+                        "Name": "AWSManagedRulesKnownBadInputsRuleSet",
+                        "Priority": 3,
+                        "Statement": {
+                            "ManagedRuleGroupStatement": {
+                                "Name": "AWSManagedRulesKnownBadInputsRuleSet",
+                                "VendorName": "AWS",
+                            }
+                        },
+                    }
+                ),
+            ]
+        },
+    )
+
+
+def test_load_balancer_props_invalid_rate_limit_window():
+    with pytest.raises(ValueError, match="rate_limit_window must be one of"):
+        LoadBalancerProps(rate_limit_window=180)
+
+
+def test_load_balancer_access_logs():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    load_balancer_stack = LoadBalancerStack(
+        cdk_app,
+        "LoadBalancerStack",
+        vpc=network_stack.vpc,
+        props=LoadBalancerProps(access_logs=AccessLogs(expiration_days=60)),
+    )
+
+    template = assertions.Template.from_stack(load_balancer_stack)
+    template.has_resource_properties(
+        "AWS::S3::Bucket",
+        {
+            "LifecycleConfiguration": {
+                "Rules": assertions.Match.array_with(
+                    [
+                        assertions.Match.object_like(
+                            {
+                                "Prefix": "alb/",
+                                "ExpirationInDays": 60,
+                                "Transitions": [
+                                    {
+                                        "StorageClass": "STANDARD_IA",
+                                        "TransitionInDays": 30,
+                                    }
+                                ],
+                            }
+                        )
+                    ]
+                )
+            }
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ElasticLoadBalancingV2::LoadBalancer",
+        {
+            "LoadBalancerAttributes": assertions.Match.array_with(
+                [
+                    {"Key": "access_logs.s3.enabled", "Value": "true"},
+                    {"Key": "access_logs.s3.prefix", "Value": "alb"},
+                ]
+            )
+        },
+    )
+    template.has_resource_properties(
+        "AWS::Glue::Table",
+        {
+            "DatabaseName": "loadbalancerstack",
+            "TableInput": assertions.Match.object_like(
+                {
+                    "Name": "alb_access_logs",
+                    "PartitionKeys": [{"Name": "day", "Type": "string"}],
+                    "Parameters": assertions.Match.object_like(
+                        {
+                            "projection.enabled": "true",
+                            "projection.day.range": "2025/01/01,NOW",
+                        }
+                    ),
+                }
+            ),
+        },
+    )
+    template.resource_count_is("AWS::Athena::NamedQuery", 3)
+    template.has_resource_properties(
+        "AWS::Athena::NamedQuery",
+        {
+            "Name": "LoadBalancerStack-top-slow-paths",
+            "WorkGroup": "LoadBalancerStack",
+            "QueryString": assertions.Match.string_like_regexp("FROM alb_access_logs"),
+        },
+    )
+
+
+def test_load_balancer_access_log_regex():
+    line = (
+        "https 2025-03-05T10:00:00.123456Z app/alb/abc 203.0.113.5:51234 10.0.0.12:80 "
+        "0.001 0.245 0.000 200 200 512 2048 "
+        '"GET https://dev.app.io:443/api/v1/genes?limit=10 HTTP/1.1" "Mozilla/5.0 (X11)" '
+        "ECDHE-RSA-AES128-GCM-SHA256 TLSv1.2 "
+        "arn:aws:elasticloadbalancing:us-east-1:123456789012:targetgroup/tg/abc "
+        '"Root=1-abc" "dev.app.io" "arn:aws:acm:us-east-1:123456789012:certificate/abc" '
+        '0 2025-03-05T10:00:00.100000Z "forward" "-" "-" "10.0.0.12:80" "200" "-" "-" '
+        "TID_abc"
+    )
+
+    fields = dict(
+        zip(
+            [name for name, _ in ACCESS_LOG_COLUMNS],
+            re.fullmatch(ACCESS_LOG_REGEX, line).groups(),
+        )
+    )
+
+    assert fields["target_processing_time"] == "0.245"
+    assert fields["request_url"] == "https://dev.app.io:443/api/v1/genes?limit=10"
+    assert fields["user_agent"] == "Mozilla/5.0 (X11)"
+    assert fields["conn_trace_id"] == "TID_abc"
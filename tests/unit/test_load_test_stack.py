@@ -0,0 +1,111 @@
+import shutil
+import subprocess
+
+import pytest
+import aws_cdk as cdk
+import aws_cdk.assertions as assertions
+
+from src.ecs_stack import EcsStack
+from src.helpers.load_test_script import get_k6_options, render_k6_script
+from src.load_test_props import LoadTestProps, LoadTestScenario
+from src.load_test_stack import LoadTestStack
+from src.network_stack import NetworkStack
+
+
+def get_load_test_props() -> LoadTestProps:
+    return LoadTestProps(
+        base_url="https://dev.app.io/",
+        environment="dev",
+        scenarios=[
+            LoadTestScenario(name="home", routes=["/"], virtual_users=20),
+            LoadTestScenario(
+                name="api",
+                routes=["/api/v1/genes", "/api/v1/models"],
+                duration="2m",
+                p95_threshold=500,
+            ),
+        ],
+    )
+
+
+def test_load_test_k6_options():
+    options = get_k6_options(get_load_test_props())
+
+    assert options["scenarios"]["home"]["stages"] == [
+        {"duration": "30s", "target": 20},
+        {"duration": "5m", "target": 20},
+    ]
+    assert options["thresholds"]["http_req_duration{scenario:api}"] == ["p(95)<500"]
+    assert options["thresholds"]["http_req_duration{scenario:home}"] == ["max>=0"]
+    assert options["thresholds"]["http_req_failed{scenario:home}"] == ["rate<0.01"]
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_load_test_k6_script_syntax(tmp_path):
+    script = tmp_path / "script.mjs"
+    script.write_text(render_k6_script(get_load_test_props()))
+
+    subprocess.run(["node", "--check", str(script)], check=True)
+
+
+def test_load_test_scenario_invalid_route():
+    with pytest.raises(ValueError):
+        LoadTestScenario(name="home", routes=["api/v1/genes"])
+
+
+def test_load_test_stack_created():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app, "EcsStack", vpc=network_stack.vpc, namespace="dev.app.io"
+    )
+    load_test_stack = LoadTestStack(
+        scope=cdk_app,
+        construct_id="load-test",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        props=get_load_test_props(),
+    )
+
+    template = assertions.Template.from_stack(load_test_stack)
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": [
+                assertions.Match.object_like(
+                    {
+                        "Name": "k6",
+                        "Essential": False,
+                        "Environment": assertions.Match.array_with(
+                            [{"Name": "BASE_URL", "Value": "https://dev.app.io"}]
+                        ),
+                    }
+                ),
+                assertions.Match.object_like(
+                    {
+                        "Name": "publish",
+                        "DependsOn": [{"Condition": "COMPLETE", "ContainerName": "k6"}],
+                    }
+                ),
+            ]
+        },
+    )
+    template.has_resource_properties(
+        "AWS::IAM::Policy",
+        {
+            "PolicyDocument": {
+                "Statement": assertions.Match.array_with(
+                    [
+                        assertions.Match.object_like(
+                            {
+                                "Action": "cloudwatch:PutMetricData",
+                                "Condition": {
+                                    "StringEquals": {"cloudwatch:namespace": "LoadTest"}
+                                },
+                            }
+                        )
+                    ]
+                )
+            }
+        },
+    )
@@ -1,10 +1,33 @@
+import json
+
+import pytest
 import aws_cdk as cdk
 import aws_cdk.assertions as assertions
+from aws_cdk import aws_applicationautoscaling as appscaling
 
 from src.network_stack import NetworkStack
 from src.ecs_stack import EcsStack
-from src.service_props import ServiceProps, ServiceSecret, ContainerVolume
-from src.service_stack import ServiceStack
+from src.load_balancer_props import LoadBalancerProps
+from src.load_balancer_stack import LoadBalancerStack
+from src.service_props import (
+    ContainerAssetOptions,
+    ContainerLogging,
+    ContainerRuntime,
+    ContainerTracing,
+    ContainerVolume,
+    DeploymentAlarms,
+    PredictiveScaling,
+    RuntimeTuning,
+    ScalingMetric,
+    ServiceContainer,
+    ServiceProps,
+    ServiceSecret,
+)
+from src.service_stack import (
+    ListenerRuleServiceStack,
+    LoadBalancedServiceStack,
+    ServiceStack,
+)
 
 
 def test_service_stack_created():
@@ -54,3 +77,1014 @@ def test_service_stack_created():
             ]
         },
     )
+
+
+def test_service_stack_firelens_logging():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app, "EcsStack", vpc=network_stack.vpc, namespace="dev.app.io"
+    )
+
+    app_props = ServiceProps(
+        container_name="app",
+        container_location="ghcr.io/sage-bionetworks/app:1.0",
+        container_port=8010,
+        container_logging=ContainerLogging(
+            firelens=True,
+            max_buffer_size=4,
+            firelens_options={"log_key": "log"},
+        ),
+    )
+    app_stack = ServiceStack(
+        scope=cdk_app,
+        construct_id="app",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        props=app_props,
+    )
+
+    template = assertions.Template.from_stack(app_stack)
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": assertions.Match.array_with(
+                [
+                    assertions.Match.object_like(
+                        {
+                            "Name": "LogRouter",
+                            "FirelensConfiguration": {"Type": "fluentbit"},
+                            "LogConfiguration": {
+                                "LogDriver": "awslogs",
+                                "Options": assertions.Match.object_like(
+                                    {
+                                        "mode": "non-blocking",
+                                        "max-buffer-size": "4194304b",
+                                    }
+                                ),
+                            },
+                        }
+                    ),
+                    assertions.Match.object_like(
+                        {
+                            "Name": "app",
+                            "LogConfiguration": {
+                                "LogDriver": "awsfirelens",
+                                "Options": assertions.Match.object_like(
+                                    {
+                                        "Name": "cloudwatch_logs",
+                                        "log-driver-buffer-limit": "4194304",
+                                        "log_key": "log",
+                                    }
+                                ),
+                            },
+                        }
+                    ),
+                ]
+            )
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ECS::Service",
+        {
+            "ServiceConnectConfiguration": assertions.Match.object_like(
+                {
+                    "LogConfiguration": {
+                        "LogDriver": "awslogs",
+                        "Options": assertions.Match.object_like(
+                            {"mode": "non-blocking", "max-buffer-size": "4194304b"}
+                        ),
+                    }
+                }
+            )
+        },
+    )
+
+
+def test_service_stack_tuned_volume():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app, "EcsStack", vpc=network_stack.vpc, namespace="dev.app.io"
+    )
+
+    app_props = ServiceProps(
+        container_name="app",
+        container_location="ghcr.io/sage-bionetworks/app:1.0",
+        container_port=8010,
+        container_volumes=[
+            ContainerVolume(
+                path="/data",
+                size=100,
+                name="data",
+                iops=6000,
+                throughput=500,
+                file_system_type=cdk.aws_ecs.FileSystemType.EXT4,
+                snapshot_id="snap-0123456789abcdef0",
+            ),
+        ],
+    )
+    app_stack = ServiceStack(
+        scope=cdk_app,
+        construct_id="app",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        props=app_props,
+    )
+
+    template = assertions.Template.from_stack(app_stack)
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": [
+                assertions.Match.object_like(
+                    {
+                        "MountPoints": [
+                            {
+                                "ContainerPath": "/data",
+                                "ReadOnly": False,
+                                "SourceVolume": "data",
+                            },
+                        ]
+                    }
+                )
+            ],
+            "Volumes": [{"ConfiguredAtLaunch": True, "Name": "data"}],
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ECS::Service",
+        {
+            "VolumeConfigurations": [
+                {
+                    "Name": "data",
+                    "ManagedEBSVolume": assertions.Match.object_like(
+                        {
+                            "SizeInGiB": 100,
+                            "VolumeType": "gp3",
+                            "Iops": 6000,
+                            "Throughput": 500,
+                            "FilesystemType": "ext4",
+                            "SnapshotId": "snap-0123456789abcdef0",
+                        }
+                    ),
+                }
+            ]
+        },
+    )
+
+
+def test_service_props_single_ebs_volume():
+    with pytest.raises(ValueError):
+        ServiceProps(
+            container_name="app",
+            container_location="ghcr.io/sage-bionetworks/app:1.0",
+            container_port=8010,
+            container_volumes=[ContainerVolume(path="/a"), ContainerVolume(path="/b")],
+        )
+
+
+def test_service_stack_asset_build_options(tmp_path):
+    docker_path = tmp_path / "docker"
+    docker_path.mkdir()
+    (docker_path / "Dockerfile").write_text("FROM scratch\n")
+    cdk_app = cdk.App(outdir=str(tmp_path / "cdk.out"))
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app, "EcsStack", vpc=network_stack.vpc, namespace="dev.app.io"
+    )
+
+    app_props = ServiceProps(
+        container_name="app",
+        container_location=f"path://{docker_path}",
+        container_port=8010,
+        container_asset_options=ContainerAssetOptions(
+            build_args={"NODE_VERSION": "20"},
+            target="runtime",
+            cache_from=[
+                cdk.aws_ecr_assets.DockerCacheOption(
+                    type="registry",
+                    params={"ref": "ghcr.io/sage-bionetworks/app:cache"},
+                )
+            ],
+            exclude=["*.md"],
+        ),
+    )
+    ServiceStack(
+        scope=cdk_app,
+        construct_id="app",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        props=app_props,
+    )
+    cdk_app.synth()
+
+    assets = json.loads((tmp_path / "cdk.out" / "app.assets.json").read_text())
+    (docker_image,) = assets["dockerImages"].values()
+    assert docker_image["source"]["dockerBuildArgs"] == {"NODE_VERSION": "20"}
+    assert docker_image["source"]["dockerBuildTarget"] == "runtime"
+    assert docker_image["source"]["platform"] == "linux/amd64"
+    assert docker_image["source"]["cacheFrom"] == [
+        {"type": "registry", "params": {"ref": "ghcr.io/sage-bionetworks/app:cache"}}
+    ]
+
+
+def test_service_stack_additional_container_asset_options(tmp_path):
+    app_path = tmp_path / "app"
+    sidecar_path = tmp_path / "sidecar"
+    for docker_path in (app_path, sidecar_path):
+        docker_path.mkdir()
+        (docker_path / "Dockerfile").write_text(
+            f"FROM scratch\nLABEL {docker_path.name}\n"
+        )
+    cdk_app = cdk.App(outdir=str(tmp_path / "cdk.out"))
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app, "EcsStack", vpc=network_stack.vpc, namespace="dev.app.io"
+    )
+
+    app_props = ServiceProps(
+        container_name="app",
+        container_location=f"path://{app_path}",
+        container_port=8010,
+        container_asset_options=ContainerAssetOptions(
+            build_args={"NODE_VERSION": "20"}, target="runtime"
+        ),
+        additional_containers=[
+            ServiceContainer(
+                name="sidecar",
+                location=f"path://{sidecar_path}",
+                asset_options=ContainerAssetOptions(build_args={"MODE": "proxy"}),
+            )
+        ],
+    )
+    ServiceStack(
+        scope=cdk_app,
+        construct_id="app",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        props=app_props,
+    )
+    cdk_app.synth()
+
+    assets = json.loads((tmp_path / "cdk.out" / "app.assets.json").read_text())
+    sources = [
+        docker_image["source"] for docker_image in assets["dockerImages"].values()
+    ]
+    assert len(sources) == 2
+    (sidecar_source,) = [
+        source
+        for source in sources
+        if source.get("dockerBuildArgs") == {"MODE": "proxy"}
+    ]
+    assert "dockerBuildTarget" not in sidecar_source
+
+
+def test_load_balanced_service_stack_deployment_alarms():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app, "EcsStack", vpc=network_stack.vpc, namespace="dev.app.io"
+    )
+    load_balancer_stack = LoadBalancerStack(
+        cdk_app, "LoadBalancerStack", vpc=network_stack.vpc
+    )
+
+    apex_props = ServiceProps(
+        container_name="apex",
+        container_location="ghcr.io/sage-bionetworks/apex:1.0",
+        container_port=80,
+        deployment_alarms=DeploymentAlarms(
+            target_p99_latency=2500,
+            target_5xx_rate=5,
+            service_connect_p99_latency=1000,
+        ),
+    )
+    apex_stack = LoadBalancedServiceStack(
+        scope=cdk_app,
+        construct_id="apex",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        props=apex_props,
+        load_balancer=load_balancer_stack.alb,
+        certificate_id="0e9682f6-3ffa-46fb-9671-b6349f5164d6",
+    )
+
+    template = assertions.Template.from_stack(apex_stack)
+    template.has_resource_properties(
+        "AWS::ECS::Service",
+        {
+            "DeploymentConfiguration": assertions.Match.object_like(
+                {
+                    "Alarms": {
+                        "AlarmNames": [
+                            "apex-service-connect-p99-latency",
+                            "apex-alb-p99-latency",
+                            "apex-alb-5xx-rate",
+                        ],
+                        "Enable": True,
+                        "Rollback": True,
+                    },
+                    "DeploymentCircuitBreaker": {"Enable": True, "Rollback": True},
+                }
+            )
+        },
+    )
+    template.has_resource_properties(
+        "AWS::CloudWatch::Alarm",
+        {
+            "AlarmName": "apex-alb-p99-latency",
+            "ExtendedStatistic": "p99",
+            "MetricName": "TargetResponseTime",
+            "Threshold": 2.5,
+            "EvaluationPeriods": 3,
+        },
+    )
+    template.has_resource_properties(
+        "AWS::CloudWatch::Alarm",
+        {"AlarmName": "apex-alb-5xx-rate", "Threshold": 5},
+    )
+
+
+def test_service_stack_target_alarms_need_target_group():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app, "EcsStack", vpc=network_stack.vpc, namespace="dev.app.io"
+    )
+
+    api_props = ServiceProps(
+        container_name="api",
+        container_location="ghcr.io/sage-bionetworks/api:1.0",
+        container_port=3333,
+        deployment_alarms=DeploymentAlarms(
+            target_p99_latency=1000, service_connect_p99_latency=1000
+        ),
+    )
+    with pytest.raises(ValueError, match="api has load balancer target alarms"):
+        ServiceStack(
+            scope=cdk_app,
+            construct_id="api",
+            vpc=network_stack.vpc,
+            cluster=ecs_stack.cluster,
+            props=api_props,
+        )
+
+
+def test_service_stack_tracing_sidecar():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app, "EcsStack", vpc=network_stack.vpc, namespace="dev.app.io"
+    )
+    load_balancer_stack = LoadBalancerStack(
+        cdk_app, "LoadBalancerStack", vpc=network_stack.vpc
+    )
+
+    apex_props = ServiceProps(
+        container_name="apex",
+        container_location="ghcr.io/sage-bionetworks/apex:1.0",
+        container_port=80,
+        container_env_vars={"OTEL_SERVICE_NAME": "model-ad-apex"},
+        container_logging=ContainerLogging(firelens=True),
+        container_tracing=ContainerTracing(sampling_ratio=0.25),
+    )
+    apex_stack = LoadBalancedServiceStack(
+        scope=cdk_app,
+        construct_id="apex",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        props=apex_props,
+        load_balancer=load_balancer_stack.alb,
+        certificate_id="0e9682f6-3ffa-46fb-9671-b6349f5164d6",
+    )
+
+    template = assertions.Template.from_stack(apex_stack)
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": assertions.Match.array_with(
+                [
+                    assertions.Match.object_like(
+                        {
+                            "Name": "otel-collector",
+                            "Essential": False,
+                            "Command": ["--config=/etc/ecs/ecs-xray.yaml"],
+                        }
+                    ),
+                    assertions.Match.object_like(
+                        {
+                            "Name": "apex",
+                            "DependsOn": [
+                                {
+                                    "Condition": "START",
+                                    "ContainerName": "otel-collector",
+                                }
+                            ],
+                            "Environment": assertions.Match.array_with(
+                                [
+                                    {
+                                        "Name": "OTEL_SERVICE_NAME",
+                                        "Value": "model-ad-apex",
+                                    },
+                                    {
+                                        "Name": "OTEL_EXPORTER_OTLP_ENDPOINT",
+                                        "Value": "http://localhost:4318",
+                                    },
+                                    {
+                                        "Name": "OTEL_TRACES_SAMPLER_ARG",
+                                        "Value": "0.25",
+                                    },
+                                ]
+                            ),
+                        }
+                    ),
+                ]
+            )
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ECS::Service",
+        {
+            "LoadBalancers": [
+                assertions.Match.object_like(
+                    {"ContainerName": "apex", "ContainerPort": 80}
+                )
+            ]
+        },
+    )
+    template.has_resource_properties(
+        "AWS::IAM::Role",
+        {
+            "ManagedPolicyArns": assertions.Match.array_with(
+                [
+                    {
+                        "Fn::Join": [
+                            "",
+                            [
+                                "arn:",
+                                {"Ref": "AWS::Partition"},
+                                ":iam::aws:policy/AWSXrayWriteOnlyAccess",
+                            ],
+                        ]
+                    }
+                ]
+            )
+        },
+    )
+
+
+def test_service_stack_additional_containers():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app, "EcsStack", vpc=network_stack.vpc, namespace="dev.app.io"
+    )
+
+    apex_props = ServiceProps(
+        container_name="apex",
+        container_location="ghcr.io/sage-bionetworks/apex:1.0",
+        container_port=80,
+        container_env_vars={"APP_HOST": "localhost", "APP_PORT": "4200"},
+        container_depends_on={"app": cdk.aws_ecs.ContainerDependencyCondition.START},
+        additional_containers=[
+            ServiceContainer(
+                name="app",
+                location="ghcr.io/sage-bionetworks/app:1.0",
+                port=4200,
+                memory_reservation=1024,
+                env_vars={"APP_VERSION": "1.0"},
+                secrets=[
+                    ServiceSecret(
+                        secret_name="/app/secret", environment_key="APP_SECRET"
+                    )
+                ],
+            )
+        ],
+    )
+    apex_stack = ServiceStack(
+        scope=cdk_app,
+        construct_id="apex",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        props=apex_props,
+    )
+
+    template = assertions.Template.from_stack(apex_stack)
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": [
+                assertions.Match.object_like(
+                    {
+                        "Name": "apex",
+                        "PortMappings": [
+                            assertions.Match.object_like({"ContainerPort": 80})
+                        ],
+                        "DependsOn": [{"Condition": "START", "ContainerName": "app"}],
+                    }
+                ),
+                assertions.Match.object_like(
+                    {
+                        "Name": "app",
+                        "Image": "ghcr.io/sage-bionetworks/app:1.0",
+                        "MemoryReservation": 1024,
+                        "Essential": True,
+                        "Environment": [{"Name": "APP_VERSION", "Value": "1.0"}],
+                        "PortMappings": [
+                            assertions.Match.object_like({"ContainerPort": 4200})
+                        ],
+                        "Secrets": [
+                            assertions.Match.object_like({"Name": "APP_SECRET"})
+                        ],
+                    }
+                ),
+            ]
+        },
+    )
+
+
+def test_service_props_unknown_container_dependency():
+    with pytest.raises(ValueError, match="no container named app"):
+        ServiceProps(
+            container_name="apex",
+            container_location="ghcr.io/sage-bionetworks/apex:1.0",
+            container_port=80,
+            container_depends_on={
+                "app": cdk.aws_ecs.ContainerDependencyCondition.START
+            },
+        )
+
+
+def test_service_props_runtime_tuning():
+    api_props = ServiceProps(
+        container_name="api",
+        container_location="ghcr.io/sage-bionetworks/api:1.0",
+        container_port=3333,
+        container_env_vars={"UV_THREADPOOL_SIZE": "16"},
+        container_tracing=ContainerTracing(memory_reservation=96),
+        auto_scale_max_capacity=4,
+        runtime_tuning=RuntimeTuning(
+            node_env="production", mongodb_max_connections=300
+        ),
+    )
+
+    assert api_props.container_env_vars == {
+        "NODE_ENV": "production",
+        "NODE_OPTIONS": "--max-old-space-size=3000",
+        "UV_THREADPOOL_SIZE": "16",
+        "MONGODB_MAX_POOL_SIZE": "60",
+    }
+
+    # the pools at the maximum capacity share the connection limit, over the driver default too
+    large_api_props = ServiceProps(
+        container_name="api",
+        container_location="ghcr.io/sage-bionetworks/api:1.0",
+        container_port=3333,
+        auto_scale_max_capacity=4,
+        runtime_tuning=RuntimeTuning(mongodb_max_connections=1700),
+    )
+
+    assert large_api_props.container_env_vars["MONGODB_MAX_POOL_SIZE"] == "340"
+
+    app_props = ServiceProps(
+        container_name="app",
+        container_location="ghcr.io/sage-bionetworks/app:1.0",
+        container_port=4200,
+        runtime_tuning=RuntimeTuning(),
+    )
+
+    assert "NODE_ENV" not in app_props.container_env_vars
+
+
+def test_service_stack_container_runtime():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app, "EcsStack", vpc=network_stack.vpc, namespace="dev.app.io"
+    )
+
+    app_props = ServiceProps(
+        container_name="app",
+        container_location="ghcr.io/sage-bionetworks/app:1.0",
+        container_port=4200,
+        container_runtime=ContainerRuntime(
+            ulimits=[
+                cdk.aws_ecs.Ulimit(
+                    name=cdk.aws_ecs.UlimitName.NOFILE,
+                    soft_limit=131072,
+                    hard_limit=131072,
+                )
+            ],
+            init_process_enabled=True,
+            scratch_paths=["/tmp/cache"],
+            stop_timeout=60,
+        ),
+        task_ephemeral_storage=50,
+    )
+    app_stack = ServiceStack(
+        scope=cdk_app,
+        construct_id="app",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        props=app_props,
+    )
+
+    template = assertions.Template.from_stack(app_stack)
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "EphemeralStorage": {"SizeInGiB": 50},
+            "Volumes": [{"Name": "scratch-tmp-cache"}],
+            "ContainerDefinitions": [
+                assertions.Match.object_like(
+                    {
+                        "Name": "app",
+                        "Ulimits": [
+                            {
+                                "Name": "nofile",
+                                "SoftLimit": 131072,
+                                "HardLimit": 131072,
+                            }
+                        ],
+                        "LinuxParameters": {"InitProcessEnabled": True},
+                        "MountPoints": [
+                            {
+                                "ContainerPath": "/tmp/cache",
+                                "SourceVolume": "scratch-tmp-cache",
+                                "ReadOnly": False,
+                            }
+                        ],
+                        "StopTimeout": 60,
+                    }
+                )
+            ],
+        },
+    )
+
+
+def test_container_runtime_scratch_paths():
+    assert ContainerRuntime(
+        scratch_paths=["/var/cache/app", "/srv/render.cache"]
+    ).scratch_volume_names() == {
+        "/var/cache/app": "scratch-var-cache-app",
+        "/srv/render.cache": "scratch-srv-render-cache",
+    }
+
+    for scratch_path in ("tmp/cache", "/", "/tmp/../cache", "/tmp/cache/"):
+        with pytest.raises(ValueError, match="normalized absolute path"):
+            ContainerRuntime(scratch_paths=[scratch_path])
+    with pytest.raises(ValueError, match="same volume names"):
+        ContainerRuntime(scratch_paths=["/tmp/cache", "/tmp/cache"])
+    with pytest.raises(ValueError, match="same volume names"):
+        ContainerRuntime(scratch_paths=["/a-b", "/a/b"])
+
+
+def test_listener_rule_service_stack():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app, "EcsStack", vpc=network_stack.vpc, namespace="dev.app.io"
+    )
+    load_balancer_stack = LoadBalancerStack(
+        cdk_app,
+        "LoadBalancerStack",
+        vpc=network_stack.vpc,
+        props=LoadBalancerProps(certificate_id="0e9682f6-3ffa-46fb-9671-b6349f5164d6"),
+    )
+
+    api_props = ServiceProps(
+        container_name="api",
+        container_location="ghcr.io/sage-bionetworks/api:1.0",
+        container_port=3333,
+        deployment_alarms=DeploymentAlarms(target_5xx_rate=5),
+    )
+    api_stack = ListenerRuleServiceStack(
+        scope=cdk_app,
+        construct_id="api",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        props=api_props,
+        listener=load_balancer_stack.https_listener,
+        priority=10,
+        path_patterns=["/api/*"],
+        health_check_path="/api/v1",
+        health_check_healthy_codes="200-499",
+        requests_per_target=500,
+    )
+
+    load_balancer_template = assertions.Template.from_stack(load_balancer_stack)
+    load_balancer_template.has_resource_properties(
+        "AWS::ElasticLoadBalancingV2::Listener",
+        {
+            "Port": 443,
+            "DefaultActions": [
+                assertions.Match.object_like(
+                    {
+                        "Type": "fixed-response",
+                        "FixedResponseConfig": assertions.Match.object_like(
+                            {"StatusCode": "404"}
+                        ),
+                    }
+                )
+            ],
+        },
+    )
+
+    template = assertions.Template.from_stack(api_stack)
+    template.has_resource_properties(
+        "AWS::ElasticLoadBalancingV2::ListenerRule",
+        {
+            "Priority": 10,
+            "Conditions": [
+                {"Field": "path-pattern", "PathPatternConfig": {"Values": ["/api/*"]}}
+            ],
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ElasticLoadBalancingV2::TargetGroup",
+        {
+            "Port": 3333,
+            "HealthCheckPath": "/api/v1",
+            "Matcher": {"HttpCode": "200-499"},
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ECS::Service",
+        {
+            "LoadBalancers": [
+                assertions.Match.object_like(
+                    {"ContainerName": "api", "ContainerPort": 3333}
+                )
+            ]
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalingPolicy",
+        {
+            "TargetTrackingScalingPolicyConfiguration": assertions.Match.object_like(
+                {
+                    "TargetValue": 500,
+                    "PredefinedMetricSpecification": assertions.Match.object_like(
+                        {"PredefinedMetricType": "ALBRequestCountPerTarget"}
+                    ),
+                }
+            )
+        },
+    )
+    template.has_resource_properties(
+        "AWS::CloudWatch::Alarm", {"AlarmName": "api-alb-5xx-rate"}
+    )
+
+
+def test_listener_rule_service_stack_needs_condition():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app, "EcsStack", vpc=network_stack.vpc, namespace="dev.app.io"
+    )
+    load_balancer_stack = LoadBalancerStack(
+        cdk_app,
+        "LoadBalancerStack",
+        vpc=network_stack.vpc,
+        props=LoadBalancerProps(certificate_id="0e9682f6-3ffa-46fb-9671-b6349f5164d6"),
+    )
+
+    with pytest.raises(ValueError):
+        ListenerRuleServiceStack(
+            scope=cdk_app,
+            construct_id="api",
+            vpc=network_stack.vpc,
+            cluster=ecs_stack.cluster,
+            props=ServiceProps(
+                container_name="api",
+                container_location="ghcr.io/sage-bionetworks/api:1.0",
+                container_port=3333,
+            ),
+            listener=load_balancer_stack.https_listener,
+            priority=10,
+        )
+
+
+def test_service_stack_metric_scaling():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app, "EcsStack", vpc=network_stack.vpc, namespace="dev.app.io"
+    )
+
+    service_props = ServiceProps(
+        container_name="app",
+        container_location="ghcr.io/sage-bionetworks/app:1.0",
+        container_port=4200,
+        auto_scale_max_capacity=4,
+        container_logging=ContainerLogging(firelens=True),
+        scaling_metrics=[
+            ScalingMetric(
+                metric_name="EventLoopLag",
+                namespace="App/Node",
+                statistic="p99",
+                scaling_steps=[
+                    appscaling.ScalingInterval(upper=20, change=-1),
+                    appscaling.ScalingInterval(lower=100, change=+1),
+                ],
+            ),
+            ScalingMetric(
+                metric_name="InFlightRequests",
+                namespace="App/Node",
+                target_value=20,
+            ),
+        ],
+    )
+    app_stack = ServiceStack(
+        scope=cdk_app,
+        construct_id="app",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        props=service_props,
+    )
+
+    template = assertions.Template.from_stack(app_stack)
+    # the log lines reach CloudWatch as EMF documents, the metrics are extracted from them
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": assertions.Match.array_with(
+                [
+                    assertions.Match.object_like(
+                        {
+                            "Name": "app",
+                            "LogConfiguration": {
+                                "LogDriver": "awsfirelens",
+                                "Options": assertions.Match.object_like(
+                                    {
+                                        "Name": "cloudwatch_logs",
+                                        "log_key": "log",
+                                        "log_format": "json/emf",
+                                    }
+                                ),
+                            },
+                        }
+                    )
+                ]
+            )
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalingPolicy",
+        {
+            "PolicyType": "TargetTrackingScaling",
+            "TargetTrackingScalingPolicyConfiguration": assertions.Match.object_like(
+                {
+                    "TargetValue": 20,
+                    "CustomizedMetricSpecification": assertions.Match.object_like(
+                        {
+                            "MetricName": "InFlightRequests",
+                            "Namespace": "App/Node",
+                            "Dimensions": [{"Name": "Service", "Value": "app"}],
+                            "Statistic": "Average",
+                        }
+                    ),
+                }
+            ),
+        },
+    )
+    template.resource_properties_count_is(
+        "AWS::ApplicationAutoScaling::ScalingPolicy",
+        {"PolicyType": "StepScaling"},
+        2,
+    )
+    template.has_resource_properties(
+        "AWS::CloudWatch::Alarm",
+        {
+            "ComparisonOperator": "GreaterThanOrEqualToThreshold",
+            "Threshold": 100,
+            "Metrics": [
+                assertions.Match.object_like(
+                    {
+                        "MetricStat": assertions.Match.object_like(
+                            {
+                                "Metric": assertions.Match.object_like(
+                                    {"MetricName": "EventLoopLag"}
+                                ),
+                                "Stat": "p99",
+                            }
+                        )
+                    }
+                )
+            ],
+        },
+    )
+    template.has_resource_properties(
+        "AWS::IAM::Policy",
+        {
+            "PolicyDocument": {
+                "Statement": assertions.Match.array_with(
+                    [
+                        assertions.Match.object_like(
+                            {
+                                "Action": "cloudwatch:PutMetricData",
+                                "Condition": {
+                                    "StringEquals": {
+                                        "cloudwatch:namespace": ["App/Node"]
+                                    }
+                                },
+                            }
+                        )
+                    ]
+                )
+            }
+        },
+    )
+
+
+def test_service_props_scaling_metrics_need_firelens():
+    with pytest.raises(ValueError, match="need FireLens logging"):
+        ServiceProps(
+            container_name="app",
+            container_location="ghcr.io/sage-bionetworks/app:1.0",
+            container_port=4200,
+            scaling_metrics=[
+                ScalingMetric(
+                    metric_name="InFlightRequests",
+                    namespace="App/Node",
+                    target_value=20,
+                )
+            ],
+        )
+
+
+def test_scaling_metric_needs_one_policy():
+    with pytest.raises(ValueError):
+        ScalingMetric(metric_name="InFlightRequests", namespace="App/Node")
+    with pytest.raises(ValueError):
+        ScalingMetric(
+            metric_name="EventLoopLag",
+            namespace="App/Node",
+            statistic="p99",
+            target_value=100,
+        )
+
+
+def test_service_stack_predictive_scaling():
+    cdk_app = cdk.App()
+    network_stack = NetworkStack(cdk_app, "NetworkStack", vpc_cidr="10.254.192.0/24")
+    ecs_stack = EcsStack(
+        cdk_app, "EcsStack", vpc=network_stack.vpc, namespace="dev.app.io"
+    )
+
+    service_props = ServiceProps(
+        container_name="app",
+        container_location="ghcr.io/sage-bionetworks/app:1.0",
+        container_port=4200,
+        auto_scale_min_capacity=2,
+        auto_scale_max_capacity=4,
+        predictive_scaling=PredictiveScaling(
+            mode="ForecastAndScale",
+            scheduling_buffer_time=600,
+            max_capacity_breach_behavior="IncreaseMaxCapacity",
+            max_capacity_buffer=10,
+        ),
+    )
+    app_stack = ServiceStack(
+        scope=cdk_app,
+        construct_id="app",
+        vpc=network_stack.vpc,
+        cluster=ecs_stack.cluster,
+        props=service_props,
+    )
+
+    template = assertions.Template.from_stack(app_stack)
+    scalable_target = template.find_resources(
+        "AWS::ApplicationAutoScaling::ScalableTarget"
+    )
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalingPolicy",
+        {
+            "PolicyType": "PredictiveScaling",
+            "ScalingTargetId": {"Ref": list(scalable_target)[0]},
+            "PredictiveScalingPolicyConfiguration": {
+                "Mode": "ForecastAndScale",
+                "SchedulingBufferTime": 600,
+                "MaxCapacityBreachBehavior": "IncreaseMaxCapacity",
+                "MaxCapacityBuffer": 10,
+                "MetricSpecifications": [
+                    {
+                        "TargetValue": 50,
+                        "PredefinedMetricPairSpecification": {
+                            "PredefinedMetricType": "ECSServiceCPUUtilization"
+                        },
+                    }
+                ],
+            },
+        },
+    )
+
+
+def test_predictive_scaling_invalid():
+    with pytest.raises(ValueError):
+        PredictiveScaling(mode="Forecast")
+    with pytest.raises(ValueError):
+        PredictiveScaling(scheduling_buffer_time=7200)
+    with pytest.raises(ValueError):
+        PredictiveScaling(max_capacity_buffer=10)
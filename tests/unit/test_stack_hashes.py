@@ -0,0 +1,77 @@
+import json
+
+from src.helpers.stack_hashes import hash_stacks, plan_deploy, record_deploy
+
+
+def write_cloud_assembly(cdk_out, templates, dependencies, docker_images=None):
+    """Write a minimal cloud assembly with one asset manifest per stack"""
+    cdk_out.mkdir(exist_ok=True)
+    artifacts = {}
+    for name, template in templates.items():
+        (cdk_out / f"{name}.template.json").write_text(json.dumps(template))
+        (cdk_out / f"{name}.assets.json").write_text(
+            json.dumps(
+                {"files": {}, "dockerImages": (docker_images or {}).get(name, {})}
+            )
+        )
+        artifacts[f"{name}.assets"] = {
+            "type": "cdk:asset-manifest",
+            "properties": {"file": f"{name}.assets.json"},
+        }
+        artifacts[name] = {
+            "type": "aws:cloudformation:stack",
+            "properties": {"templateFile": f"{name}.template.json"},
+            "dependencies": dependencies.get(name, []) + [f"{name}.assets"],
+        }
+    (cdk_out / "manifest.json").write_text(json.dumps({"artifacts": artifacts}))
+
+
+TEMPLATES = {
+    "network": {"Resources": {"Vpc": {}}},
+    "ecs": {"Resources": {"Cluster": {}}},
+    "api": {"Resources": {"Service": {"Image": "api:1"}}},
+    "app": {"Resources": {"Service": {"Image": "app:1"}}},
+}
+DEPENDENCIES = {"ecs": ["network"], "api": ["ecs"], "app": ["api", "ecs"]}
+
+
+def test_plan_deploy_only_changed_stacks(tmp_path):
+    write_cloud_assembly(tmp_path / "before", TEMPLATES, DEPENDENCIES)
+    deployed_hashes_file = tmp_path / "deployed.json"
+    record_deploy(str(tmp_path / "before"), str(deployed_hashes_file))
+    deployed_hashes = json.loads(deployed_hashes_file.read_text())
+
+    assert plan_deploy(str(tmp_path / "before"), deployed_hashes) == []
+    assert plan_deploy(str(tmp_path / "before"), {}) == [
+        "network",
+        "ecs",
+        "api",
+        "app",
+    ]
+
+    changed_templates = {
+        **TEMPLATES,
+        "app": {"Resources": {"Service": {"Image": "app:2"}}},
+        "network": {"Resources": {"Vpc": {"Cidr": "10.0.0.0/24"}}},
+    }
+    write_cloud_assembly(tmp_path / "after", changed_templates, DEPENDENCIES)
+    assert plan_deploy(str(tmp_path / "after"), deployed_hashes) == ["network", "app"]
+
+
+def test_hash_stacks_includes_assets(tmp_path):
+    write_cloud_assembly(
+        tmp_path / "before",
+        TEMPLATES,
+        DEPENDENCIES,
+        docker_images={"api": {"abc123": {}}},
+    )
+    write_cloud_assembly(
+        tmp_path / "after",
+        TEMPLATES,
+        DEPENDENCIES,
+        docker_images={"api": {"def456": {}}},
+    )
+    before = hash_stacks(str(tmp_path / "before"))
+    after = hash_stacks(str(tmp_path / "after"))
+    assert before["api"] != after["api"]
+    assert before["app"] == after["app"]
@@ -0,0 +1,82 @@
+import json
+import threading
+
+import app
+import synth
+
+
+def test_synth_environments_share_image_versions(monkeypatch, tmp_path):
+    lookups = []
+
+    def get_image_versions(package_version):
+        lookups.append(package_version)
+        return {image_name: "1.0.0" for image_name in app.IMAGE_NAMES}
+
+    monkeypatch.setattr(app, "get_image_versions", get_image_versions)
+    image_versions_cache = {}
+    lock = threading.Lock()
+
+    for environment in ("dev", "stage"):
+        outdir = synth.synth_environment(
+            environment,
+            str(tmp_path / environment),
+            synth.load_context(),
+            image_versions_cache,
+            lock,
+        )
+        manifest = json.loads((tmp_path / environment / "manifest.json").read_text())
+        assert f"model-ad-{environment}-apex" in manifest["artifacts"]
+        assert outdir == str(tmp_path / environment)
+
+    assert lookups == ["edge"]
+
+
+def test_synth_watch_stale_modules():
+    dependencies = {
+        "app": {"src.service_stack", "src.service_props", "src.docdb_props"},
+        "src.service_stack": {"src.service_props"},
+        "src.service_props": set(),
+        "src.docdb_props": set(),
+    }
+
+    assert synth.get_stale_modules({"src.service_props"}, dependencies) == [
+        "src.service_props",
+        "src.service_stack",
+        "app",
+    ]
+    assert synth.get_stale_modules({"src.docdb_props"}, dependencies) == [
+        "src.docdb_props",
+        "app",
+    ]
+
+
+def test_synth_watch_local_imports():
+    module_paths = {
+        synth.get_module_name(path): path
+        for path in synth.get_watched_files()
+        if synth.get_module_name(path) is not None
+    }
+
+    imports = synth.get_local_imports(
+        module_paths["src.service_stack"], set(module_paths)
+    )
+
+    assert imports == {"src.service_props"}
+    assert synth.get_module_name(module_paths["src.helpers.capacity_plan"]) == (
+        "src.helpers.capacity_plan"
+    )
+
+
+def test_synth_watch_reloads_context(monkeypatch, tmp_path):
+    cdk_json = tmp_path / "cdk.json"
+    cdk_json.write_text(json.dumps({"context": {"feature": False}}))
+    cdk_context_json = tmp_path / "cdk.context.json"
+    monkeypatch.setattr(synth, "CDK_JSON", str(cdk_json))
+    monkeypatch.setattr(synth, "CDK_CONTEXT_JSON", str(cdk_context_json))
+    context = synth.load_context()
+
+    cdk_context_json.write_text(json.dumps({"feature": True}))
+    assert synth.reload_context([str(tmp_path / "app.py")], context) == {
+        "feature": False
+    }
+    assert synth.reload_context([str(cdk_context_json)], context) == {"feature": True}